@@ -0,0 +1,56 @@
+import os
+import sys
+
+from reportlab.pdfgen import canvas
+from reportlab.lib.pagesizes import letter
+from PIL import Image
+
+# Make the shared tello_common package (repository root) importable
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from tello_common.calibration import (BOARD_MARKER_LENGTH, BOARD_SQUARE_LENGTH, BOARD_SQUARES,
+                                      make_charuco_board)
+
+
+def generate_charuco_board_page(filename):
+    """
+    Generates the ChArUco calibration board on a letter-sized page and saves it as a PDF.
+    The board is printed at its true size, so print it at 100% scale (no "fit to page").
+
+    Args:
+        filename (str): The name for the output file (e.g., "charuco_board.pdf").
+    """
+    board = make_charuco_board()
+
+    # Create a new PDF file for the board
+    c = canvas.Canvas(filename, pagesize=letter)
+
+    # Generate the board image at 10 pixels per millimeter for high-quality printing
+    squares_x, squares_y = BOARD_SQUARES
+    px_per_m = 10000
+    board_img = board.generateImage((int(squares_x * BOARD_SQUARE_LENGTH * px_per_m),
+                                     int(squares_y * BOARD_SQUARE_LENGTH * px_per_m)))
+
+    # Convert to PIL Image for PDF drawing
+    pil_img = Image.fromarray(board_img)
+
+    # Size of the board on paper (1 inch = 72 points = 0.0254 m)
+    board_width_pt = squares_x * BOARD_SQUARE_LENGTH / 0.0254 * 72
+    board_height_pt = squares_y * BOARD_SQUARE_LENGTH / 0.0254 * 72
+
+    # Calculate position to center the board on the page
+    page_width_pt, page_height_pt = letter
+    x_pos = (page_width_pt - board_width_pt) / 2
+    y_pos = (page_height_pt - board_height_pt) / 2
+
+    # Draw the board and a label with the sizes the calibration expects
+    c.drawInlineImage(pil_img, x_pos, y_pos, width=board_width_pt, height=board_height_pt)
+    c.drawCentredString(page_width_pt / 2, y_pos - 30,
+                        f"ChArUco {squares_x}x{squares_y}, squares {BOARD_SQUARE_LENGTH * 1000:.0f} mm, "
+                        f"markers {BOARD_MARKER_LENGTH * 1000:.0f} mm (DICT_5X5_50)")
+
+    c.save()
+    print(f"Generated PDF: {filename}")
+
+
+if __name__ == "__main__":
+    generate_charuco_board_page("charuco_board.pdf")
@@ -0,0 +1,111 @@
+# aruco_tracker.py
+import cv2
+import numpy as np
+
+
+class ArucoTracker:
+    """
+    Speeds up ArUco detection while markers stay in view by only searching near
+    where they were found in the previous frame.
+
+    Each frame the tracker searches a padded window around the previous corners,
+    first on a downscaled copy of the window (corners are then refined at full
+    resolution), then on the full-resolution window. The whole frame is only
+    scanned again after ``max_misses`` frames in a row without a detection, or every
+    ``refresh_interval`` frames so new markers elsewhere in the view get picked up.
+    Detections are always returned in full-frame coordinates.
+    """
+
+    def __init__(self, detector, padding=0.5, pyramid_scale=0.5, min_marker_px=24,
+                 max_misses=5, refresh_interval=30):
+        self.detector = detector
+        self.padding = padding  # Window padding as a fraction of the markers' box size
+        self.pyramid_scale = pyramid_scale
+        self.min_marker_px = min_marker_px  # Don't downscale markers below this side length
+        self.max_misses = max_misses
+        self.refresh_interval = refresh_interval
+
+        self.last_corners = None
+        self.misses = 0
+        self.frames_since_full_scan = 0
+
+        # Counters to see how often each path is taken
+        self.full_scans = 0
+        self.window_scans = 0
+        self.pyramid_hits = 0
+
+    def reset(self):
+        """Forgets the tracked markers; the next frame gets a full scan."""
+        self.last_corners = None
+        self.misses = 0
+
+    def detect(self, gray):
+        """
+        Same contract as ``ArucoDetector.detectMarkers``: returns (corners, ids, rejected)
+        for a grayscale frame, with corners in full-frame coordinates.
+        """
+        self.frames_since_full_scan += 1
+        tracking = (self.last_corners is not None
+                    and self.misses < self.max_misses
+                    and self.frames_since_full_scan < self.refresh_interval)
+
+        if tracking:
+            corners, ids = self._detect_in_window(gray)
+            if ids is not None:
+                self.last_corners = corners
+                self.misses = 0
+                return corners, ids, ()
+            self.misses += 1
+            if self.misses < self.max_misses:
+                return (), None, ()
+
+        # Full-frame scan: first frame, lost track or periodic refresh
+        self.full_scans += 1
+        self.frames_since_full_scan = 0
+        corners, ids, rejected = self.detector.detectMarkers(gray)
+        self.misses = 0
+        self.last_corners = corners if ids is not None else None
+        return corners, ids, rejected
+
+    def _search_window(self, shape):
+        points = np.concatenate([c.reshape(-1, 2) for c in self.last_corners])
+        x_min, y_min = points.min(axis=0)
+        x_max, y_max = points.max(axis=0)
+        pad_x = (x_max - x_min) * self.padding + 8
+        pad_y = (y_max - y_min) * self.padding + 8
+        height, width = shape[:2]
+        x0 = int(max(0, x_min - pad_x))
+        y0 = int(max(0, y_min - pad_y))
+        x1 = int(min(width, x_max + pad_x))
+        y1 = int(min(height, y_max + pad_y))
+        return x0, y0, x1, y1
+
+    def _detect_in_window(self, gray):
+        self.window_scans += 1
+        x0, y0, x1, y1 = self._search_window(gray.shape)
+        window = gray[y0:y1, x0:x1]
+        offset = np.array([x0, y0], dtype=np.float32)
+
+        # Smallest marker side we expect, to decide whether the pyramid level is usable
+        smallest_side = min(np.linalg.norm(c.reshape(-1, 2)[0] - c.reshape(-1, 2)[1]) for c in self.last_corners)
+        if self.pyramid_scale < 1.0 and smallest_side * self.pyramid_scale >= self.min_marker_px:
+            small = cv2.resize(window, None, fx=self.pyramid_scale, fy=self.pyramid_scale,
+                               interpolation=cv2.INTER_AREA)
+            corners, ids, _ = self.detector.detectMarkers(small)
+            if ids is not None:
+                self.pyramid_hits += 1
+                corners = [c / self.pyramid_scale + offset for c in corners]
+                return self._refine(gray, corners), ids
+
+        corners, ids, _ = self.detector.detectMarkers(window)
+        if ids is None:
+            return (), None
+        return tuple(c + offset for c in corners), ids
+
+    @staticmethod
+    def _refine(gray, corners):
+        # Corners found on the downscaled window are only accurate to a couple of pixels
+        points = np.ascontiguousarray(np.concatenate(corners).reshape(-1, 1, 2), dtype=np.float32)
+        criteria = (cv2.TERM_CRITERIA_EPS + cv2.TERM_CRITERIA_MAX_ITER, 10, 0.05)
+        cv2.cornerSubPix(gray, points, (5, 5), (-1, -1), criteria)
+        return tuple(points.reshape(-1, 1, 4, 2))
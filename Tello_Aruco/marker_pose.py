@@ -0,0 +1,121 @@
+# marker_pose.py
+import time
+
+import cv2
+import numpy as np
+
+# Approximate intrinsics of the Tello camera at 960x720 (use calibrated values when available)
+TELLO_CAMERA_MATRIX = np.array([[921.2, 0.0, 459.9],
+                                [0.0, 919.0, 351.2],
+                                [0.0, 0.0, 1.0]])
+TELLO_DIST_COEFFS = np.array([-0.0335, 0.1052, 0.0013, -0.0066, 0.0])
+
+# The generator prints each marker (including its black border) 6 inches wide
+DEFAULT_MARKER_LENGTH = 6 * 0.0254  # meters
+
+# One row per detected marker
+MARKER_DTYPE = np.dtype([
+    ("id", np.int32),
+    ("rvec", np.float64, 3),
+    ("tvec", np.float64, 3),
+    ("reprojection_error", np.float32),  # RMS, in pixels
+    ("timestamp", np.float64),
+])
+
+# Corner order of cv2.aruco (top-left, top-right, bottom-right, bottom-left) on a unit square
+UNIT_MARKER = np.array([[-0.5, 0.5], [0.5, 0.5], [0.5, -0.5], [-0.5, -0.5]])
+
+
+class MarkerPoseEstimator:
+    """
+    Estimates the 6-DoF pose of every detected marker and returns them together.
+
+    Each marker's pose comes from OpenCV's IPPE square solver (one call per marker, about
+    30 us each). Everything around it is computed for all markers at once: corner
+    undistortion in a single call, marker sizes and object points by ID lookup and the
+    reprojection error. Results come back as a structured NumPy array (see MARKER_DTYPE).
+    """
+
+    def __init__(self, camera_matrix=TELLO_CAMERA_MATRIX, dist_coeffs=TELLO_DIST_COEFFS,
+                 marker_length=DEFAULT_MARKER_LENGTH, marker_lengths=None, max_id=1024):
+        self.camera_matrix = np.asarray(camera_matrix, dtype=np.float64)
+        self.dist_coeffs = np.asarray(dist_coeffs, dtype=np.float64)
+        self.focal_length = (self.camera_matrix[0, 0] + self.camera_matrix[1, 1]) / 2
+
+        # Side length of every marker ID, looked up by indexing instead of per-marker Python code
+        self.marker_lengths = np.full(max_id, marker_length, dtype=np.float64)
+        for marker_id, length in (marker_lengths or {}).items():
+            self.marker_lengths[marker_id] = length
+
+        # Object points of every marker ID (ids x 4 corners x xyz), for drawing and reprojection
+        self.object_points = np.zeros((max_id, 4, 3))
+        self.object_points[:, :, :2] = UNIT_MARKER[None] * self.marker_lengths[:, None, None]
+
+    def estimate(self, corners, ids, timestamp=None):
+        """
+        Returns a MARKER_DTYPE array with one row per detected marker.
+        ``corners`` and ``ids`` are what ``detectMarkers`` (or ArucoTracker.detect) returned.
+        """
+        if ids is None or len(ids) == 0:
+            return np.empty(0, dtype=MARKER_DTYPE)
+        if timestamp is None:
+            timestamp = time.time()
+
+        ids = np.asarray(ids).reshape(-1)
+        image_points = np.concatenate(corners).reshape(-1, 1, 2).astype(np.float64)
+        # Normalized (undistorted) image coordinates of all corners, markers x 4 x 2
+        points = cv2.undistortPoints(image_points, self.camera_matrix, self.dist_coeffs).reshape(-1, 4, 2)
+
+        rvecs, translations = self._solve_each(image_points.reshape(-1, 4, 2), ids)
+        rotations = rotation_matrices(rvecs)
+
+        result = np.empty(len(ids), dtype=MARKER_DTYPE)
+        result["id"] = ids
+        result["rvec"] = rvecs
+        result["tvec"] = translations
+        result["reprojection_error"] = self._reprojection_error(points, rotations, translations, ids)
+        result["timestamp"] = timestamp
+        return result
+
+    def _solve_each(self, image_points, ids):
+        rvecs = np.empty((len(ids), 3))
+        tvecs = np.empty((len(ids), 3))
+        for index, marker_id in enumerate(ids):
+            _, rvec, tvec = cv2.solvePnP(self.object_points[marker_id], image_points[index], self.camera_matrix,
+                                         self.dist_coeffs, flags=cv2.SOLVEPNP_IPPE_SQUARE)
+            rvecs[index] = rvec.ravel()
+            tvecs[index] = tvec.ravel()
+        return rvecs, tvecs
+
+    def _reprojection_error(self, points, rotations, translations, ids):
+        # Project in normalized coordinates (observations are undistorted) and scale to pixels
+        camera_points = np.einsum("nij,nkj->nki", rotations, self.object_points[ids]) + translations[:, None, :]
+        projected = camera_points[:, :, :2] / camera_points[:, :, 2:3]
+        squared = ((projected - points) ** 2).sum(axis=2).mean(axis=1)
+        return np.sqrt(squared) * self.focal_length
+
+    def draw_axes(self, frame, markers, axis_length=None):
+        """Draws the coordinate axes of every marker on the frame."""
+        for marker in markers:
+            length = axis_length or self.marker_lengths[marker["id"]] / 2
+            cv2.drawFrameAxes(frame, self.camera_matrix, self.dist_coeffs, marker["rvec"], marker["tvec"], length)
+
+
+def rotation_matrices(rvecs):
+    """Vectorized Rodrigues conversion of rotation vectors (n x 3) to rotation matrices (n x 3 x 3)."""
+    angles = np.linalg.norm(rvecs, axis=1)
+    axes = rvecs / np.maximum(angles, 1e-12)[:, None]
+    K = np.zeros((len(rvecs), 3, 3))
+    K[:, 0, 1], K[:, 0, 2] = -axes[:, 2], axes[:, 1]
+    K[:, 1, 0], K[:, 1, 2] = axes[:, 2], -axes[:, 0]
+    K[:, 2, 0], K[:, 2, 1] = -axes[:, 1], axes[:, 0]
+    sines, cosines = np.sin(angles)[:, None, None], np.cos(angles)[:, None, None]
+    return np.eye(3) + sines * K + (1 - cosines) * (K @ K)
+
+
+def nearest_marker(markers, candidate_ids):
+    """Returns the closest marker whose ID is in ``candidate_ids``, or None."""
+    candidates = markers[np.isin(markers["id"], candidate_ids)]
+    if len(candidates) == 0:
+        return None
+    return candidates[np.argmin(candidates["tvec"][:, 2])]
@@ -1,6 +1,16 @@
+import os
+import sys
 from djitellopy import Tello
 import cv2
 import numpy as np
+from aruco_tracker import ArucoTracker
+from marker_pose import MarkerPoseEstimator, nearest_marker
+
+# Make the shared tello_common package (repository root) importable
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from tello_common.calibration import Undistorter, load_calibration
+from tello_common.command_scheduler import CommandScheduler
+from tello_common.frame_views import FrameViews
 
 # Connect to the drone
 tello = Tello()
@@ -9,6 +19,10 @@ print(tello.get_battery())
 tello.streamon()  # Start the video stream
 tello.takeoff()
 
+# Flips run on the scheduler's worker thread so detection keeps running during a flip.
+# Repeats submitted while the same marker stays in view are dropped.
+scheduler = CommandScheduler(tello)
+
 # Create a window to display the video feed
 cv2.namedWindow("Tello Video Feed")
 
@@ -16,6 +30,29 @@ cv2.namedWindow("Tello Video Feed")
 aruco_dict = cv2.aruco.getPredefinedDictionary(cv2.aruco.DICT_4X4_50)
 parameters = cv2.aruco.DetectorParameters()
 detector = cv2.aruco.ArucoDetector(aruco_dict, parameters)
+# Search only around the last detection while a marker stays in view
+tracker = ArucoTracker(detector)
+# Correct lens distortion if the camera has been calibrated (python -m tello_common.calibration)
+calibration = load_calibration()
+if calibration is not None:
+    undistorter = Undistorter(calibration)
+    # 6-DoF pose of every detected marker, estimated in one pass (undistorted frames need no distortion model)
+    pose_estimator = MarkerPoseEstimator(undistorter.camera_matrix, np.zeros(5))
+else:
+    undistorter = None
+    pose_estimator = MarkerPoseEstimator()
+
+# Marker IDs that trigger a flip
+flip_commands = {
+    1: "flip_forward",
+    2: "flip_back",
+    3: "flip_left",
+    4: "flip_right",
+}
+flip_ids = np.array(list(flip_commands))
+
+# Grayscale (and any other conversion) of the current frame, computed once into reused buffers
+views = FrameViews()
 
 
 
@@ -24,29 +61,30 @@ while True:
     frame = frame_read.frame
     # if not ret:
     #     break
+    if undistorter is not None:
+        frame = undistorter.undistort(frame)
 
     # Convert to Grayscale
-    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    views.reset(frame)
+    gray = views.gray
 
-    # Detect Markers
-    corners, ids, rejected = detector.detectMarkers(gray)
+    # Detect Markers (full-frame scan only when the tracker lost the markers)
+    corners, ids, rejected = tracker.detect(gray)
     # print(ids)
 
     # Visualize Detected Markers
     if ids is not None:
         cv2.aruco.drawDetectedMarkers(frame, corners, ids)
-        if ids == 0:
+        markers = pose_estimator.estimate(corners, ids)
+        pose_estimator.draw_axes(frame, markers)
+
+        # Marker 0 means land, whatever else is in view
+        if np.any(markers["id"] == 0):
             break
-        elif ids == 1:
-            tello.flip_forward()
-        elif ids == 2:
-            tello.flip_back()
-        elif ids == 3:
-            tello.flip_left()
-        elif ids == 4:
-            tello.flip_right()
-        else:
-            continue
+        # With several command markers in view, act on the closest one
+        marker = nearest_marker(markers, flip_ids)
+        if marker is not None:
+            scheduler.submit(flip_commands[int(marker["id"])])
 
 
     # Display the frame
@@ -56,7 +94,8 @@ while True:
     if cv2.waitKey(1) & 0xFF == ord('q'):
         break
 
-# Clean up
+# Clean up: land ahead of any queued flips and wait for the drone
+scheduler.submit("land")
+scheduler.close()
 tello.streamoff()
 cv2.destroyAllWindows()
-tello.land()
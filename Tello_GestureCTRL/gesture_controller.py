@@ -1,66 +1,241 @@
 # gesture_controller.py
+import os
+import sys
+import threading
+import time
 import mediapipe as mp
 import cv2
+import numpy as np
+
+# Make the shared tello_common package (repository root) importable
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from tello_common.landmark_roi import LandmarkROI
+
+# Tip and base landmark indices of thumb, index, middle, ring and pinky
+FINGER_TIPS = np.array([4, 8, 12, 16, 20])
+FINGER_BASES = np.array([2, 5, 9, 13, 17])
+
+# Gestures as finger patterns (thumb, index, middle, ring, pinky): 1 = up, 0 = down,
+# None = either. Checked in order; the first matching row wins, no match is "HOVER".
+# Add a row to add a gesture.
+GESTURE_RULES = [
+    ("TAKE_OFF", (1, 1, 1, 1, 1)),
+    ("LAND", (0, 0, 0, 0, 0)),
+    ("FORWARD", (None, 1, 0, 0, 0)),
+    ("ROTATE_LEFT", (None, 1, 1, 0, 0)),  # Example gesture for turning
+]
+DEFAULT_GESTURE = "HOVER"
+
+# Skeleton segments as an M x 2 array of landmark indices, for drawing
+HAND_CONNECTIONS = np.array(sorted(mp.solutions.hands.HAND_CONNECTIONS))
+
+GESTURE_NAMES = [name for name, _ in GESTURE_RULES] + [DEFAULT_GESTURE]
+# Rule table as arrays: required finger state and which fingers are checked
+_RULE_STATES = np.array([[bool(v) for v in pattern] for _, pattern in GESTURE_RULES])
+_RULE_CHECKED = np.array([[v is not None for v in pattern] for _, pattern in GESTURE_RULES])
+
+BACKENDS = ["solutions", "tasks"]
+# Hand landmarker model for the "tasks" backend, download it from
+# https://storage.googleapis.com/mediapipe-models/hand_landmarker/hand_landmarker/float16/latest/hand_landmarker.task
+HAND_LANDMARKER_MODEL = os.path.join(os.path.dirname(os.path.abspath(__file__)), "hand_landmarker.task")
+# Input size of the hand landmark model; crops are resized to it
+HAND_INPUT_SIZE = 224
 
 
 class GestureController:
-    """Detects and interprets hand gestures using MediaPipe."""
+    """
+    Detects and interprets hand gestures using MediaPipe.
 
-    def __init__(self):
+    ``backend="solutions"`` (default) runs ``mp.solutions.hands`` synchronously on every frame.
+    ``backend="tasks"`` uses the MediaPipe Tasks hand landmarker in live-stream mode:
+    ``process_frame`` only hands the frame over with a timestamp and returns the newest
+    result that has arrived through the callback, so it never waits for inference. When
+    inference falls behind, MediaPipe skips frames; ``dropped`` counts them and ``latency``
+    is the time from handing over the frame to its result.
+
+    With ``roi=True`` each frame is cropped to the hands of the previous frame before
+    inference (see ``tello_common.landmark_roi``); landmarks are still full-frame coordinates.
+    """
+
+    def __init__(self, max_num_hands=2, backend="solutions", model_path=HAND_LANDMARKER_MODEL, roi=False):
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown backend '{backend}', expected one of {BACKENDS}")
+        self.backend = backend
         self.mp_hands = mp.solutions.hands
-        self.hands = self.mp_hands.Hands(
-            min_detection_confidence=0.75,
-            min_tracking_confidence=0.75
-        )
         self.mp_drawing = mp.solutions.drawing_utils
+        if backend == "solutions":
+            self.hands = self.mp_hands.Hands(
+                max_num_hands=max_num_hands,
+                min_detection_confidence=0.75,
+                min_tracking_confidence=0.75
+            )
+        else:
+            if not os.path.exists(model_path):
+                raise FileNotFoundError(f"Hand landmarker model not found: {model_path} (see HAND_LANDMARKER_MODEL)")
+            vision = mp.tasks.vision
+            options = vision.HandLandmarkerOptions(
+                base_options=mp.tasks.BaseOptions(model_asset_path=model_path),
+                running_mode=vision.RunningMode.LIVE_STREAM,
+                num_hands=max_num_hands,
+                min_hand_detection_confidence=0.75,
+                min_hand_presence_confidence=0.75,
+                min_tracking_confidence=0.75,
+                result_callback=self._on_result
+            )
+            self.landmarker = vision.HandLandmarker.create_from_options(options)
+
+        self.roi = LandmarkROI(HAND_INPUT_SIZE) if roi else None
+
+        # Results of the last processed frame
+        self.landmarks = np.empty((0, 21, 3), dtype=np.float32)  # Hands x landmarks x (x, y, z)
+        self.gestures = []  # Gesture of every hand, in the same order
+
+        # Live-stream state: frames handed over and not answered yet (timestamp_ms -> time sent, crop box, shape)
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._last_timestamp_ms = 0
+        self._latest = None  # (hand_landmarks_list, results, landmarks) of the newest callback
+        self.result_timestamp_ms = None  # Timestamp of the frame the current result belongs to
+        self.latency = None  # Seconds from handing over a frame to its result
 
-    def process_frame(self, frame):
+        # Counters
+        self.submitted = 0
+        self.completed = 0
+        self.dropped = 0
+
+    def process_frame(self, frame, views=None):
         """
-        Processes a video frame to detect hands and gestures.
+        Processes a video frame to detect hands and gestures. With the frame's FrameViews
+        (``packet.views``) its RGB conversion is shared with other detectors.
         Returns the recognized gesture, hand landmarks, and the processing results.
+        With several hands in view, "LAND" from any hand wins, otherwise the first hand's
+        gesture is returned; ``self.gestures`` has the gesture of every hand.
+        With the "tasks" backend the result is the newest one available, usually from an
+        earlier frame ("No Hand" until the first one arrives).
         """
-        frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        results = self.hands.process(frame_rgb)
+        if self.roi is not None:
+            frame_rgb, box = self.roi.prepare(frame, views)
+        elif views is not None:
+            frame_rgb, box = views.rgb, None
+        else:
+            frame_rgb, box = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB), None
+        if self.backend == "solutions":
+            results = self.hands.process(frame_rgb)
+            hand_landmarks_list = list(results.multi_hand_landmarks or [])
+            self.landmarks = self._to_full_frame(hand_landmarks_list, box, frame.shape)
+        else:
+            self._detect_async(frame_rgb, box, frame.shape)
+            with self._lock:
+                hand_landmarks_list, results, self.landmarks = self._latest or ([], None, self.landmarks[:0])
+        self.gestures = classify_gestures(self.landmarks)
 
-        gesture = "No Hand"
-        hand_landmarks_list = []
+        if not self.gestures:
+            gesture = "No Hand"
+        elif "LAND" in self.gestures:
+            gesture = "LAND"
+        else:
+            gesture = self.gestures[0]
+        return gesture, hand_landmarks_list, results
 
-        if results.multi_hand_landmarks:
-            for hand_landmarks in results.multi_hand_landmarks:
-                hand_landmarks_list.append(hand_landmarks)
-                gesture = self._get_gesture(hand_landmarks)
+    def _to_full_frame(self, hand_landmarks_list, box, frame_shape):
+        # Landmarks of a crop are moved back to full-frame coordinates, in the array and the landmark objects
+        landmarks = landmarks_to_array(hand_landmarks_list)
+        if box is not None:
+            LandmarkROI.remap(landmarks, box, frame_shape)
+            write_landmarks(hand_landmarks_list, landmarks)
+        if self.roi is not None:
+            self.roi.update(landmarks, frame_shape)
+        return landmarks
+
+    def _detect_async(self, frame_rgb, box, frame_shape):
+        # Live-stream timestamps must increase strictly, even for frames within the same millisecond
+        timestamp_ms = max(int(time.monotonic() * 1000), self._last_timestamp_ms + 1)
+        self._last_timestamp_ms = timestamp_ms
+        with self._lock:
+            self._pending[timestamp_ms] = (time.perf_counter(), box, frame_shape)
+        self.submitted += 1
+        self.landmarker.detect_async(mp.Image(image_format=mp.ImageFormat.SRGB, data=frame_rgb), timestamp_ms)
+
+    def _on_result(self, result, output_image, timestamp_ms):
+        # Called on MediaPipe's thread; frames handed over before this one got no result and were dropped
+        now = time.perf_counter()
+        with self._lock:
+            sent, box, frame_shape = self._pending.pop(timestamp_ms, (None, None, None))
+            skipped = [ts for ts in self._pending if ts < timestamp_ms]
+            for ts in skipped:
+                del self._pending[ts]
+            self.dropped += len(skipped)
+            self.completed += 1
+            hand_landmarks_list = list(result.hand_landmarks)
+            if frame_shape is not None:
+                landmarks = self._to_full_frame(hand_landmarks_list, box, frame_shape)
+            else:
+                landmarks = landmarks_to_array(hand_landmarks_list)
+            self._latest = (hand_landmarks_list, result, landmarks)
+            self.result_timestamp_ms = timestamp_ms
+            if sent is not None:
+                self.latency = now - sent
+
+    def close(self):
+        if self.backend == "solutions":
+            self.hands.close()
+        else:
+            self.landmarker.close()
+
+
+def landmarks_to_array(hand_landmarks_list):
+    """
+    Converts MediaPipe hand landmarks to one float32 array (hands x 21 x 3), once per frame.
+    Accepts both solutions results (landmark lists with ``.landmark``) and Tasks results (plain lists).
+    """
+    if not hand_landmarks_list:
+        return np.empty((0, 21, 3), dtype=np.float32)
+    return np.array([[(lm.x, lm.y, lm.z) for lm in getattr(hand_landmarks, "landmark", hand_landmarks)]
+                     for hand_landmarks in hand_landmarks_list], dtype=np.float32)
+
+
+def write_landmarks(hand_landmarks_list, landmarks):
+    """Copies x, y, z from the array back into the MediaPipe landmark objects (e.g. after remapping)."""
+    for hand_landmarks, points in zip(hand_landmarks_list, landmarks.tolist()):
+        for lm, (x, y, z) in zip(getattr(hand_landmarks, "landmark", hand_landmarks), points):
+            lm.x, lm.y, lm.z = x, y, z
 
-        return gesture, hand_landmarks_list, results
 
-    def _get_gesture(self, hand_landmarks):
-        """Analyzes hand landmarks to identify a specific gesture."""
-        # Check if the hand is upright
-        if not hand_landmarks:
-            return "No Hand"
+def fingers_up(landmarks):
+    """Which fingers are up for every hand (hands x 5 bool)."""
+    tips = landmarks[:, FINGER_TIPS]
+    bases = landmarks[:, FINGER_BASES]
+    # Fingers are up when the tip is above the base; the thumb is checked sideways (x)
+    up = tips[:, :, 1] < bases[:, :, 1]
+    up[:, 0] = tips[:, 0, 0] > bases[:, 0, 0]
+    return up
 
-        # Simple logic based on finger positions relative to each other
-        fingers_up = [False] * 5  # Thumb, Index, Middle, Ring, Pinky
 
-        # Tip and base landmark indices
-        finger_tips = [4, 8, 12, 16, 20]
-        finger_bases = [2, 5, 9, 13, 17]
+def classify_gestures(landmarks):
+    """Evaluates GESTURE_RULES for all hands at once and returns one gesture name per hand."""
+    if len(landmarks) == 0:
+        return []
+    up = fingers_up(landmarks)
+    # hands x rules: every checked finger has the required state
+    matches = ((up[:, None, :] == _RULE_STATES[None]) | ~_RULE_CHECKED[None]).all(axis=2)
+    # Index of the first matching rule, or the default when none matches
+    first = np.where(matches.any(axis=1), matches.argmax(axis=1), len(GESTURE_RULES))
+    return [GESTURE_NAMES[index] for index in first]
 
-        # Check for thumb up (approximate, based on x-coordinate)
-        fingers_up[0] = hand_landmarks.landmark[finger_tips[0]].x > hand_landmarks.landmark[finger_bases[0]].x
 
-        # Check for other fingers up (based on y-coordinate)
-        for i in range(1, 5):
-            fingers_up[i] = hand_landmarks.landmark[finger_tips[i]].y < hand_landmarks.landmark[finger_bases[i]].y
+def create_gesture_processor(backend="solutions", roi=False):
+    """
+    Builds a GestureController inside an inference worker process (tello_common.inference_worker).
+    The returned function sends back only plain values: gesture, landmark array and per-hand gestures.
+    """
+    controller = GestureController(backend=backend, roi=roi)
 
-        # Interpret gestures
-        if all(fingers_up):
-            return "TAKE_OFF"
-        if all(not f for f in fingers_up):
-            return "LAND"
-        if fingers_up[1] and not any(fingers_up[2:]):
-            return "FORWARD"
-        if fingers_up[1] and fingers_up[2] and not any(fingers_up[3:]):
-            return "ROTATE_LEFT"  # Example gesture for turning
+    def process(frame):
+        gesture, _, _ = controller.process_frame(frame)
+        return gesture, controller.landmarks, controller.gestures
+    return process
 
-        return "HOVER"
 
+def draw_hand_landmarks(overlay, landmarks, color=(0, 255, 0)):
+    """Draws landmark arrays (hands x 21 x 3, normalized coordinates) with the MediaPipe hand skeleton."""
+    overlay.skeleton(landmarks, HAND_CONNECTIONS, color)
@@ -1,72 +1,196 @@
 # pose_controller.py
+import os
+import sys
 import mediapipe as mp
 import cv2
+import numpy as np
+
+# Make the shared tello_common package (repository root) importable
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from tello_common.landmark_roi import LandmarkROI
+
+# MediaPipe Pose landmark indices used by the rules
+LEFT_SHOULDER = 11
+RIGHT_SHOULDER = 12
+LEFT_WRIST = 15
+RIGHT_WRIST = 16
+# Derived point appended after the 33 landmarks: the average of both shoulders
+SHOULDER_CENTER = 33
+
+X, Y, Z = 0, 1, 2
+
+# Skeleton segments as an M x 2 array of landmark indices, for drawing
+POSE_CONNECTIONS = np.array(sorted(mp.solutions.pose.POSE_CONNECTIONS))
+
+# Input size of the pose landmark model; crops are resized to it
+POSE_INPUT_SIZE = 256
+
+# Quality levels for tello_common.quality_governor, cheapest first. ``scale`` downscales
+# full frames before detection (crops are already at the model's input size).
+POSE_QUALITY_LEVELS = [
+    {"model_complexity": 0, "scale": 0.5},
+    {"model_complexity": 0, "scale": 1.0},
+    {"model_complexity": 1, "scale": 1.0},
+    {"model_complexity": 2, "scale": 1.0},
+]
+
+# Poses as lists of conditions (a, axis, op, b, offset), each meaning
+# "landmark a's coordinate is less/greater than landmark b's coordinate plus offset".
+# Rules are checked in order; the first one whose conditions all hold wins, no match is
+# "HOVER". Add a row to add a pose.
+POSE_RULES = [
+    # Arms Up for Takeoff
+    ("TAKE_OFF", [(LEFT_WRIST, Y, "<", LEFT_SHOULDER, 0.0),
+                  (RIGHT_WRIST, Y, "<", RIGHT_SHOULDER, 0.0)]),
+    # Arms Down for Land
+    ("LAND", [(LEFT_WRIST, Y, ">", SHOULDER_CENTER, 0.1),
+              (RIGHT_WRIST, Y, ">", SHOULDER_CENTER, 0.1)]),
+    # Left Arm Raised for Turn Left
+    ("TURN_LEFT", [(LEFT_WRIST, Y, "<", LEFT_SHOULDER, 0.0),
+                   (RIGHT_WRIST, Y, ">", RIGHT_SHOULDER, 0.0)]),
+    # Right Arm Raised for Turn Right
+    ("TURN_RIGHT", [(RIGHT_WRIST, Y, "<", RIGHT_SHOULDER, 0.0),
+                    (LEFT_WRIST, Y, ">", LEFT_SHOULDER, 0.0)]),
+    # A simple movement: moving arms forward
+    ("FORWARD", [(LEFT_WRIST, Z, "<", LEFT_SHOULDER, -0.2),
+                 (RIGHT_WRIST, Z, "<", RIGHT_SHOULDER, -0.2)]),
+]
+DEFAULT_COMMAND = "HOVER"
+
+COMMAND_NAMES = [name for name, _ in POSE_RULES] + [DEFAULT_COMMAND]
+
+
+def _compile_rules(rules):
+    """Flattens the rule table into arrays: one column per condition, one row per rule."""
+    conditions = [condition for _, rule in rules for condition in rule]
+    a, axis, op, b, offset = zip(*conditions)
+    members = np.zeros((len(rules), len(conditions)), dtype=bool)
+    column = 0
+    for row, (_, rule) in enumerate(rules):
+        members[row, column:column + len(rule)] = True
+        column += len(rule)
+    return (np.array(a), np.array(axis), np.array([o == "<" for o in op]), np.array(b),
+            np.array(offset, dtype=np.float32), members)
+
+
+_RULE_A, _RULE_AXIS, _RULE_LESS, _RULE_B, _RULE_OFFSET, _RULE_MEMBERS = _compile_rules(POSE_RULES)
 
 
 class PoseController:
-    """Detects and interprets body poses using MediaPipe."""
+    """
+    Detects and interprets body poses using MediaPipe.
 
-    def __init__(self):
+    With ``roi=True`` each frame is cropped to the person of the previous frame before
+    inference (see ``tello_common.landmark_roi``); landmarks are still full-frame coordinates.
+    ``set_quality`` changes the model complexity and full-frame scale at runtime.
+    """
+
+    def __init__(self, roi=False, model_complexity=1, scale=1.0):
         self.mp_pose = mp.solutions.pose
-        self.pose = self.mp_pose.Pose(
-            static_image_mode=False,
-            model_complexity=1,
-            min_detection_confidence=0.5,
-            min_tracking_confidence=0.5
-        )
         self.mp_drawing = mp.solutions.drawing_utils
-
-    def process_frame(self, frame):
+        self.roi = LandmarkROI(POSE_INPUT_SIZE, padding=0.3) if roi else None
+        self.pose = None
+        self.model_complexity = None
+        self.scale = 1.0
+        self.set_quality(model_complexity, scale)
+
+        # Results of the last processed frame
+        self.landmarks = np.empty((0, 33, 4), dtype=np.float32)  # People x landmarks x (x, y, z, visibility)
+        self.commands = []  # Pose command of every person, in the same order
+
+    def set_quality(self, model_complexity=None, scale=None):
+        """Switches the pose model (0 = lite, 1 = full, 2 = heavy) and the full-frame downscale factor."""
+        if model_complexity is not None and model_complexity != self.model_complexity:
+            if self.pose is not None:
+                self.pose.close()
+            self.pose = self.mp_pose.Pose(
+                static_image_mode=False,
+                model_complexity=model_complexity,
+                min_detection_confidence=0.5,
+                min_tracking_confidence=0.5
+            )
+            self.model_complexity = model_complexity
+        if scale is not None:
+            self.scale = scale
+            if self.roi is not None:
+                self.roi.full_scale = scale
+
+    def process_frame(self, frame, views=None):
         """
         Processes a video frame to detect body pose and interpret gestures.
         Returns the recognized pose command, pose landmarks, and the results.
+        With the frame's FrameViews (``packet.views``) its RGB conversion is shared with other detectors.
         """
-        frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        if self.roi is not None:
+            frame_rgb, box = self.roi.prepare(frame, views)
+        elif views is not None:
+            frame_rgb, box = views.scaled(self.scale, "rgb"), None
+        else:
+            small = frame if self.scale == 1.0 else cv2.resize(frame, None, fx=self.scale, fy=self.scale,
+                                                                interpolation=cv2.INTER_AREA)
+            frame_rgb, box = cv2.cvtColor(small, cv2.COLOR_BGR2RGB), None
         results = self.pose.process(frame_rgb)
 
-        command = "HOVER"
-        pose_landmarks_list = []
+        pose_landmarks_list = [results.pose_landmarks] if results.pose_landmarks else []
+        self.landmarks = landmarks_to_array(pose_landmarks_list)
+        if box is not None:
+            # Landmarks of the crop are moved back to full-frame coordinates, in the array and the landmark objects
+            LandmarkROI.remap(self.landmarks, box, frame.shape)
+            write_landmarks(pose_landmarks_list, self.landmarks)
+        if self.roi is not None:
+            self.roi.update(self.landmarks, frame.shape)
+        self.commands = classify_poses(self.landmarks)
+
+        command = self.commands[0] if self.commands else DEFAULT_COMMAND
+        return command, pose_landmarks_list, results
 
-        if results.pose_landmarks:
-            pose_landmarks_list.append(results.pose_landmarks)
-            command = self._get_pose_command(results.pose_landmarks)
 
-        return command, pose_landmarks_list, results
+def landmarks_to_array(pose_landmarks_list):
+    """Converts MediaPipe pose landmarks to one float32 array (people x 33 x 4), once per frame."""
+    if not pose_landmarks_list:
+        return np.empty((0, 33, 4), dtype=np.float32)
+    return np.array([[(lm.x, lm.y, lm.z, lm.visibility) for lm in pose_landmarks.landmark]
+                     for pose_landmarks in pose_landmarks_list], dtype=np.float32)
 
-    def _get_pose_command(self, pose_landmarks):
-        """Analyzes pose landmarks to identify a specific body command."""
-        if not pose_landmarks:
-            return "HOVER"
 
-        # Landmark indices for key body parts
-        left_shoulder = pose_landmarks.landmark[self.mp_pose.PoseLandmark.LEFT_SHOULDER]
-        right_shoulder = pose_landmarks.landmark[self.mp_pose.PoseLandmark.RIGHT_SHOULDER]
-        left_wrist = pose_landmarks.landmark[self.mp_pose.PoseLandmark.LEFT_WRIST]
-        right_wrist = pose_landmarks.landmark[self.mp_pose.PoseLandmark.RIGHT_WRIST]
+def write_landmarks(pose_landmarks_list, landmarks):
+    """Copies x, y, z from the array back into the MediaPipe landmark objects (e.g. after remapping)."""
+    for pose_landmarks, points in zip(pose_landmarks_list, landmarks.tolist()):
+        for lm, (x, y, z, _) in zip(pose_landmarks.landmark, points):
+            lm.x, lm.y, lm.z = x, y, z
 
-        # Use the average shoulder position as a reference point
-        shoulder_center_y = (left_shoulder.y + right_shoulder.y) / 2
 
-        # Define movement based on arm positions relative to shoulders
-        # Arms Up for Takeoff
-        if (left_wrist.y < left_shoulder.y and right_wrist.y < right_shoulder.y):
-            return "TAKE_OFF"
+def classify_poses(landmarks):
+    """Evaluates POSE_RULES for all people at once and returns one command name per person."""
+    if len(landmarks) == 0:
+        return []
+    shoulder_center = landmarks[:, [LEFT_SHOULDER, RIGHT_SHOULDER], :3].mean(axis=1, keepdims=True)
+    points = np.concatenate([landmarks[:, :, :3], shoulder_center], axis=1)
 
-        # Arms Down for Land
-        if (left_wrist.y > shoulder_center_y + 0.1 and right_wrist.y > shoulder_center_y + 0.1):
-            return "LAND"
+    # people x conditions
+    difference = points[:, _RULE_A, _RULE_AXIS] - points[:, _RULE_B, _RULE_AXIS] - _RULE_OFFSET
+    holds = np.where(_RULE_LESS, difference < 0, difference > 0)
+    # people x rules: all of a rule's conditions hold
+    matches = (holds[:, None, :] | ~_RULE_MEMBERS[None]).all(axis=2)
+    first = np.where(matches.any(axis=1), matches.argmax(axis=1), len(POSE_RULES))
+    return [COMMAND_NAMES[index] for index in first]
 
-        # Left Arm Raised for Turn Left
-        if (left_wrist.y < left_shoulder.y and right_wrist.y > right_shoulder.y):
-            return "TURN_LEFT"
 
-        # Right Arm Raised for Turn Right
-        if (right_wrist.y < right_shoulder.y and left_wrist.y > left_shoulder.y):
-            return "TURN_RIGHT"
+def create_pose_processor(roi=False):
+    """
+    Builds a PoseController inside an inference worker process (tello_common.inference_worker).
+    The returned function sends back only plain values: command and landmark array.
+    ``InferenceWorkerPool.configure(**settings)`` is passed on to ``set_quality``.
+    """
+    controller = PoseController(roi=roi)
 
-        # A simple movement: moving arms forward
-        if (left_wrist.z < left_shoulder.z - 0.2 and right_wrist.z < right_shoulder.z - 0.2):
-             return "FORWARD"
+    def process(frame):
+        command, _, _ = controller.process_frame(frame)
+        return command, controller.landmarks
+    process.configure = controller.set_quality
+    return process
 
-        return "HOVER"
 
+def draw_pose_landmarks(overlay, landmarks, color=(0, 255, 0)):
+    """Draws landmark arrays (people x 33 x 4, normalized coordinates) with the MediaPipe pose skeleton."""
+    overlay.skeleton(landmarks, POSE_CONNECTIONS, color)
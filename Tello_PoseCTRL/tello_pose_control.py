@@ -1,78 +1,90 @@
 # tello_pose_control.py
+import os
+import sys
 import threading
 import time
+from functools import partial
 import cv2
+import numpy as np
 from djitellopy import Tello
-from pose_controller import PoseController  # Import the new controller
+from pose_controller import POSE_QUALITY_LEVELS, PoseController, create_pose_processor, draw_pose_landmarks  # Import the new controller
+
+# Make the shared tello_common package (repository root) importable
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from tello_common.activity_gate import ActivityGate
+from tello_common.command_scheduler import CommandScheduler
+from tello_common.frame_bus import FrameBus
+from tello_common.frame_source import H264FrameSource
+from tello_common.inference_worker import InferenceWorkerPool
+from tello_common.overlay import OverlayRenderer
+from tello_common.quality_governor import QualityGovernor
+from tello_common.rc_control import RCController
 
 # Use shared variables for state and communication
-frame_lock = threading.Lock()
-latest_frame = None
+frame_bus = FrameBus()  # Ring of the newest video frames, shared by all threads
 latest_pose_command = "HOVER"
 is_running = True
-command_cooldown = 1.0  # Increased cooldown for full-body poses
-last_command_time = time.time()
 in_flight = False
 
+# Velocity setpoints (left/right, forward/back, up/down, yaw; -100..100) of the continuous poses.
+# They are streamed to the drone with send_rc_control; without a person the deadman stops it.
+POSE_VELOCITIES = {
+    "FORWARD": (0, 40, 0, 0),
+    "TURN_LEFT": (0, 0, 0, -45),
+    "TURN_RIGHT": (0, 0, 0, 45),
+    "HOVER": (0, 0, 0, 0),
+}
+
 # --- MediaPipe Setup ---
-pose_controller = PoseController()
+# MediaPipe runs in this many worker processes so inference never stalls the video and control
+# loop; 0 runs it in the main loop instead, as before
+INFERENCE_WORKERS = 1
+# Run the model only on the region around the person of the previous frame
+ROI_CROP = True
+pose_controller = PoseController(roi=ROI_CROP) if INFERENCE_WORKERS == 0 else None
+# Inference time per frame to stay within; the pose model and input scale are switched to hold it
+POSE_LATENCY_BUDGET = 0.05
+# Frames arriving faster than the screen refreshes (e.g. a burst after a decoder stall) are never
+# seen, so they are not drawn
+DISPLAY_FPS = 60
 
 
 # Thread for fetching video frames from the Tello
 def video_read_thread():
-    global latest_frame
     global is_running
 
     tello.streamon()
-    while is_running:
-        frame_read = tello.get_frame_read()
-        if frame_read.frame is not None:
-            with frame_lock:
-                latest_frame = frame_read.frame
-        time.sleep(0.01)
+    # Decode the H.264 stream directly and publish each frame the moment it is ready
+    frame_source = H264FrameSource(frame_bus, tello.get_udp_video_address())
+    frame_source.run(keep_running=lambda: is_running)
+    frame_bus.close()
     tello.streamoff()
 
 
-# Thread for handling drone commands based on gestures
-def pose_command_thread():
-    global latest_pose_command
+# Start streaming velocities once the drone is in the air
+def on_takeoff(future):
+    if not future.cancelled() and future.exception() is None:
+        rc_controller.enable()
+
+
+# Turn the pose command of every processed frame into drone commands
+def handle_pose_command(command):
     global is_running
-    global last_command_time
     global in_flight
 
-    while is_running:
-        current_time = time.time()
-
-        # Only send commands if the cooldown period has passed
-        if current_time - last_command_time > command_cooldown:
-            command = latest_pose_command
-            if command == "TAKE_OFF" and not in_flight:
-                print("Command: TAKE_OFF")
-                tello.takeoff()
-                in_flight = True
-                last_command_time = current_time
-            elif command == "LAND" and in_flight:
-                print("Command: LAND")
-                tello.land()
-                in_flight = False
-                is_running = False  # End program after landing
-                last_command_time = current_time
-            elif command == "FORWARD" and in_flight:
-                print("Command: FORWARD")
-                tello.move_forward(50)
-                last_command_time = current_time
-            elif command == "TURN_LEFT" and in_flight:
-                print("Command: TURN_LEFT")
-                tello.rotate_counter_clockwise(45)
-                last_command_time = current_time
-            elif command == "TURN_RIGHT" and in_flight:
-                print("Command: TURN_RIGHT")
-                tello.rotate_clockwise(45)
-                last_command_time = current_time
-            elif command == "HOVER":
-                pass
-
-        time.sleep(0.1)
+    if command == "TAKE_OFF" and not in_flight:
+        print("Command: TAKE_OFF")
+        in_flight = True
+        scheduler.submit("takeoff").add_done_callback(on_takeoff)
+    elif command == "LAND" and in_flight:
+        print("Command: LAND")
+        rc_controller.disable()
+        scheduler.submit("land")
+        in_flight = False
+        is_running = False  # End program after landing
+    elif command in POSE_VELOCITIES:
+        # FORWARD, TURN_LEFT, TURN_RIGHT and HOVER are velocities, picked up by the next rc tick
+        rc_controller.set_velocity(*POSE_VELOCITIES[command])
 
 
 # --- Main Program Execution ---
@@ -82,49 +94,73 @@ if __name__ == "__main__":
     tello.connect()
     print("Battery:", tello.get_battery(), "%")
 
-    # Create and start the threads
-    video_thread = threading.Thread(target=video_read_thread, daemon=True)
-    command_thread = threading.Thread(target=pose_command_thread, daemon=True)
+    # Takeoff and landing run on the scheduler thread; movement is streamed as rc velocities at 30 Hz
+    scheduler = CommandScheduler(tello)
+    rc_controller = RCController(tello, rate=30).start()
+
+    # Inference worker processes are spawned, not forked, so the threads already running
+    # (djitellopy, scheduler, rc loop) can't leave them holding a copied lock
+    inference_pool = None
+    if INFERENCE_WORKERS > 0:
+        inference_pool = InferenceWorkerPool(partial(create_pose_processor, ROI_CROP), workers=INFERENCE_WORKERS)
 
+    # Starts at model_complexity=1 and moves between POSE_QUALITY_LEVELS to hold the latency budget
+    quality_governor = QualityGovernor(
+        "pose", POSE_QUALITY_LEVELS, POSE_LATENCY_BUDGET, initial=2,
+        on_switch=inference_pool.configure if inference_pool is not None else pose_controller.set_quality
+    )
+
+    # Runs the model on every frame only while something moves or is detected, at 2 Hz otherwise
+    activity_gate = ActivityGate(idle_rate=2.0)
+
+    # Create and start the video thread
+    video_thread = threading.Thread(target=video_read_thread, daemon=True)
     video_thread.start()
-    command_thread.start()
 
+    # Draws the overlays straight into a reused 960x720 display buffer
+    overlay = OverlayRenderer((960, 720), max_fps=DISPLAY_FPS)
+
+    last_seq = 0
+    pose_landmarks = np.empty((0, 33, 4), dtype=np.float32)  # Landmarks of the newest result
     try:
         while is_running:
-            # Display the video frame in the main thread
-            frame_to_display = None
-            with frame_lock:
-                frame_to_display = latest_frame
-
-            if frame_to_display is not None:
-                # Process the frame for pose commands
-                command, pose_landmarks_list, results = pose_controller.process_frame(frame_to_display)
-                latest_pose_command = command  # Update the shared state
-
-                # Draw pose landmarks on the frame
-                if pose_landmarks_list:
-                    for pose_landmarks in pose_landmarks_list:
-                        pose_controller.mp_drawing.draw_landmarks(
-                            frame_to_display,
-                            pose_landmarks,
-                            pose_controller.mp_pose.POSE_CONNECTIONS
-                        )
-
-                # Display the current command
-                cv2.putText(
-                    frame_to_display,
-                    f'Command: {latest_pose_command}',
-                    (10, 70),
-                    cv2.FONT_HERSHEY_SIMPLEX,
-                    1,
-                    (255, 255, 255),
-                    2,
-                    cv2.LINE_AA
-                )
-
-                # Resize and show the frame
-                annotated_frame = cv2.resize(frame_to_display, (960, 720))
-                cv2.imshow("Tello Pose Control", annotated_frame)
+            # Wait (briefly) for a frame we have not processed yet
+            packet = frame_bus.wait_for_newer(last_seq, timeout=0.05)
+
+            if packet is not None:
+                last_seq = packet.seq
+
+                run_model = activity_gate.check(packet.frame)
+
+                if inference_pool is not None:
+                    # Hand the frame to a worker (dropped if all are busy) and act on the newest result
+                    if run_model:
+                        inference_pool.submit(packet.frame, packet.seq, packet.timestamp)
+                    result = inference_pool.poll()
+                    if result is not None:
+                        latest_pose_command, pose_landmarks = result.value
+                        quality_governor.record(result.inference_time)
+                        activity_gate.report(len(pose_landmarks) > 0)
+                        handle_pose_command(latest_pose_command)
+                elif run_model:
+                    # Process the frame for pose commands
+                    start = time.perf_counter()
+                    command, pose_landmarks_list, results = pose_controller.process_frame(packet.frame, packet.views)
+                    quality_governor.record(time.perf_counter() - start)
+                    latest_pose_command = command  # Update the shared state
+                    pose_landmarks = pose_controller.landmarks
+                    activity_gate.report(len(pose_landmarks) > 0)
+                    handle_pose_command(command)
+
+                # Resize the frame into the display buffer and draw on it, unless it will never be shown
+                if overlay.begin(packet.frame):
+                    # Draw pose landmarks on the frame
+                    draw_pose_landmarks(overlay, pose_landmarks)
+
+                    # Display the current command
+                    overlay.text(f'Command: {latest_pose_command}', (10, 70))
+
+                    overlay.show("Tello Pose Control")
 
             # Check for keyboard 'q' press to quit
             if cv2.waitKey(1) & 0xFF == ord('q'):
@@ -132,8 +168,12 @@ if __name__ == "__main__":
 
     finally:
         print("Waiting for threads to join...")
+        print(f"Model ran on {activity_gate.processed} frames, skipped {activity_gate.skipped} static frames")
+        rc_controller.stop()  # Sends a final zero velocity
+        scheduler.close(cancel_pending=True)  # Lets a running takeoff/land finish
         video_thread.join(timeout=2)
-        command_thread.join(timeout=2)
+        if inference_pool is not None:
+            inference_pool.close()
         cv2.destroyAllWindows()
         tello.end()
         print("Program ended safely.")
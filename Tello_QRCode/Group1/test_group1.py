@@ -1,53 +1,61 @@
+import os
+import sys
 import threading
-import time
 import cv2
 from djitellopy import Tello
 import numpy as np
 
-# --- Shared Variables and Locks ---
-# Use a shared variable to store the latest frame and a lock for thread-safe access.
-frame_lock = threading.Lock()
-latest_frame = None
+# Make the shared tello_common package (repository root) importable
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from tello_common.frame_bus import FrameBus
+from tello_common.frame_source import H264FrameSource
+
+# The cascaded QR reader lives one directory up, in Tello_QRCode
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from qr_cascade import QRCascade
+
+# --- Shared Variables ---
+# A ring of the newest frames; readers get read-only views and sequence numbers.
+frame_bus = FrameBus()
 is_running = True  # Flag to signal all threads to stop
 
 
 # Thread for fetching video frames from the Tello
 def video_read_thread(tello_instance):
-    global latest_frame
     global is_running
 
     tello_instance.streamon()
-    while is_running:
-        frame_read = tello_instance.get_frame_read()
-        if frame_read.frame is not None:
-            with frame_lock:
-                latest_frame = frame_read.frame
-        # Sleep briefly to prevent this thread from consuming 100% CPU
-        time.sleep(0.01)
+    # Decode the H.264 stream directly and publish each frame the moment it is ready
+    frame_source = H264FrameSource(frame_bus, tello_instance.get_udp_video_address())
+    frame_source.run(keep_running=lambda: is_running)
+    frame_bus.close()
     tello_instance.streamoff()
 
 
 # Thread for handling QR code detection and drone commands
 def qr_detection_thread(tello_instance):
-    global latest_frame
     global is_running
 
-    qr_detector = cv2.QRCodeDetector()
-
-    # Give the video thread a moment to start and get the first frame
-    time.sleep(1)
+    # Cheap localization on a downscaled frame; full-resolution decoding only when a code is in view
+    qr_detector = QRCascade()
+    last_seq = 0
 
     while is_running:
-        frame_to_process = None
-        with frame_lock:
-            if latest_frame is not None:
-                frame_to_process = latest_frame.copy()
+        # Block until a frame we have not decoded yet arrives. The frame and its grayscale view are
+        # read-only but not private: their ring slot is reused slots - 1 frames later
+        packet = frame_bus.wait_for_newer(last_seq, timeout=0.5)
+
+        if packet is not None:
+            last_seq = packet.seq
 
-        if frame_to_process is not None:
-            # Detect and decode QR codes in the frame
-            decoded_info, points, _ = qr_detector.detectAndDecode(frame_to_process)
+            # Detect and decode QR codes in the frame ('stop' wins if several codes are in view);
+            # the grayscale conversion is shared with any other reader of this frame
+            texts = [text for text, _ in qr_detector.detect(packet.views.gray) if text]
+            decoded_info = "stop" if "stop" in texts else (texts[0] if texts else "")
+            if not frame_bus.is_valid(packet.seq):
+                continue  # The slot was overwritten while decoding; the result may mix two frames
 
-            if points is not None and decoded_info:
+            if decoded_info:
                 print(f"Detected QR code: {decoded_info}")
                 # Perform actions based on the decoded QR code data
                 try:
@@ -71,9 +79,6 @@ def qr_detection_thread(tello_instance):
                 except Exception as e:
                     print(f"Error executing drone command: {e}")
 
-        # Sleep briefly to prevent high CPU usage
-        time.sleep(0.05)
-
 
 # --- Main Program Execution ---
 if __name__ == "__main__":
@@ -96,14 +101,14 @@ if __name__ == "__main__":
 
     try:
         # The main thread handles displaying the video feed
+        last_seq = 0
         while is_running:
-            frame_to_display = None
-            with frame_lock:
-                frame_to_display = latest_frame
+            packet = frame_bus.wait_for_newer(last_seq, timeout=0.05)
 
-            if frame_to_display is not None:
+            if packet is not None:
+                last_seq = packet.seq
                 # Resize for better viewing experience
-                display_frame = cv2.resize(frame_to_display, (960, 720))
+                display_frame = cv2.resize(packet.frame, (960, 720))
                 cv2.imshow("Tello Video Feed", display_frame)
 
             # Check for keyboard 'q' press to quit
@@ -1,125 +1,126 @@
+import os
+import sys
 import cv2
 from djitellopy import Tello
 import numpy as np
 import threading
-import time
+
+# Make the shared tello_common package (repository root) importable
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from tello_common.command_scheduler import CommandScheduler
+from tello_common.frame_bus import FrameBus, copy_frame
+from tello_common.frame_source import H264FrameSource
+
+# The cascaded QR reader lives one directory up, in Tello_QRCode
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from qr_cascade import QRCascade
+from qr_tracker import QRTracker
 
 # --- Shared Resources for Threading ---
-frame_lock = threading.Lock()
-latest_frame = None
+frame_bus = FrameBus()  # Ring of the newest video frames with sequence numbers
 is_running = True
-# A shared variable to store the latest command decoded from a QR code
-latest_command = None
-command_lock = threading.Lock()
+last_command = None  # Last QR code data acted on, to only announce a command once
 
 # Connect to the drone in the main thread initially
 tello = Tello()
 tello.connect()
 print(f"Battery level: {tello.get_battery()}")
 
+# Drone commands run on the scheduler's worker thread, so the vision loop never waits for the drone.
+# It also drops the repeats we submit while a code stays in view.
+scheduler = CommandScheduler(tello)
+
 
 # Thread for fetching video frames from the Tello
 def video_read_thread():
-    global latest_frame
     global is_running
 
     tello.streamon()  # Start the video stream on this thread
-    while is_running:
-        frame_read = tello.get_frame_read()
-        if frame_read.frame is not None:
-            with frame_lock:
-                latest_frame = frame_read.frame
-        time.sleep(0.01)  # Small sleep to prevent burning CPU
+    # Decode the H.264 stream directly and publish each frame the moment it is ready
+    frame_source = H264FrameSource(frame_bus, tello.get_udp_video_address())
+    frame_source.run(keep_running=lambda: is_running)
+    frame_bus.close()
     tello.streamoff()
 
 
-# Thread for handling drone commands based on decoded QR codes
-def command_thread_function():
+# Handle a decoded QR code (called for every frame it is seen in)
+def handle_command(command):
     global is_running
-    global latest_command
-
-    try:
-        tello.takeoff()
-        # tello.rotate_clockwise(30)
-
-
-        while is_running:
-            command = None
-            with command_lock:
-                command = latest_command
-                # Reset the command after reading it to process one command at a time
-                latest_command = None
-
-            if command:
-                if command == "Door 1":
-                    print("QR code 'stop' detected. Landing drone.")
-                    is_running = False  # Signal main loop and video thread to stop
-                elif command == "Door 2":
-                    print("QR code 'Door 2' detected, unknown location/door, CW 60.")
-                    tello.rotate_clockwise(60)
-                elif command == "Door 3":
-                    print("QR code 'Door 3' detected, unknown location/door, CW 60.")
-                    tello.rotate_clockwise(60)
-                # elif command == "flip_left":
-                #     print("QR code 'flip_left' detected.")
-                #     tello.flip_left()
-                # elif command == "flip_right":
-                #     print("QR code 'flip_right' detected.")
-                #     tello.flip_right()
-                # # Add more custom commands here
-                else:
-                    print(f"Detected unknown location/door: {command}")
-                    # break
-
-            # Small sleep to prevent burning CPU
-            time.sleep(0.1)
-
-    except Exception as e:
-        print(f"An error occurred in the command thread: {e}")
-    finally:
-        # Ensure the drone lands even if an error occurred
-        if tello.is_flying:
-            tello.land()
-        is_running = False  # Ensure all loops stop
+    global last_command
+
+    announce = command != last_command
+    last_command = command
+
+    if command == "Door 1":
+        print("QR code 'stop' detected. Landing drone.")
+        scheduler.submit("land")  # Jumps ahead of anything still queued
+        is_running = False  # Signal main loop and video thread to stop
+    elif command == "Door 2":
+        if announce:
+            print("QR code 'Door 2' detected, unknown location/door, CW 60.")
+        scheduler.submit("rotate_clockwise", 60)
+    elif command == "Door 3":
+        if announce:
+            print("QR code 'Door 3' detected, unknown location/door, CW 60.")
+        scheduler.submit("rotate_clockwise", 60)
+    # elif command == "flip_left":
+    #     print("QR code 'flip_left' detected.")
+    #     scheduler.submit("flip_left")
+    # elif command == "flip_right":
+    #     print("QR code 'flip_right' detected.")
+    #     scheduler.submit("flip_right")
+    # # Add more custom commands here
+    elif announce:
+        print(f"Detected unknown location/door: {command}")
 
 
 # --- Main Program Execution ---
 if __name__ == "__main__":
     # Create and start the threads
     video_thread = threading.Thread(target=video_read_thread, daemon=True)
-    command_thread = threading.Thread(target=command_thread_function)
-
     video_thread.start()
-    command_thread.start()
 
-    # Create a QR code detector in the main thread
-    qr_detector = cv2.QRCodeDetector()
+    # Take off on the scheduler thread while the video starts
+    scheduler.submit("takeoff")
+    # scheduler.submit("rotate_clockwise", 30)
+
+    # Create the QR reader in the main thread: decoded codes are followed with optical flow
+    # (so they survive the motion blur of a rotation), and the cascaded detector only runs
+    # when tracking gets unsure or to pick up new codes
+    qr_detector = QRTracker(QRCascade())
     cv2.namedWindow("Tello Video Feed")
 
+    last_seq = 0
+    frame_to_process = None  # Private copy we draw on, reused across frames
     try:
         while is_running:
-            # Get the latest frame from the video thread
-            frame_to_process = None
-            with frame_lock:
-                frame_to_process = latest_frame
+            # Wait (briefly) for a frame we have not decoded yet
+            packet = frame_bus.wait_for_newer(last_seq, timeout=0.05)
+
+            if packet is not None:
+                last_seq = packet.seq
 
-            if frame_to_process is not None:
-                # Detect and decode QR codes in the frame
-                decoded_info, points, _ = qr_detector.detectAndDecode(frame_to_process)
+                # The shared frame is read-only, so draw on our own copy
+                frame_to_process = copy_frame(packet.frame, frame_to_process)
 
-                # Visualize and update shared command variable
-                if points is not None:
+                # Detect and decode QR codes in the frame (on its shared grayscale conversion)
+                results = qr_detector.detect(packet.views.gray)
+                if not frame_bus.is_valid(packet.seq):
+                    # The ring slot was reused while we were reading it; don't act on a mixed frame
+                    results = []
+
+                # Visualize and act on the decoded QR codes
+                for decoded_info, points in results:
                     # Draw a bounding box around the QR code
                     frame_to_process = cv2.polylines(frame_to_process, np.int32([points]), True, (0, 255, 0), 3)
 
                     if decoded_info:
                         # Display the decoded information
-                        cv2.putText(frame_to_process, decoded_info, (int(points[0][0][0]), int(points[0][0][1]) - 10),
+                        cv2.putText(frame_to_process, decoded_info, (int(points[0][0]), int(points[0][1]) - 10),
                                     cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 2)
 
-                        # Store the command in the shared variable for the command thread to pick up
-                        with command_lock:
-                            latest_command = decoded_info
+                        # Hand the command to the scheduler (returns immediately)
+                        handle_command(decoded_info)
                     else:
                         print("QR code detected but could not be decoded.")
 
@@ -131,8 +132,13 @@ if __name__ == "__main__":
                 is_running = False
 
     finally:
+        # Cancel queued commands and let the running one finish, then make sure the drone lands
+        scheduler.close(cancel_pending=True)
+        if tello.is_flying:
+            tello.land()
+        is_running = False
+
         # Ensure all threads are joined and resources released
-        command_thread.join()
         video_thread.join(timeout=1)
         cv2.destroyAllWindows()
         tello.end()  # Use tello.end() for safe shutdown
@@ -0,0 +1,125 @@
+# qr_benchmark.py
+import argparse
+import json
+import os
+import sys
+import time
+from collections import Counter, OrderedDict
+
+import cv2
+import numpy as np
+
+from qr_cascade import QRCascade, available_backends, create_detector, detect_and_decode
+
+# Make the shared tello_common package (repository root) importable
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from tello_common.benchmark import summarize, video_frames
+
+DOOR_CODES = ["Door 1", "Door 2", "Door 3"]
+
+
+def door_frames(width, height, count=300, corridor=40, approach=20):
+    """
+    Stand-in for recorded door footage: ``corridor`` frames of textured wall without a
+    code, then an ``approach`` of frames where a door QR code grows from distant to close,
+    repeated for each door.
+    """
+    rng = np.random.default_rng(0)
+    background = rng.integers(60, 200, size=(height, width), dtype=np.uint8)
+    background = cv2.GaussianBlur(background, (9, 9), 0)
+    encoder = cv2.QRCodeEncoder.create()
+    codes = [encoder.encode(text) for text in DOOR_CODES]
+
+    frames = []
+    for index in range(count):
+        frame = background.copy()
+        door, step = divmod(index, corridor + approach)
+        if step >= corridor:
+            progress = (step - corridor) / max(1, approach - 1)
+            size = int(height * (0.08 + 0.32 * progress))
+            code = cv2.resize(codes[door % len(codes)], (size, size), interpolation=cv2.INTER_NEAREST)
+            x = (width - size) // 2 + int(40 * np.sin(index / 5))
+            y = (height - size) // 2
+            frame[y:y + size, x:x + size] = code
+        frames.append(cv2.cvtColor(frame, cv2.COLOR_GRAY2BGR))
+    return frames
+
+
+def run_full(backend):
+    """Baseline: the backend's own detect + decode on every full-resolution frame."""
+    detector = create_detector(backend)
+
+    def read(frame):
+        return detect_and_decode(detector, backend, cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY))
+    return read
+
+
+def run_cascade(backend, detect_scale):
+    cascade = QRCascade(backend, detect_scale=detect_scale)
+    return cascade.detect
+
+
+def measure(read, frames, warmup=5):
+    for frame in frames[:warmup]:
+        read(frame)
+
+    samples = []
+    texts = Counter()
+    frames_with_code = 0
+    for frame in frames:
+        start = time.perf_counter()
+        results = read(frame)
+        samples.append(time.perf_counter() - start)
+        decoded = [text for text, _ in results if text]
+        frames_with_code += bool(decoded)
+        texts.update(decoded)
+
+    stats = summarize(np.asarray(samples))
+    stats["frames_with_code"] = frames_with_code
+    stats["texts"] = dict(texts)
+    return stats
+
+
+def compare(frames, backends, scales):
+    results = OrderedDict()
+    for backend in backends:
+        results[f"{backend} full"] = measure(run_full(backend), frames)
+        for scale in scales:
+            results[f"{backend} cascade x{scale:g}"] = measure(run_cascade(backend, scale), frames)
+    return results
+
+
+def print_results(results, frame_count):
+    print(f"\n  {'configuration':26s} {'p50 ms':>8s} {'p95 ms':>8s} {'FPS':>8s} {'frames w/ code':>15s}  decoded")
+    for name, stats in results.items():
+        decoded = ", ".join(f"{text} x{count}" for text, count in sorted(stats["texts"].items()))
+        print(f"  {name:26s} {stats['p50_ms']:8.2f} {stats['p95_ms']:8.2f} {stats['fps'] or 0:8.1f} "
+              f"{stats['frames_with_code']:>8d}/{frame_count:<6d}  {decoded}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare QR decoder backends and cascade tiers on door footage.")
+    parser.add_argument("--video", help="Recorded door footage (video file or raw .h264); synthetic if omitted")
+    parser.add_argument("--resolution", default="960x720")
+    parser.add_argument("--frames", type=int, default=300)
+    parser.add_argument("--backends", nargs="+", default=available_backends(), choices=available_backends())
+    parser.add_argument("--scales", nargs="+", type=float, default=[0.5, 0.25],
+                        help="Tier-1 downscale factors to try")
+    parser.add_argument("--output", help="Optional JSON file for the results")
+    args = parser.parse_args()
+
+    width, height = (int(v) for v in args.resolution.split("x"))
+    if args.video:
+        frames = video_frames(args.video, width, height, args.frames)
+    else:
+        frames = door_frames(width, height, args.frames)
+
+    print(f"Comparing {', '.join(args.backends)} on {len(frames)} frames at {args.resolution} "
+          f"(OpenCV {cv2.__version__})")
+    results = compare(frames, args.backends, args.scales)
+    print_results(results, len(frames))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"video": args.video, "resolution": args.resolution, "results": results}, f, indent=2)
+        print(f"\nResults written to {args.output}")
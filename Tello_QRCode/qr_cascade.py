@@ -0,0 +1,154 @@
+# qr_cascade.py
+import cv2
+import numpy as np
+
+
+def available_backends():
+    """Names of the QR decoder backends provided by the installed OpenCV build."""
+    backends = ["opencv"]
+    if hasattr(cv2, "QRCodeDetectorAruco"):
+        backends.append("aruco")  # OpenCV 4.8+
+    if hasattr(cv2, "wechat_qrcode_WeChatQRCode"):
+        backends.append("wechat")  # opencv-contrib builds that ship the wechat_qrcode module
+    return backends
+
+
+def default_backend():
+    # The ArUco-based detector is about twice as fast as the classic one at the same accuracy
+    return "aruco" if "aruco" in available_backends() else "opencv"
+
+
+def create_detector(backend):
+    """Creates the OpenCV QR detector behind a backend name."""
+    if backend not in available_backends():
+        raise ValueError(f"QR backend '{backend}' is not available, choose one of {available_backends()}")
+    if backend == "aruco":
+        return cv2.QRCodeDetectorAruco()
+    if backend == "wechat":
+        return cv2.wechat_qrcode_WeChatQRCode()
+    return cv2.QRCodeDetector()
+
+
+def detect_and_decode(detector, backend, gray):
+    """
+    Runs a backend's own full detect + decode on an image.
+    Returns a list of (text, points) with points as a 4x2 float array.
+    """
+    if backend == "wechat":
+        texts, quads = detector.detectAndDecode(gray)
+        return [(text, np.asarray(quad, dtype=np.float32).reshape(4, 2)) for text, quad in zip(texts, quads)]
+    ok, texts, quads, _ = detector.detectAndDecodeMulti(gray)
+    if not ok or quads is None:
+        return []
+    return [(text, quad.reshape(4, 2)) for text, quad in zip(texts, quads)]
+
+
+class QRCascade:
+    """
+    Two-tier QR reader: a cheap look at a small frame first, the expensive decode only on a hit.
+
+    Tier 1 localizes codes on a grayscale copy of the frame downscaled by ``detect_scale``.
+    Most frames contain no code at all and stop here. Tier 2 maps each candidate back to
+    the full-resolution frame, crops it with a ``margin`` around it, upsamples crops where
+    the code is smaller than ``min_code_px`` and decodes only those crops with the selected
+    ``backend``. Localization always uses the fastest detector available; the backend only
+    chooses the decoder.
+
+    Codes need roughly 3 pixels per module to be found on the small frame, so distant codes
+    can slip through tier 1. Every ``full_scan_interval``-th frame in a row without a
+    candidate is therefore localized at full resolution instead (0 disables this).
+    """
+
+    def __init__(self, backend=None, detect_scale=0.5, margin=0.2, min_code_px=120, full_scan_interval=4):
+        self.backend = backend or default_backend()
+        self.decoder = create_detector(self.backend)
+        self.localizer = create_detector(default_backend())
+        self.detect_scale = detect_scale
+        self.margin = margin  # Crop margin around a candidate, as a fraction of the code size
+        self.min_code_px = min_code_px  # Crops with smaller codes are upsampled to this size
+        self.full_scan_interval = full_scan_interval
+        self._misses = 0  # Frames in a row without a tier-1 candidate
+
+        self._small = None  # Reused tier-1 buffer
+
+        # Counters to see how much work each tier does
+        self.frames = 0
+        self.full_scans = 0
+        self.candidates = 0
+        self.decoded = 0
+
+    def detect(self, frame):
+        """
+        Returns a list of (text, points) for every QR code found, where points is a 4x2
+        float array of corners in frame coordinates. Codes that were localized but could
+        not be decoded are returned with an empty text.
+        """
+        self.frames += 1
+        gray = frame if frame.ndim == 2 else cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+
+        quads = self.localize(gray)
+        results = []
+        for quad in quads:
+            self.candidates += 1
+            text = self.decode(gray, quad)
+            if text:
+                self.decoded += 1
+            results.append((text, quad))
+        return results
+
+    def localize(self, gray):
+        """Tier 1: corners of every candidate code (full-resolution coordinates), found on the small frame."""
+        if self.detect_scale < 1.0:
+            height, width = gray.shape[:2]
+            size = (max(1, int(width * self.detect_scale)), max(1, int(height * self.detect_scale)))
+            self._small = cv2.resize(gray, size, dst=self._small, interpolation=cv2.INTER_AREA)
+            small = self._small
+        else:
+            small = gray
+
+        found, quads = self.localizer.detectMulti(small)
+        if found and quads is not None:
+            self._misses = 0
+            return [quad.reshape(4, 2) / self.detect_scale for quad in quads]
+
+        self._misses += 1
+        if small is gray or not self.full_scan_interval or self._misses % self.full_scan_interval:
+            return []
+        self.full_scans += 1
+        found, quads = self.localizer.detectMulti(gray)
+        if not found or quads is None:
+            return []
+        return [quad.reshape(4, 2) for quad in quads]
+
+    def decode(self, gray, quad):
+        """Tier 2: decodes one candidate from an (upsampled) full-resolution crop around it."""
+        crop, crop_quad = self._crop(gray, quad)
+        if crop is None:
+            return ""
+
+        if self.backend == "wechat":
+            texts, _ = self.decoder.detectAndDecode(crop)
+            return texts[0] if texts else ""
+
+        text = self.decoder.decode(crop, crop_quad.reshape(1, 4, 2))[0]
+        if not text:
+            # The low-resolution corners can be a few pixels off; relocalize inside the crop
+            text = self.decoder.detectAndDecode(crop)[0]
+        return text
+
+    def _crop(self, gray, quad):
+        height, width = gray.shape[:2]
+        code_size = np.linalg.norm(quad[0] - quad[2]) / np.sqrt(2)
+        pad = self.margin * code_size
+        x0, y0 = np.maximum(np.floor(quad.min(axis=0) - pad).astype(int), 0)
+        x1, y1 = np.minimum(np.ceil(quad.max(axis=0) + pad).astype(int), (width, height))
+        if x1 <= x0 or y1 <= y0:
+            return None, None
+
+        crop = gray[y0:y1, x0:x1]
+        crop_quad = (quad - (x0, y0)).astype(np.float32)
+        factor = self.min_code_px / max(code_size, 1.0)
+        if factor > 1.0:
+            crop = cv2.resize(crop, None, fx=factor, fy=factor, interpolation=cv2.INTER_CUBIC)
+            crop_quad *= factor
+        return crop, crop_quad
@@ -0,0 +1,148 @@
+# qr_tracker.py
+import cv2
+import numpy as np
+
+from qr_cascade import QRCascade
+
+
+class QRTrack:
+    """One decoded code followed across frames."""
+
+    def __init__(self, text, quad, points):
+        self.text = text
+        self.quad = quad  # 4x2 corners in frame coordinates
+        self.points = points  # Nx1x2 feature points inside the code, followed with optical flow
+        self.confidence = 1.0
+        self.age = 0  # Frames tracked since the code was last detected
+
+
+class QRTracker:
+    """
+    Follows decoded QR codes from frame to frame with sparse optical flow.
+
+    Feature points inside each code are tracked with pyramidal Lucas-Kanade (with a
+    forward-backward check), and a RANSAC homography fitted to the surviving points
+    moves the code's corners. The decoded text stays attached to the track, so a code
+    that smears while the drone rotates keeps its position and payload even though it
+    can't be decoded. The (much slower) ``reader`` only runs when there is nothing to
+    track, when a track's confidence drops below ``min_confidence``, and every
+    ``redetect_interval`` frames to pick up new codes.
+    """
+
+    def __init__(self, reader=None, min_confidence=0.5, redetect_interval=15, max_points=40,
+                 max_flow_error=1.0, max_age=90):
+        self.reader = reader or QRCascade()
+        self.min_confidence = min_confidence  # Share of points that survive flow and RANSAC
+        self.redetect_interval = redetect_interval
+        self.max_points = max_points
+        self.max_flow_error = max_flow_error  # Forward-backward distance in pixels
+        self.max_age = max_age  # Tracks not confirmed by a detection for this many frames are dropped
+        self.tracks = []
+        self._prev_gray = None
+        self._since_detection = 0
+        self.lk_params = dict(winSize=(21, 21), maxLevel=3,
+                              criteria=(cv2.TERM_CRITERIA_EPS | cv2.TERM_CRITERIA_COUNT, 20, 0.03))
+
+        # Counters to see how often the detector still runs
+        self.detections = 0
+        self.tracked_frames = 0
+
+    def detect(self, frame):
+        """
+        Returns a list of (text, points) for every code tracked or detected in the frame,
+        where points is a 4x2 float array of corners (same interface as QRCascade.detect).
+        """
+        gray = frame if frame.ndim == 2 else cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+
+        lost = False
+        if self.tracks and self._prev_gray is not None and self._prev_gray.shape == gray.shape:
+            lost = self._track(self._prev_gray, gray)
+
+        self._since_detection += 1
+        if lost or not self.tracks or self._since_detection >= self.redetect_interval:
+            self._detect(gray)
+        else:
+            self.tracked_frames += 1
+
+        self._prev_gray = gray.copy() if gray is frame else gray
+        return [(track.text, track.quad) for track in self.tracks]
+
+    def reset(self):
+        self.tracks = []
+        self._prev_gray = None
+
+    def _track(self, prev_gray, gray):
+        """Moves every track with optical flow. Returns True if a track was lost."""
+        counts = [len(track.points) for track in self.tracks]
+        points = np.concatenate([track.points for track in self.tracks])
+
+        # All tracks in one LK call, checked by flowing back to where they started
+        moved, status, _ = cv2.calcOpticalFlowPyrLK(prev_gray, gray, points, None, **self.lk_params)
+        back, back_status, _ = cv2.calcOpticalFlowPyrLK(gray, prev_gray, moved, None, **self.lk_params)
+        error = np.linalg.norm((back - points).reshape(-1, 2), axis=1)
+        good = (status.ravel() == 1) & (back_status.ravel() == 1) & (error < self.max_flow_error)
+
+        lost = False
+        kept = []
+        start = 0
+        for track, count in zip(self.tracks, counts):
+            stop = start + count
+            track_good = good[start:stop]
+            old, new = points[start:stop][track_good], moved[start:stop][track_good]
+            start = stop
+
+            homography = None
+            inliers = np.zeros(0, dtype=bool)
+            if len(old) >= 4:
+                homography, mask = cv2.findHomography(old, new, cv2.RANSAC, 3.0)
+                if mask is not None:
+                    inliers = mask.ravel().astype(bool)
+            track.confidence = inliers.sum() / count
+            track.age += 1
+            if homography is None or track.confidence < self.min_confidence or track.age > self.max_age:
+                lost = True
+                continue
+
+            track.quad = cv2.perspectiveTransform(track.quad.reshape(-1, 1, 2), homography).reshape(4, 2)
+            track.points = new[inliers].reshape(-1, 1, 2)
+            kept.append(track)
+        self.tracks = kept
+        return lost
+
+    def _detect(self, gray):
+        self.detections += 1
+        self._since_detection = 0
+
+        tracks = []
+        for text, quad in self.reader.detect(gray):
+            previous = self._match(quad)
+            if not text:
+                # Smeared codes often localize but don't decode; keep the payload we already know
+                if previous is None:
+                    continue
+                text = previous.text
+            points = self._features(gray, quad)
+            if points is None:
+                continue
+            tracks.append(QRTrack(text, np.asarray(quad, dtype=np.float32), points))
+
+        # Keep tracks the detector missed this time (e.g. blurred) as long as flow still holds them
+        matched = [track.text for track in tracks]
+        tracks += [track for track in self.tracks if track.text not in matched]
+        self.tracks = tracks
+
+    def _match(self, quad):
+        """The current track whose code contains the center of ``quad``, if any."""
+        center = tuple(map(float, np.mean(quad, axis=0)))
+        for track in self.tracks:
+            if cv2.pointPolygonTest(track.quad.reshape(-1, 1, 2), center, False) >= 0:
+                return track
+        return None
+
+    def _features(self, gray, quad):
+        mask = np.zeros(gray.shape[:2], dtype=np.uint8)
+        cv2.fillConvexPoly(mask, np.int32(quad), 255)
+        points = cv2.goodFeaturesToTrack(gray, self.max_points, 0.01, 5, mask=mask)
+        if points is None or len(points) < 4:
+            return None
+        return points.astype(np.float32)
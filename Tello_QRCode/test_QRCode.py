@@ -1,6 +1,7 @@
 import cv2
 from djitellopy import Tello
 import numpy as np
+from qr_decode_cache import CachedQRDetector
 
 # Connect to the drone
 tello = Tello()
@@ -12,8 +13,8 @@ tello.takeoff()
 # Create a window to display the video feed
 cv2.namedWindow("Tello Video Feed")
 
-# Create a QR code detector
-qr_detector = cv2.QRCodeDetector()
+# Create a QR code detector that finds every code and skips decoding codes it has just seen
+qr_detector = CachedQRDetector()
 
 while True:
     frame_read = tello.get_frame_read()
@@ -23,41 +24,45 @@ while True:
         continue
 
     # Detect and decode QR codes in the frame
-    decoded_info, points, _ = qr_detector.detectAndDecode(frame)
+    results = qr_detector.detect(frame)
 
-    # Visualize and act on detected QR codes
-    if points is not None:
+    # Visualize detected QR codes
+    commands = []
+    for decoded_info, points in results:
         # Draw a bounding box around the QR code
         frame = cv2.polylines(frame, np.int32([points]), True, (0, 255, 0), 3)
 
         if decoded_info:
             # Display the decoded information
-            cv2.putText(frame, decoded_info, (int(points[0][0][0]), int(points[0][0][1]) - 10),
+            cv2.putText(frame, decoded_info, (int(points[0][0]), int(points[0][1]) - 10),
                         cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 2)
-
-            # Perform actions based on the decoded QR code data
-            if decoded_info == "stop":
-                print("QR code 'stop' detected. Landing drone.")
-                tello.land()
-                break  # Exit the loop to end the program
-            elif decoded_info == "flip_forward":
-                print("QR code 'flip_forward' detected.")
-                tello.flip_forward()
-            elif decoded_info == "flip_back":
-                print("QR code 'flip_back' detected.")
-                tello.flip_back()
-            elif decoded_info == "flip_left":
-                print("QR code 'flip_left' detected.")
-                tello.flip_left()
-            elif decoded_info == "flip_right":
-                print("QR code 'flip_right' detected.")
-                tello.flip_right()
-            # Add more custom commands here
-            else:
-                print(f"Detected unknown QR code: {decoded_info}")
+            commands.append(decoded_info)
         else:
             print("QR code detected but could not be decoded.")
 
+    # Perform actions based on the decoded QR code data ('stop' wins if several codes are in view)
+    if "stop" in commands:
+        print("QR code 'stop' detected. Landing drone.")
+        tello.land()
+        break  # Exit the loop to end the program
+    elif commands:
+        decoded_info = commands[0]
+        if decoded_info == "flip_forward":
+            print("QR code 'flip_forward' detected.")
+            tello.flip_forward()
+        elif decoded_info == "flip_back":
+            print("QR code 'flip_back' detected.")
+            tello.flip_back()
+        elif decoded_info == "flip_left":
+            print("QR code 'flip_left' detected.")
+            tello.flip_left()
+        elif decoded_info == "flip_right":
+            print("QR code 'flip_right' detected.")
+            tello.flip_right()
+        # Add more custom commands here
+        else:
+            print(f"Detected unknown QR code: {decoded_info}")
+
     # Display the frame
     cv2.imshow("Tello Video Feed", frame)
 
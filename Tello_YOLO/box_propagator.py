@@ -0,0 +1,151 @@
+# box_propagator.py
+import cv2
+import numpy as np
+
+
+class BoxPropagator:
+    """
+    Moves YOLO boxes from frame to frame with sparse optical flow, so the detector only has
+    to run every few frames.
+
+    After a detection, ``reset`` picks up to ``max_points`` corner features inside every
+    box. ``propagate`` follows them with pyramidal Lucas-Kanade on a grayscale copy scaled
+    by ``scale`` (all boxes in one call, checked by flowing back) and shifts and scales
+    each box by the median motion of its points. Boxes with fewer than ``min_points``
+    surviving points are dropped.
+
+    ``due`` tells when the detector should run again:
+
+    * after ``interval`` frames, which adapts to the measured motion: the detector runs
+      about once per ``motion_budget`` pixels of object movement, between
+      ``min_interval`` and ``max_interval`` frames,
+    * when the scene changes (mean difference of a tiny thumbnail against the last
+      detected frame above ``scene_change``, e.g. a fast rotation),
+    * when more than half of the boxes were lost.
+    """
+
+    def __init__(self, scale=0.5, max_points=20, min_points=3, min_interval=1, max_interval=8,
+                 motion_budget=24.0, scene_change=0.12, max_flow_error=1.0):
+        self.scale = scale
+        self.max_points = max_points
+        self.min_points = min_points
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.motion_budget = motion_budget  # Pixels (full frame) objects may move between detections
+        self.scene_change = scene_change
+        self.max_flow_error = max_flow_error
+        self.lk_params = dict(winSize=(15, 15), maxLevel=2,
+                              criteria=(cv2.TERM_CRITERIA_EPS | cv2.TERM_CRITERIA_COUNT, 10, 0.03))
+
+        self.boxes = np.empty((0, 4), dtype=np.float32)  # Full-frame xyxy
+        self.alive = np.empty(0, dtype=bool)
+        self.speed = 0.0  # Smoothed median point motion, full-frame pixels per frame
+        self._points = np.empty((0, 1, 2), dtype=np.float32)
+        self._owners = np.empty(0, dtype=np.int32)  # Box index of every point
+        self._prev_gray = None
+        self._thumbnail = None
+        self._reference = None  # Thumbnail of the last detected frame
+        self._since_detection = 0
+        self._scene_changed = False
+
+        # Counters
+        self.propagated_frames = 0
+        self.resets = 0
+
+    @property
+    def interval(self):
+        """Frames between detections at the current motion."""
+        frames = self.motion_budget / max(self.speed, 1e-3)
+        return int(np.clip(frames, self.min_interval, self.max_interval))
+
+    @property
+    def stale(self):
+        """True when the propagated boxes can't be trusted: the scene changed or most boxes were lost."""
+        lost = len(self.alive) > 0 and self.alive.sum() * 2 < len(self.alive)
+        return bool(self._scene_changed or lost)
+
+    @property
+    def due(self):
+        """True when the detector should run on the next frame."""
+        return self._prev_gray is None or self._since_detection >= self.interval or self.stale
+
+    def reset(self, frame, boxes):
+        """Starts following ``boxes`` (Nx4 xyxy, full frame) detected in ``frame``."""
+        self.resets += 1
+        gray = self._to_gray(frame)
+        self.boxes = np.asarray(boxes, dtype=np.float32).reshape(-1, 4).copy()
+        self.alive = np.ones(len(self.boxes), dtype=bool)
+
+        points, owners = [], []
+        mask = np.zeros(gray.shape, dtype=np.uint8)
+        for index, box in enumerate(self.boxes * self.scale):
+            x0, y0, x1, y1 = np.int32(np.round(box))
+            mask[...] = 0
+            mask[max(y0, 0):max(y1, 0), max(x0, 0):max(x1, 0)] = 255
+            features = cv2.goodFeaturesToTrack(gray, self.max_points, 0.01, 3, mask=mask)
+            if features is None:
+                continue
+            points.append(features.astype(np.float32))
+            owners.append(np.full(len(features), index, dtype=np.int32))
+        self._points = np.concatenate(points) if points else np.empty((0, 1, 2), dtype=np.float32)
+        self._owners = np.concatenate(owners) if owners else np.empty(0, dtype=np.int32)
+
+        self._swap(gray)
+        self._reference = self._thumbnail.copy()
+        self._since_detection = 0
+        self._scene_changed = False
+
+    def propagate(self, frame):
+        """Moves the boxes to ``frame``. Returns (boxes, alive): Nx4 xyxy and which boxes are still followed."""
+        gray = self._to_gray(frame)
+        self._since_detection += 1
+        self.propagated_frames += 1
+
+        if len(self._points):
+            moved, status, _ = cv2.calcOpticalFlowPyrLK(self._prev_gray, gray, self._points, None, **self.lk_params)
+            back, back_status, _ = cv2.calcOpticalFlowPyrLK(gray, self._prev_gray, moved, None, **self.lk_params)
+            error = np.linalg.norm((back - self._points).reshape(-1, 2), axis=1)
+            good = (status.ravel() == 1) & (back_status.ravel() == 1) & (error < self.max_flow_error)
+
+            old = self._points.reshape(-1, 2)[good]
+            new = moved.reshape(-1, 2)[good]
+            owners = self._owners[good]
+            if len(new):
+                motion = np.median(np.linalg.norm(new - old, axis=1)) / self.scale
+                self.speed += 0.3 * (motion - self.speed)
+            self._move_boxes(old, new, owners)
+            self._points = new.reshape(-1, 1, 2)
+            self._owners = owners
+
+        self._swap(gray)
+        self._scene_changed = cv2.norm(self._thumbnail, self._reference, cv2.NORM_L1) \
+            / (self._thumbnail.size * 255.0) > self.scene_change
+        return self.boxes, self.alive
+
+    def _move_boxes(self, old, new, owners):
+        for index in range(len(self.boxes)):
+            mine = owners == index
+            if mine.sum() < self.min_points:
+                self.alive[index] = False
+                continue
+            old_points, new_points = old[mine], new[mine]
+            shift = np.median(new_points - old_points, axis=0) / self.scale
+            # Scale from the spread of the points around their center, limited to 10% per frame
+            old_spread = np.median(np.linalg.norm(old_points - old_points.mean(axis=0), axis=1))
+            new_spread = np.median(np.linalg.norm(new_points - new_points.mean(axis=0), axis=1))
+            zoom = np.clip(new_spread / old_spread, 0.9, 1.1) if old_spread > 1e-3 else 1.0
+
+            x0, y0, x1, y1 = self.boxes[index]
+            center_x, center_y = (x0 + x1) / 2 + shift[0], (y0 + y1) / 2 + shift[1]
+            half_w, half_h = (x1 - x0) / 2 * zoom, (y1 - y0) / 2 * zoom
+            self.boxes[index] = (center_x - half_w, center_y - half_h, center_x + half_w, center_y + half_h)
+
+    def _to_gray(self, frame):
+        height, width = frame.shape[:2]
+        size = (int(width * self.scale), int(height * self.scale))
+        small = cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+        return cv2.cvtColor(small, cv2.COLOR_BGR2GRAY) if small.ndim == 3 else small
+
+    def _swap(self, gray):
+        self._prev_gray = gray
+        self._thumbnail = cv2.resize(gray, (32, 24), dst=self._thumbnail, interpolation=cv2.INTER_AREA)
@@ -0,0 +1,297 @@
+# model_prep.py
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+
+import cv2
+import numpy as np
+
+MODEL_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_WEIGHTS = os.path.join(MODEL_DIR, "yolov8n.pt")
+
+# Inference backends by name. Everything except "pytorch" is exported from the .pt weights
+# once and cached next to them; the "-int8" variants are quantized with calibration images.
+BACKENDS = ["pytorch", "onnx", "onnx-int8", "openvino", "openvino-int8"]
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp")
+
+
+def file_hash(path, length=12):
+    """Short SHA-256 of a file, used to key cached exports to the exact weights."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()[:length]
+
+
+def list_images(folder):
+    return sorted(os.path.join(folder, name) for name in os.listdir(folder)
+                  if name.lower().endswith(IMAGE_EXTENSIONS))
+
+
+def calibration_hash(folder, length=8):
+    """Hash of the calibration image names and sizes, so a changed folder gives a new INT8 export."""
+    digest = hashlib.sha256()
+    for path in list_images(folder):
+        digest.update(f"{os.path.basename(path)}:{os.path.getsize(path)};".encode())
+    return digest.hexdigest()[:length]
+
+
+def artifact_path(weights, backend, imgsz, calibration=None):
+    """
+    Where the export of ``weights`` for ``backend`` is cached:
+    ``<weights dir>/<stem>_exports/<hash>/<backend>_<imgsz>[_<calibration hash>]`` plus
+    ``.onnx`` for ONNX, or ``_openvino_model`` for OpenVINO directories (Ultralytics picks
+    the runtime by that suffix).
+    """
+    stem = os.path.splitext(os.path.basename(weights))[0]
+    name = f"{backend}_{imgsz}"
+    if backend.endswith("-int8"):
+        name += f"_{calibration_hash(calibration)}"
+    name += ".onnx" if backend.startswith("onnx") else "_openvino_model"
+    return os.path.join(os.path.dirname(os.path.abspath(weights)), f"{stem}_exports", file_hash(weights), name)
+
+
+def prepare(backend, weights=DEFAULT_WEIGHTS, imgsz=640, calibration=None):
+    """
+    Returns the path of the model file for ``backend``, exporting (and quantizing) it first
+    if it is not cached yet. INT8 backends need a ``calibration`` image folder.
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown backend '{backend}', expected one of {BACKENDS}")
+    if backend == "pytorch":
+        return weights
+    if backend.endswith("-int8") and not (calibration and list_images(calibration)):
+        raise ValueError(f"Backend '{backend}' needs a folder of calibration images")
+
+    path = artifact_path(weights, backend, imgsz, calibration)
+    if os.path.exists(path):
+        return path
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    print(f"Exporting {os.path.basename(weights)} to {backend} ({imgsz}x{imgsz}) -> {path}")
+
+    if backend == "onnx":
+        _export(weights, path, format="onnx", imgsz=imgsz, simplify=True)
+    elif backend == "onnx-int8":
+        fp32_path = prepare("onnx", weights, imgsz)
+        quantize_onnx(fp32_path, path, calibration, imgsz)
+    elif backend == "openvino":
+        _export(weights, path, format="openvino", imgsz=imgsz)
+    elif backend == "openvino-int8":
+        with tempfile.TemporaryDirectory() as tmp:
+            # Ultralytics calibrates OpenVINO INT8 (NNCF) on the images of a dataset YAML
+            data = os.path.join(tmp, "calibration.yaml")
+            with open(data, "w") as f:
+                json.dump({"path": os.path.abspath(calibration), "train": ".", "val": ".",
+                           "names": _model_names(weights)}, f)
+            _export(weights, path, format="openvino", imgsz=imgsz, int8=True, data=data)
+    return path
+
+
+def _model_names(weights):
+    from ultralytics import YOLO
+    return YOLO(weights).names
+
+
+def _export(weights, path, **export_args):
+    # Ultralytics writes exports next to the weights; work on a copy so they land in a temp dir
+    from ultralytics import YOLO
+
+    with tempfile.TemporaryDirectory() as tmp:
+        copy = shutil.copy(weights, tmp)
+        exported = YOLO(copy).export(**export_args)
+        shutil.move(str(exported), path)
+
+
+def letterbox(image, imgsz):
+    """Resizes keeping the aspect ratio and pads to imgsz x imgsz with gray, like Ultralytics."""
+    height, width = image.shape[:2]
+    scale = min(imgsz / height, imgsz / width)
+    resized = cv2.resize(image, (round(width * scale), round(height * scale)), interpolation=cv2.INTER_LINEAR)
+    padded = np.full((imgsz, imgsz, 3), 114, dtype=np.uint8)
+    top = (imgsz - resized.shape[0]) // 2
+    left = (imgsz - resized.shape[1]) // 2
+    padded[top:top + resized.shape[0], left:left + resized.shape[1]] = resized
+    return padded
+
+
+def quantize_onnx(fp32_path, int8_path, calibration, imgsz):
+    """Static INT8 quantization (QDQ, per-channel weights) with ONNX Runtime, calibrated on an image folder."""
+    import onnx
+    from onnxruntime.quantization import CalibrationDataReader, QuantFormat, QuantType, quantize_static
+
+    input_name = onnx.load(fp32_path, load_external_data=False).graph.input[0].name
+
+    class ImageFolderReader(CalibrationDataReader):
+        def __init__(self):
+            self.paths = iter(list_images(calibration))
+
+        def get_next(self):
+            path = next(self.paths, None)
+            if path is None:
+                return None
+            image = letterbox(cv2.imread(path), imgsz)
+            blob = cv2.cvtColor(image, cv2.COLOR_BGR2RGB).transpose(2, 0, 1)[None].astype(np.float32) / 255.0
+            return {input_name: blob}
+
+    quantize_static(fp32_path, int8_path, ImageFolderReader(), quant_format=QuantFormat.QDQ,
+                    per_channel=True, activation_type=QuantType.QUInt8, weight_type=QuantType.QInt8)
+
+    # Keep the Ultralytics metadata (class names, stride, imgsz) so YOLO() can load the INT8 model
+    fp32, int8 = onnx.load(fp32_path), onnx.load(int8_path)
+    del int8.metadata_props[:]
+    int8.metadata_props.extend(fp32.metadata_props)
+    onnx.save(int8, int8_path)
+
+
+def load_model(backend="pytorch", weights=DEFAULT_WEIGHTS, imgsz=640, calibration=None):
+    """An Ultralytics YOLO model running on ``backend``; exported models keep the ``imgsz`` they were exported at."""
+    from ultralytics import YOLO
+
+    return YOLO(prepare(backend, weights, imgsz, calibration), task="detect")
+
+
+# --- Comparison report ---
+
+def load_frames(images=None, video=None, count=50):
+    """Test frames from an image folder or evenly spaced from a video."""
+    if images:
+        return [cv2.imread(path) for path in list_images(images)[:count]]
+    capture = cv2.VideoCapture(video)
+    total = int(capture.get(cv2.CAP_PROP_FRAME_COUNT)) or count
+    frames = []
+    for index in np.linspace(0, total - 1, min(count, total)).astype(int):
+        capture.set(cv2.CAP_PROP_POS_FRAMES, index)
+        ok, frame = capture.read()
+        if ok:
+            frames.append(frame)
+    capture.release()
+    return frames
+
+
+def box_iou(a, b):
+    """IoU matrix of two sets of xyxy boxes."""
+    top_left = np.maximum(a[:, None, :2], b[None, :, :2])
+    bottom_right = np.minimum(a[:, None, 2:], b[None, :, 2:])
+    intersection = np.prod(np.clip(bottom_right - top_left, 0, None), axis=2)
+    area_a = np.prod(a[:, 2:] - a[:, :2], axis=1)
+    area_b = np.prod(b[:, 2:] - b[:, :2], axis=1)
+    return intersection / (area_a[:, None] + area_b[None, :] - intersection + 1e-9)
+
+
+def match_detections(reference, candidate, iou_threshold=0.5):
+    """Greedy same-class matching; returns (matched count, IoUs of the matches)."""
+    (ref_boxes, ref_classes), (boxes, classes) = reference, candidate
+    if len(ref_boxes) == 0 or len(boxes) == 0:
+        return 0, []
+    iou = box_iou(ref_boxes, boxes)
+    iou[ref_classes[:, None] != classes[None, :]] = 0
+    ious = []
+    while True:
+        i, j = np.unravel_index(np.argmax(iou), iou.shape)
+        if iou[i, j] < iou_threshold:
+            break
+        ious.append(float(iou[i, j]))
+        iou[i, :] = 0
+        iou[:, j] = 0
+    return len(ious), ious
+
+
+def run_backend(model, frames, imgsz, warmup=3):
+    detections, latencies = [], []
+    for frame in frames[:warmup]:
+        model.predict(frame, imgsz=imgsz, verbose=False)
+    for frame in frames:
+        start = time.perf_counter()
+        result = model.predict(frame, imgsz=imgsz, verbose=False)[0]
+        latencies.append(time.perf_counter() - start)
+        detections.append((result.boxes.xyxy.cpu().numpy(), result.boxes.cls.cpu().numpy().astype(int)))
+    return detections, latencies
+
+
+def compare(backends, frames, weights=DEFAULT_WEIGHTS, imgsz=640, calibration=None, tolerance=0.05):
+    """
+    Runs every backend on the same frames. Accuracy is the agreement with the PyTorch
+    model's detections (F1 of same-class matches at IoU 0.5, and their mean IoU), latency
+    is per ``predict`` call. The recommended backend is the fastest one whose F1 is at
+    least ``1 - tolerance``.
+    """
+    reference, _ = run_backend(load_model("pytorch", weights, imgsz), frames, imgsz)
+    report = {"weights": os.path.basename(weights), "hash": file_hash(weights), "imgsz": imgsz,
+              "frames": len(frames), "tolerance": tolerance, "backends": {}}
+    for backend in backends:
+        try:
+            model = load_model(backend, weights, imgsz, calibration)
+        except (ImportError, ValueError) as e:
+            print(f"Skipping {backend}: {e}")
+            continue
+        detections, latencies = run_backend(model, frames, imgsz)
+        matched, ious = 0, []
+        for ref, det in zip(reference, detections):
+            count, match_ious = match_detections(ref, det)
+            matched += count
+            ious += match_ious
+        ref_total = sum(len(boxes) for boxes, _ in reference)
+        total = sum(len(boxes) for boxes, _ in detections)
+        f1 = 2 * matched / (ref_total + total) if ref_total + total else 1.0
+        report["backends"][backend] = {
+            "p50_ms": float(np.percentile(latencies, 50) * 1000),
+            "p95_ms": float(np.percentile(latencies, 95) * 1000),
+            "fps": float(len(latencies) / sum(latencies)),
+            "detections": total,
+            "f1_vs_pytorch": f1,
+            "mean_iou": float(np.mean(ious)) if ious else None,
+        }
+
+    within = [name for name, stats in report["backends"].items() if stats["f1_vs_pytorch"] >= 1 - tolerance]
+    report["recommended"] = min(within, key=lambda name: report["backends"][name]["p50_ms"]) if within else "pytorch"
+    return report
+
+
+def print_report(report):
+    print(f"{report['weights']} ({report['hash']}), {report['imgsz']}x{report['imgsz']}, {report['frames']} frames")
+    print(f"{'backend':<15}{'p50 ms':>9}{'p95 ms':>9}{'fps':>8}{'dets':>7}{'F1':>7}{'IoU':>7}")
+    for name, stats in report["backends"].items():
+        iou = f"{stats['mean_iou']:.3f}" if stats["mean_iou"] is not None else "-"
+        print(f"{name:<15}{stats['p50_ms']:>9.1f}{stats['p95_ms']:>9.1f}{stats['fps']:>8.1f}"
+              f"{stats['detections']:>7}{stats['f1_vs_pytorch']:>7.3f}{iou:>7}")
+    print(f"Recommended (fastest with F1 >= {1 - report['tolerance']:.2f}): {report['recommended']}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export yolov8n.pt to faster CPU backends and compare them.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = sub.add_parser("export", help="Export (and cache) the model for the given backends")
+    compare_parser = sub.add_parser("compare", help="Accuracy/latency report of the backends")
+    for p in (export_parser, compare_parser):
+        p.add_argument("--weights", default=DEFAULT_WEIGHTS)
+        p.add_argument("--backends", nargs="+", default=BACKENDS, choices=BACKENDS)
+        p.add_argument("--imgsz", type=int, default=640)
+        p.add_argument("--calibration", help="Image folder for INT8 calibration (e.g. 100-300 flight frames)")
+    compare_parser.add_argument("--images", help="Folder of test images")
+    compare_parser.add_argument("--video", help="Video to sample test frames from")
+    compare_parser.add_argument("--frames", type=int, default=50)
+    compare_parser.add_argument("--tolerance", type=float, default=0.05, help="Allowed F1 drop vs PyTorch")
+    compare_parser.add_argument("--output", default="backend_report.json")
+    args = parser.parse_args()
+
+    # INT8 backends are only built when there are calibration images
+    backends = [b for b in args.backends if args.calibration or not b.endswith("-int8")]
+
+    if args.command == "export":
+        for backend in backends:
+            print(f"{backend}: {prepare(backend, args.weights, args.imgsz, args.calibration)}")
+    else:
+        if not (args.images or args.video):
+            parser.error("compare needs --images or --video")
+        frames = load_frames(args.images, args.video, args.frames)
+        report = compare(backends, frames, args.weights, args.imgsz, args.calibration, args.tolerance)
+        print_report(report)
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Report written to {args.output}")
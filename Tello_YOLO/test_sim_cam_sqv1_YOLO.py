@@ -1,33 +1,60 @@
+import os
+import sys
 import threading
-import time
 import cv2
 from djitellopy import Tello
-from ultralytics import YOLO
-
-# Use a shared variable to store the latest frame
-# and a lock to ensure thread-safe access.
-frame_lock = threading.Lock()
-latest_frame = None
+from box_propagator import BoxPropagator
+from model_prep import load_model
+from track_store import TrackStore
+from yolo_worker import YOLOWorker, draw_detections
+
+# Make the shared tello_common package (repository root) importable
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from tello_common.frame_bus import FrameBus
+from tello_common.overlay import OverlayRenderer
+from tello_common.frame_source import H264FrameSource
+from tello_common.quality_governor import QualityGovernor
+
+# Use a shared ring of the newest frames so every consumer
+# can tell whether a frame is new without copying it.
+frame_bus = FrameBus()
 is_running = True
 
 # --- YOLO Setup ---
 # Load a pre-trained YOLOv8 model. 'yolov8n.pt' is the nano version, which is
 # fast and suitable for real-time applications like this.
 # You can choose a larger model for more accuracy if needed, but it will be slower.
-model = YOLO('yolov8n.pt')
+# YOLO_BACKEND picks the runtime: "pytorch", "onnx" or "openvino" (exported once and cached by
+# model_prep.py), or their "-int8" variants after `python model_prep.py export --calibration <folder>`.
+# Run `python model_prep.py compare` to see which one is fastest on this machine.
+YOLO_BACKEND = "pytorch"
+model = load_model(YOLO_BACKEND)
+
+# Input sizes to choose from, cheapest first. The quality governor picks the largest one whose
+# inference time stays within YOLO_LATENCY_BUDGET (seconds) on this machine. Exported models
+# have a fixed input size, so they always run at 640.
+YOLO_QUALITY_LEVELS = [{"imgsz": 320}, {"imgsz": 416}, {"imgsz": 512}, {"imgsz": 640}]
+if YOLO_BACKEND != "pytorch":
+    YOLO_QUALITY_LEVELS = [{"imgsz": 640}]
+YOLO_LATENCY_BUDGET = 0.066
+
+# Run YOLO only every few frames (more often when things move fast, or after a scene change) and
+# move its boxes with optical flow in between; False runs YOLO on every frame it can
+PROPAGATE_BOXES = True
+
+# Frames arriving faster than the screen refreshes (e.g. a burst after a decoder stall) are never
+# seen, so they are not drawn
+DISPLAY_FPS = 60
 
 # Thread for fetching video frames from the Tello
 def video_read_thread():
-    global latest_frame
     global is_running
 
     tello.streamon()
-    while is_running:
-        frame_read = tello.get_frame_read()
-        if frame_read.frame is not None:
-            with frame_lock:
-                latest_frame = frame_read.frame
-        time.sleep(0.01)
+    # Decode the H.264 stream directly and publish each frame the moment it is ready
+    frame_source = H264FrameSource(frame_bus, tello.get_udp_video_address())
+    frame_source.run(keep_running=lambda: is_running)
+    frame_bus.close()
     tello.streamoff()
 
 
@@ -65,26 +92,35 @@ if __name__ == "__main__":
     video_thread.start()
     command_thread.start()
 
+    # YOLO runs on its own thread on the newest frame; the loop below only displays
+    # Every result also goes into the track store, which keeps each track's recent boxes, velocity and
+    # time to collision for follow/avoid logic (e.g. track_store.closer_than(2.0, class_id=0) for people)
+    quality_governor = QualityGovernor("yolo", YOLO_QUALITY_LEVELS, YOLO_LATENCY_BUDGET)
+    track_store = TrackStore()
+    yolo_worker = YOLOWorker(model, frame_bus, governor=quality_governor,
+                             propagator=BoxPropagator() if PROPAGATE_BOXES else None,
+                             track_store=track_store).start()
+
+    # Draws the overlays straight into a reused 960x720 display buffer
+    overlay = OverlayRenderer((960, 720), max_fps=DISPLAY_FPS)
+
+    last_seq = 0
     try:
         while is_running:
-            # Display the video frame in the main thread
-            frame_to_display = None
-            with frame_lock:
-                frame_to_display = latest_frame
-
-            if frame_to_display is not None:
-                # Perform YOLO object detection on the frame.
-                # 'stream=True' is recommended for video processing.
-                results = model.track(frame_to_display, persist=True, show=False, verbose=False)
+            # Wait (briefly) for a frame we have not shown yet
+            packet = frame_bus.wait_for_newer(last_seq, timeout=0.05)
 
-                # Get the annotated frame from the results
-                # `results[0].plot()` returns the frame with bounding boxes and labels drawn on it.
-                annotated_frame = results[0].plot()
+            if packet is not None:
+                last_seq = packet.seq
 
-                # The `plot()` method already handles the color space,
-                # so we no longer need the cvtColor conversion.
-                annotated_frame = cv2.resize(annotated_frame, (960, 720))
-                cv2.imshow("Tello Video", annotated_frame)
+                # Draw the newest YOLO result (usually from a slightly older frame) over this frame,
+                # unless it will never be shown
+                detections = yolo_worker.latest
+                if overlay.begin(packet.frame):
+                    draw_detections(overlay, detections, yolo_worker.names)
+                    if detections is not None:
+                        overlay.text(f"YOLO latency: {detections.latency * 1000:.0f} ms", (10, 30), scale=0.7)
+                    overlay.show("Tello Video")
 
             # Check for keyboard 'q' press to quit
             if cv2.waitKey(1) & 0xFF == ord('q'):
@@ -93,6 +129,10 @@ if __name__ == "__main__":
     finally:
         command_thread.join()
         video_thread.join(timeout=1)
+        yolo_worker.stop()
+        print(f"YOLO processed {yolo_worker.processed} frames ({yolo_worker.detected} detected), "
+              f"skipped {yolo_worker.skipped}")
+        print(f"Tracks: {track_store.created} seen, {len(track_store)} still active")
         cv2.destroyAllWindows()
         tello.end()
         print("Program ended safely.")
@@ -0,0 +1,238 @@
+# track_store.py
+import threading
+from collections import namedtuple
+
+import numpy as np
+
+# Approximate real heights (meters) of some COCO classes, used to estimate distance from box height
+CLASS_HEIGHTS = {0: 1.7, 1: 1.1, 2: 1.5, 3: 1.1, 5: 3.0, 7: 2.5, 16: 0.5, 56: 0.9, 62: 0.6}
+
+# Tello camera: 82.6 degree diagonal field of view at 960x720. Pass
+# undistorter.camera_matrix[0, 0] instead when the camera is calibrated.
+TELLO_FOCAL_LENGTH = 683.0
+
+# The newest state of one track: xyxy box (pixels), velocity (vx, vy in pixels/s of the box
+# center), growth (relative change of the box height per second, > 0 when approaching),
+# time to collision in seconds (inf when not approaching) and estimated distance in meters
+# (nan for classes without a known height)
+TrackState = namedtuple("TrackState", ["track_id", "class_id", "box", "confidence", "timestamp", "hits",
+                                       "velocity", "growth", "ttc", "distance"])
+
+
+class TrackStore:
+    """
+    Keeps the recent history of every YOLO track, so follow/avoid logic can query it every
+    frame without going through the results again.
+
+    Each track owns one slot of preallocated NumPy arrays; the last ``history`` boxes,
+    confidences and timestamps of a slot form a ring buffer. A dict maps track IDs to slots,
+    so lookups by ID are O(1), and all per-track estimates are computed for every slot at
+    once:
+
+    * velocity of the box center and growth of the box height, fitted (least squares) over
+      the last ``fit_samples`` observations,
+    * time to collision, 1 / growth: how long until the object fills the view at the
+      current rate of approach,
+    * distance, from the box height and ``CLASS_HEIGHTS`` with a pinhole camera.
+
+    Tracks not seen for ``timeout`` seconds are expired and their slots reused; when all
+    ``capacity`` slots are taken, the track seen least recently is dropped. Call ``update``
+    with every Detections (the YOLOWorker does this when it has a store); detections
+    without a track ID are ignored. All methods are thread-safe and queries return copies.
+    """
+
+    def __init__(self, capacity=64, history=32, timeout=1.0, fit_samples=6, focal_length=TELLO_FOCAL_LENGTH,
+                 class_heights=None):
+        self.capacity = capacity
+        self.history = history
+        self.timeout = timeout
+        self.fit_samples = min(fit_samples, history)
+        self.focal_length = focal_length
+        self.class_heights = CLASS_HEIGHTS if class_heights is None else class_heights
+
+        # Ring history per slot
+        self._boxes = np.zeros((capacity, history, 4), dtype=np.float32)
+        self._confidences = np.zeros((capacity, history), dtype=np.float32)
+        self._timestamps = np.zeros((capacity, history), dtype=np.float64)
+        # Per-slot state
+        self._ids = np.full(capacity, -1, dtype=np.int32)
+        self._classes = np.zeros(capacity, dtype=np.int32)
+        self._heights = np.full(capacity, np.nan, dtype=np.float32)  # Real height of the class, meters
+        self._head = np.zeros(capacity, dtype=np.int32)  # Index of the newest sample
+        self._count = np.zeros(capacity, dtype=np.int32)  # Samples seen (the ring holds the last `history`)
+        self._active = np.zeros(capacity, dtype=bool)
+
+        # Estimates, refreshed by update
+        self._velocity = np.zeros((capacity, 2), dtype=np.float32)
+        self._growth = np.zeros(capacity, dtype=np.float32)
+
+        self._slots = {}  # Track ID -> slot
+        self._free = list(range(capacity - 1, -1, -1))
+        self._lock = threading.Lock()
+        self.last_update = 0.0
+
+        # Counters
+        self.created = 0
+        self.expired = 0
+
+    def __len__(self):
+        return len(self._slots)
+
+    def __contains__(self, track_id):
+        return track_id in self._slots
+
+    def update(self, detections):
+        """Adds one Detections result; expires tracks not seen for ``timeout`` seconds."""
+        timestamp = detections.timestamp
+        with self._lock:
+            if timestamp < self.last_update:
+                return  # Older than what we have; results are published in order, so just in case
+            self.last_update = timestamp
+            tracked = detections.track_ids >= 0
+            slots = np.array([self._slot_for(int(track_id), int(class_id))
+                              for track_id, class_id in zip(detections.track_ids[tracked],
+                                                            detections.classes[tracked])], dtype=np.int32)
+            if len(slots):
+                head = (self._head[slots] + 1) % self.history
+                self._head[slots] = head
+                self._count[slots] += 1
+                self._boxes[slots, head] = detections.boxes[tracked]
+                self._confidences[slots, head] = detections.confidences[tracked]
+                self._timestamps[slots, head] = timestamp
+                self._fit(slots)
+            self._expire(timestamp)
+
+    def expire(self, now):
+        """Drops tracks not seen for ``timeout`` seconds before ``now`` (time.time())."""
+        with self._lock:
+            self._expire(now)
+
+    def get(self, track_id):
+        """The TrackState of ``track_id``, or None if it is not (or no longer) tracked."""
+        with self._lock:
+            slot = self._slots.get(track_id)
+            if slot is None:
+                return None
+            return self._state(slot)
+
+    def history_of(self, track_id):
+        """(boxes, confidences, timestamps) of ``track_id``, oldest first, or None if it is not tracked."""
+        with self._lock:
+            slot = self._slots.get(track_id)
+            if slot is None:
+                return None
+            order = self._order(slot)
+            return (self._boxes[slot, order].copy(), self._confidences[slot, order].copy(),
+                    self._timestamps[slot, order].copy())
+
+    def tracks(self, class_id=None):
+        """TrackStates of all active tracks (optionally of one class), in no particular order."""
+        with self._lock:
+            return [self._state(slot) for slot in self._select(class_id)]
+
+    def closer_than(self, distance, class_id=None):
+        """Track IDs whose estimated distance is below ``distance`` meters, closest first."""
+        with self._lock:
+            slots = self._select(class_id)
+            distances = self._distances(slots)
+            near = slots[distances < distance]
+            return self._ids[near[np.argsort(distances[distances < distance])]].tolist()
+
+    def approaching_within(self, seconds, class_id=None):
+        """Track IDs whose time to collision is below ``seconds``, soonest first."""
+        with self._lock:
+            slots = self._select(class_id)
+            ttc = self._ttc(slots)
+            soon = ttc < seconds
+            return self._ids[slots[soon][np.argsort(ttc[soon])]].tolist()
+
+    def _slot_for(self, track_id, class_id):
+        slot = self._slots.get(track_id)
+        if slot is not None:
+            return slot
+        if not self._free:
+            # Full: drop the track seen least recently
+            active = np.flatnonzero(self._active)
+            last_seen = self._timestamps[active, self._head[active]]
+            self._release(active[np.argmin(last_seen)])
+        slot = self._free.pop()
+        self._slots[track_id] = slot
+        self._ids[slot] = track_id
+        self._classes[slot] = class_id
+        self._heights[slot] = self.class_heights.get(class_id, np.nan)
+        self._head[slot] = self.history - 1  # The first sample goes to index 0
+        self._count[slot] = 0
+        self._velocity[slot] = 0.0
+        self._growth[slot] = 0.0
+        self._active[slot] = True
+        self.created += 1
+        return slot
+
+    def _release(self, slot):
+        del self._slots[int(self._ids[slot])]
+        self._ids[slot] = -1
+        self._active[slot] = False
+        self._free.append(int(slot))
+
+    def _expire(self, now):
+        active = np.flatnonzero(self._active)
+        last_seen = self._timestamps[active, self._head[active]]
+        for slot in active[now - last_seen > self.timeout]:
+            self._release(slot)
+            self.expired += 1
+
+    def _order(self, slot):
+        samples = min(int(self._count[slot]), self.history)
+        return (self._head[slot] - np.arange(samples - 1, -1, -1)) % self.history
+
+    def _fit(self, slots):
+        # Least-squares slope over the last fit_samples observations of every slot at once;
+        # slots with fewer samples weight the missing ones with zero
+        samples = self.fit_samples
+        index = (self._head[slots, None] - np.arange(samples)) % self.history  # Newest first
+        weight = (np.arange(samples) < self._count[slots, None]).astype(np.float64)
+        rows = slots[:, None]
+        times = self._timestamps[rows, index] - self._timestamps[slots, self._head[slots]][:, None]
+        boxes = self._boxes[rows, index].astype(np.float64)
+        centers = (boxes[..., :2] + boxes[..., 2:]) / 2
+        log_heights = np.log(np.maximum(boxes[..., 3] - boxes[..., 1], 1.0))
+
+        total = np.maximum(weight.sum(axis=1), 1.0)
+        mean_time = (weight * times).sum(axis=1) / total
+        dt = (times - mean_time[:, None]) * weight
+        variance = (dt * dt).sum(axis=1)
+        valid = variance > 1e-9  # Needs two samples at different times
+        variance[~valid] = 1.0
+
+        self._velocity[slots] = np.where(valid[:, None],
+                                         (dt[..., None] * centers).sum(axis=1) / variance[:, None], 0.0)
+        self._growth[slots] = np.where(valid, (dt * log_heights).sum(axis=1) / variance, 0.0)
+
+    def _select(self, class_id):
+        mask = self._active if class_id is None else self._active & (self._classes == class_id)
+        return np.flatnonzero(mask)
+
+    def _distances(self, slots):
+        heights = self._boxes[slots, self._head[slots], 3] - self._boxes[slots, self._head[slots], 1]
+        return self.focal_length * self._heights[slots] / np.maximum(heights, 1.0)
+
+    def _ttc(self, slots):
+        growth = self._growth[slots]
+        with np.errstate(divide="ignore"):
+            return np.where(growth > 0, 1.0 / np.maximum(growth, 1e-9), np.inf)
+
+    def _state(self, slot):
+        slots = np.array([slot])
+        head = self._head[slot]
+        return TrackState(
+            track_id=int(self._ids[slot]),
+            class_id=int(self._classes[slot]),
+            box=self._boxes[slot, head].copy(),
+            confidence=float(self._confidences[slot, head]),
+            timestamp=float(self._timestamps[slot, head]),
+            hits=int(self._count[slot]),
+            velocity=tuple(float(v) for v in self._velocity[slot]),
+            growth=float(self._growth[slot]),
+            ttc=float(self._ttc(slots)[0]),
+            distance=float(self._distances(slots)[0]),
+        )
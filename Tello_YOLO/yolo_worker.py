@@ -0,0 +1,196 @@
+# yolo_worker.py
+import os
+import sys
+import threading
+import time
+from collections import namedtuple
+from functools import lru_cache
+
+import cv2
+import numpy as np
+
+# Make the shared tello_common package (repository root) importable
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from tello_common.frame_bus import copy_frame
+
+# One YOLO result: the frame it belongs to (sequence number and capture time), xyxy boxes in
+# frame pixels, class indices, track IDs (-1 while untracked) and confidences as NumPy arrays,
+# how long ago the frame was captured when the result was published, how long track() (or the
+# box propagation) took and whether the detector ran on this frame or the boxes were propagated
+Detections = namedtuple("Detections", ["seq", "timestamp", "boxes", "classes", "track_ids", "confidences",
+                                       "latency", "inference_time", "detected"])
+
+
+class YOLOWorker:
+    """
+    Runs YOLO tracking on its own thread, always on the newest frame of a FrameBus.
+
+    Frames that arrive while ``model.track`` is busy are skipped rather than queued, so
+    the tracker never works through a backlog of stale frames and every result is as fresh
+    as the hardware allows (``skipped`` counts them). Each result is published as a
+    ``Detections`` tuple; consumers read ``latest`` or block on ``wait_for_newer(seq)``, and
+    the display loop draws the newest one over every video frame at the video's own rate.
+
+    An optional QualityGovernor picks the ``track`` settings (e.g. ``imgsz``) from the
+    measured inference time.
+
+    With a ``propagator`` (a BoxPropagator) YOLO only runs when the propagator says it is
+    due (every few frames, depending on motion, or on a scene change); in between the last
+    detected boxes are moved with optical flow and published with the detector's track IDs.
+
+    With a ``track_store`` (a TrackStore) every result is added to it before it is published.
+
+    An exception while processing a frame is printed and counted in ``errors`` (the newest
+    in ``last_error``); the worker then runs the detector on the next frame instead of dying.
+    """
+
+    def __init__(self, model, frame_bus, governor=None, propagator=None, track_store=None, **track_args):
+        self.model = model
+        self.names = model.names
+        self.frame_bus = frame_bus
+        self.governor = governor
+        self.propagator = propagator
+        self.track_store = track_store
+        self.track_args = dict(persist=True, show=False, verbose=False, **track_args)
+
+        self._latest = None
+        self._detected = None  # Newest result of the detector itself; propagated boxes index into it
+        self._cond = threading.Condition()
+        self._running = False
+        self._thread = None
+
+        # Counters
+        self.processed = 0
+        self.skipped = 0
+        self.detected = 0
+        self.errors = 0
+        self.last_error = None
+
+    @property
+    def latest(self):
+        """The newest Detections, or None before the first result."""
+        return self._latest
+
+    def wait_for_newer(self, seq, timeout=None):
+        """Blocks until a result for a frame newer than ``seq`` is published; returns None on timeout."""
+        with self._cond:
+            self._cond.wait_for(lambda: self._latest is not None and self._latest.seq > seq, timeout)
+            if self._latest is None or self._latest.seq <= seq:
+                return None
+            return self._latest
+
+    def start(self):
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="YOLOWorker", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._running = False
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self):
+        last_seq = 0
+        frame = None  # Private copy, so the video thread can reuse the ring slot during inference
+        while self._running:
+            packet = self.frame_bus.wait_for_newer(last_seq, timeout=0.1)
+            if packet is None:
+                if self.frame_bus.closed:
+                    break
+                continue
+            if last_seq:
+                self.skipped += packet.seq - last_seq - 1
+            last_seq = packet.seq
+            try:
+                frame = copy_frame(packet.frame, frame)
+                detections = self._process(frame, packet)
+            except Exception as e:
+                # Keep running; the next frame goes to the detector and starts over
+                self.errors += 1
+                self.last_error = e
+                self._detected = None
+                print(f"An error occurred in the YOLO worker: {e!r}")
+                continue
+            with self._cond:
+                self._latest = detections
+                self._cond.notify_all()
+
+    def _process(self, frame, packet):
+        detections = None
+        if self.propagator is not None and self._detected is not None and not self.propagator.due:
+            detections = self._propagate(frame, packet)
+        if detections is None:
+            detections = self._detect(frame, packet)
+        self.processed += 1
+        if self.track_store is not None:
+            self.track_store.update(detections)
+        return detections
+
+    def _detect(self, frame, packet):
+        settings = self.governor.settings if self.governor is not None else {}
+        start = time.perf_counter()
+        results = self.model.track(frame, **self.track_args, **settings)
+        inference_time = time.perf_counter() - start
+        if self.governor is not None:
+            self.governor.record(inference_time)
+
+        detections = detections_from_result(results[0], packet.seq, packet.timestamp, inference_time)
+        if self.propagator is not None:
+            self.propagator.reset(frame, detections.boxes)
+            self._detected = detections
+        self.detected += 1
+        return detections
+
+    def _propagate(self, frame, packet):
+        # Returns None when the scene changed or too many boxes were lost, so the detector runs now
+        start = time.perf_counter()
+        boxes, alive = self.propagator.propagate(frame)
+        if self.propagator.stale:
+            return None
+        # ``alive`` has one entry per box of the last detection, earlier propagations may have dropped some
+        detected = self._detected
+        return detected._replace(seq=packet.seq, timestamp=packet.timestamp, boxes=boxes[alive].copy(),
+                                 classes=detected.classes[alive], track_ids=detected.track_ids[alive],
+                                 confidences=detected.confidences[alive], latency=time.time() - packet.timestamp,
+                                 inference_time=time.perf_counter() - start, detected=False)
+
+
+def detections_from_result(result, seq, timestamp, inference_time):
+    """Copies the boxes of an ultralytics Results object into NumPy arrays."""
+    boxes = result.boxes
+    track_ids = boxes.id
+    return Detections(
+        seq=seq,
+        timestamp=timestamp,
+        boxes=boxes.xyxy.cpu().numpy().astype(np.float32),
+        classes=boxes.cls.cpu().numpy().astype(np.int32),
+        track_ids=(track_ids.cpu().numpy().astype(np.int32) if track_ids is not None
+                   else np.full(len(boxes), -1, dtype=np.int32)),
+        confidences=boxes.conf.cpu().numpy().astype(np.float32),
+        latency=time.time() - timestamp,
+        inference_time=inference_time,
+        detected=True,
+    )
+
+
+@lru_cache(maxsize=None)
+def class_color(class_id):
+    """A fixed, distinct BGR color per class."""
+    hue = (class_id * 47) % 180
+    return tuple(int(c) for c in cv2.cvtColor(np.uint8([[[hue, 200, 255]]]), cv2.COLOR_HSV2BGR)[0, 0])
+
+
+def draw_detections(overlay, detections, names):
+    """Draws boxes with a class name, track ID and confidence label through an OverlayRenderer."""
+    if detections is None:
+        return
+    for box, class_id, track_id, confidence in zip(
+            detections.boxes, detections.classes, detections.track_ids, detections.confidences):
+        color = class_color(int(class_id))
+        # Confidence in steps of 0.05, so the label sprites repeat from frame to frame
+        label = f"{names[int(class_id)]} {round(confidence * 20) / 20:.2f}"
+        if track_id >= 0:
+            label = f"id:{track_id} {label}"
+        overlay.box(box, color)
+        overlay.text(label, (box[0], max(box[1], 12)), scale=0.5, color=(255, 255, 255), thickness=1, background=color)
@@ -0,0 +1,2 @@
+# tello_common
+"""Shared building blocks used by the Tello projects in this repository."""
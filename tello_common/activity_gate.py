@@ -0,0 +1,82 @@
+# activity_gate.py
+import time
+
+import cv2
+import numpy as np
+
+
+class ActivityGate:
+    """
+    Decides per frame whether an expensive model (MediaPipe hands/pose) needs to run.
+
+    Every frame is shrunk to a tiny grayscale image (``size``; sampled to four times that
+    size first, then averaged with INTER_AREA so noise cancels out) and compared with the
+    previous one. The scene counts as active while pixels change (more than
+    ``motion_fraction`` of them by more than ``pixel_threshold``) or while the model still
+    reports a detection, and for ``hold`` seconds after that.
+    Active frames are all processed; in a static, empty scene the model only runs at
+    ``idle_rate`` Hz so a person standing still is still found.
+
+    Call ``check(frame)`` before running the model and ``report(detected)`` with its
+    result. ``processed`` and ``skipped`` count the frames of each kind.
+    """
+
+    def __init__(self, idle_rate=2.0, size=(64, 48), pixel_threshold=12, motion_fraction=0.004, hold=1.0):
+        self.idle_period = 1.0 / idle_rate
+        self.size = size
+        self.pixel_threshold = pixel_threshold
+        self.motion_fraction = motion_fraction
+        self.hold = hold
+
+        self._sampled = None
+        self._small = None
+        self._gray = None
+        self._previous = None
+        self._diff = None
+        self._active_until = 0.0
+        self._last_processed = -np.inf
+
+        # Counters
+        self.processed = 0
+        self.skipped = 0
+        self.motion_frames = 0
+
+    @property
+    def active(self):
+        return time.monotonic() < self._active_until
+
+    def check(self, frame, now=None):
+        """Returns True if the model should run on this frame."""
+        if now is None:
+            now = time.monotonic()
+        if self._motion(frame):
+            self.motion_frames += 1
+            self._active_until = now + self.hold
+
+        if now < self._active_until or now - self._last_processed >= self.idle_period:
+            self._last_processed = now
+            self.processed += 1
+            return True
+        self.skipped += 1
+        return False
+
+    def report(self, detected, now=None):
+        """Keeps the gate open while the model sees a hand or person, even if nobody moves."""
+        if detected:
+            self._active_until = (time.monotonic() if now is None else now) + self.hold
+
+    def _motion(self, frame):
+        width, height = self.size
+        self._sampled = cv2.resize(frame, (width * 4, height * 4), dst=self._sampled, interpolation=cv2.INTER_NEAREST)
+        self._small = cv2.resize(self._sampled, self.size, dst=self._small, interpolation=cv2.INTER_AREA)
+        if self._small.ndim == 3:
+            self._gray = cv2.cvtColor(self._small, cv2.COLOR_BGR2GRAY, dst=self._gray)
+        else:
+            self._gray = self._small
+        if self._previous is None:
+            self._previous = self._gray.copy()
+            return True
+        self._diff = cv2.absdiff(self._gray, self._previous, dst=self._diff)
+        self._previous[...] = self._gray
+        changed = cv2.countNonZero(cv2.threshold(self._diff, self.pixel_threshold, 255, cv2.THRESH_BINARY)[1])
+        return changed > self.motion_fraction * self._diff.size
@@ -0,0 +1,335 @@
+# async_tello.py
+import argparse
+import asyncio
+import time
+from collections import OrderedDict
+
+TELLO_IP = "192.168.10.1"
+TELLO_COMMAND_PORT = 8889
+STATE_PORT = 8890  # The Tello sends state packets to this port on the client
+
+# Same response timeouts as djitellopy
+RESPONSE_TIMEOUT = 7.0
+RETRY_COUNT = 3
+# A response arriving this long after its command timed out, while no other command is waiting
+# for an answer, is taken as the late answer to it and dropped
+LATE_RESPONSE_GRACE = 1.0
+
+
+class TelloCommandError(Exception):
+    """The drone answered a command with something other than 'ok'."""
+
+
+class _InFlight:
+    def __init__(self, seq, command, future):
+        self.seq = seq
+        self.command = command
+        self.future = future
+        self.sent = time.monotonic()
+        self.abandoned = None  # Time the command timed out, if it did
+
+
+class _CommandProtocol(asyncio.DatagramProtocol):
+    def __init__(self, client):
+        self.client = client
+
+    def datagram_received(self, data, address):
+        self.client._on_response(data)
+
+    def error_received(self, exc):
+        print(f"Tello command socket error: {exc}")
+
+
+class _StateProtocol(asyncio.DatagramProtocol):
+    def __init__(self, client):
+        self.client = client
+
+    def datagram_received(self, data, address):
+        self.client._on_state(data)
+
+
+class AsyncTello:
+    """
+    asyncio client for the Tello SDK, as an alternative to djitellopy's blocking calls.
+
+    Commands and state use datagram endpoints on the event loop, so any number of
+    coroutines (vision, display, control) can share one loop without extra threads.
+    Every command gets a sequence number and waits on its own future in the in-flight
+    table. The Tello answers in order, so a response completes the oldest command in
+    flight. Timeouts and retries are awaited, never slept. ``max_in_flight`` bounds how
+    many commands are outstanding at once; the Tello executes one motion command at a
+    time, so it defaults to 1 and callers queue up behind it without blocking the loop.
+    The SDK's responses carry no tag: after a timeout the next response goes to the retry
+    (right when the first packet was lost). Only if the first attempt was answered late and
+    another command is sent within ``LATE_RESPONSE_GRACE`` of that can an answer be
+    attributed to the wrong command.
+
+    State packets are parsed into dicts. ``state`` holds the newest one and ``states()``
+    is an async iterator over them.
+    """
+
+    def __init__(self, host=TELLO_IP, command_port=TELLO_COMMAND_PORT, state_port=STATE_PORT,
+                 timeout=RESPONSE_TIMEOUT, retries=RETRY_COUNT, max_in_flight=1):
+        self.address = (host, command_port)
+        self.state_port = state_port
+        self.timeout = timeout
+        self.retries = retries
+        self.max_in_flight = max_in_flight
+        self.state = {}
+        self.state_time = None
+        self.is_flying = False
+
+        self._in_flight = OrderedDict()  # seq -> _InFlight, oldest first
+        self._seq = 0
+        self._slots = None
+        self._command_transport = None
+        self._state_transport = None
+        self._state_queues = []
+
+    # --- Connection ---
+
+    async def connect(self):
+        """Opens the command and state endpoints and enters SDK mode."""
+        loop = asyncio.get_running_loop()
+        self._slots = asyncio.Semaphore(self.max_in_flight)
+        self._command_transport, _ = await loop.create_datagram_endpoint(
+            lambda: _CommandProtocol(self), remote_addr=self.address)
+        self._state_transport, _ = await loop.create_datagram_endpoint(
+            lambda: _StateProtocol(self), local_addr=("0.0.0.0", self.state_port))
+        await self.send_control_command("command")
+
+    def close(self):
+        for transport in (self._command_transport, self._state_transport):
+            if transport is not None:
+                transport.close()
+        for entry in self._in_flight.values():
+            if not entry.future.done():
+                entry.future.cancel()
+        self._in_flight.clear()
+        for states in self._state_queues:
+            # Make room for the end marker; the queue is full whenever a packet is waiting
+            while True:
+                try:
+                    states.get_nowait()
+                except asyncio.QueueEmpty:
+                    break
+            states.put_nowait(None)
+
+    async def __aenter__(self):
+        await self.connect()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.close()
+
+    # --- Commands ---
+
+    async def send_command(self, command, timeout=None, retries=None):
+        """
+        Sends a command and returns the drone's response text. Retries on timeout and
+        raises ``asyncio.TimeoutError`` when every attempt timed out.
+        """
+        timeout = self.timeout if timeout is None else timeout
+        retries = self.retries if retries is None else retries
+        async with self._slots:
+            for attempt in range(retries):
+                entry = self._send(command)
+                try:
+                    return await asyncio.wait_for(asyncio.shield(entry.future), timeout)
+                except asyncio.TimeoutError:
+                    entry.abandoned = time.monotonic()
+                    print(f"Tello command '{command}' timed out (attempt {attempt + 1}/{retries})")
+            raise asyncio.TimeoutError(f"No response to '{command}' after {retries} attempts")
+
+    async def send_control_command(self, command, timeout=None):
+        """Sends a command that the drone answers with 'ok'; raises TelloCommandError otherwise."""
+        response = await self.send_command(command, timeout)
+        if response.lower() != "ok":
+            raise TelloCommandError(f"Command '{command}' failed: {response}")
+
+    async def send_read_command(self, command):
+        """Sends a query such as 'battery?' and returns the answer as int, float or str."""
+        return parse_value(await self.send_command(command))
+
+    def send_command_without_return(self, command):
+        """Fire-and-forget, for commands the drone never answers (rc)."""
+        self._command_transport.sendto(command.encode("utf-8"))
+
+    def _send(self, command):
+        self._seq += 1
+        entry = _InFlight(self._seq, command, asyncio.get_running_loop().create_future())
+        self._in_flight[entry.seq] = entry
+        self._command_transport.sendto(command.encode("utf-8"))
+        return entry
+
+    def _on_response(self, data):
+        response = data.decode("utf-8", errors="replace").strip()
+        now = time.monotonic()
+        # Commands abandoned long ago were never answered
+        for seq in [seq for seq, entry in self._in_flight.items()
+                    if entry.abandoned is not None and now - entry.abandoned >= LATE_RESPONSE_GRACE]:
+            del self._in_flight[seq]
+
+        # The SDK has no tags, so a response can't be matched to an attempt. A command still
+        # waiting (usually the retry of a lost packet) always gets it; abandoned attempts only
+        # absorb responses nobody waits for, e.g. a late answer after its retry was answered.
+        waiting = next((entry for entry in self._in_flight.values() if entry.abandoned is None), None)
+        if waiting is not None:
+            del self._in_flight[waiting.seq]
+            if not waiting.future.done():
+                waiting.future.set_result(response)
+            return
+        if self._in_flight:
+            self._in_flight.popitem(last=False)  # Late answer to a command that already timed out
+            return
+        print(f"Unexpected Tello response: {response}")
+
+    # --- State ---
+
+    def _on_state(self, data):
+        self.state = parse_state(data.decode("ascii", errors="replace"))
+        self.state_time = time.monotonic()
+        for states in self._state_queues:
+            if states.full():
+                states.get_nowait()  # Slow reader: drop the oldest packet, keep the newest
+            states.put_nowait(self.state)
+
+    async def states(self, maxsize=1):
+        """Async iterator over parsed state packets (10 Hz). Slow readers skip old packets."""
+        states = asyncio.Queue(maxsize)
+        self._state_queues.append(states)
+        try:
+            while True:
+                state = await states.get()
+                if state is None:
+                    return
+                yield state
+        finally:
+            self._state_queues.remove(states)
+
+    # --- Tello SDK commands ---
+
+    async def takeoff(self):
+        await self.send_control_command("takeoff", timeout=20)
+        self.is_flying = True
+
+    async def land(self):
+        await self.send_control_command("land")
+        self.is_flying = False
+
+    async def emergency(self):
+        self.send_command_without_return("emergency")
+        self.is_flying = False
+
+    async def streamon(self):
+        await self.send_control_command("streamon")
+
+    async def streamoff(self):
+        await self.send_control_command("streamoff")
+
+    async def move(self, direction, x):
+        await self.send_control_command(f"{direction} {x}")
+
+    async def move_forward(self, x):
+        await self.move("forward", x)
+
+    async def move_back(self, x):
+        await self.move("back", x)
+
+    async def move_left(self, x):
+        await self.move("left", x)
+
+    async def move_right(self, x):
+        await self.move("right", x)
+
+    async def move_up(self, x):
+        await self.move("up", x)
+
+    async def move_down(self, x):
+        await self.move("down", x)
+
+    async def rotate_clockwise(self, x):
+        await self.send_control_command(f"cw {x}")
+
+    async def rotate_counter_clockwise(self, x):
+        await self.send_control_command(f"ccw {x}")
+
+    async def flip(self, direction):
+        await self.send_control_command(f"flip {direction}")
+
+    async def flip_forward(self):
+        await self.flip("f")
+
+    async def flip_back(self):
+        await self.flip("b")
+
+    async def flip_left(self):
+        await self.flip("l")
+
+    async def flip_right(self):
+        await self.flip("r")
+
+    def send_rc_control(self, left_right_velocity, forward_backward_velocity, up_down_velocity, yaw_velocity):
+        """Sets the four stick velocities (-100..100). Not answered by the drone, so not awaited."""
+        values = [max(-100, min(100, int(v))) for v in
+                  (left_right_velocity, forward_backward_velocity, up_down_velocity, yaw_velocity)]
+        self.send_command_without_return("rc {} {} {} {}".format(*values))
+
+    async def get_battery(self):
+        return await self.send_read_command("battery?")
+
+
+def parse_value(text):
+    for kind in (int, float):
+        try:
+            return kind(text)
+        except ValueError:
+            pass
+    return text
+
+
+def parse_state(text):
+    """Parses a state packet ('pitch:0;roll:0;...;') into a dict of numbers."""
+    state = {}
+    for field in text.strip().split(";"):
+        key, _, value = field.partition(":")
+        if not key:
+            continue
+        if key == "mpry":
+            state[key] = [parse_value(v) for v in value.split(",")]
+        else:
+            state[key] = parse_value(value)
+    return state
+
+
+async def monitor(host, command_port, duration, fly):
+    async with AsyncTello(host, command_port) as tello:
+        print("Battery:", await tello.get_battery(), "%")
+
+        async def control():
+            if not fly:
+                return
+            await tello.takeoff()
+            # Queue several commands at once; they run one after the other without blocking the loop
+            await asyncio.gather(tello.rotate_clockwise(90), tello.rotate_counter_clockwise(90))
+            await tello.land()
+
+        async def show_states():
+            end = time.monotonic() + duration
+            async for state in tello.states():
+                print(f"h:{state.get('h')} yaw:{state.get('yaw')} bat:{state.get('bat')} tof:{state.get('tof')}")
+                if time.monotonic() > end:
+                    break
+
+        await asyncio.gather(control(), show_states())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Print the Tello's state stream using the asyncio client.")
+    parser.add_argument("--host", default=TELLO_IP)
+    parser.add_argument("--port", type=int, default=TELLO_COMMAND_PORT, help="Drone (or simulator) command port")
+    parser.add_argument("--duration", type=float, default=10, help="Seconds to print state for")
+    parser.add_argument("--fly", action="store_true", help="Also take off, turn around and land")
+    args = parser.parse_args()
+
+    asyncio.run(monitor(args.host, args.port, args.duration, args.fly))
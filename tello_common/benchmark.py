@@ -0,0 +1,406 @@
+# benchmark.py
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+from collections import OrderedDict
+
+import cv2
+import numpy as np
+
+from tello_common.frame_bus import FrameBus, copy_frame
+from tello_common.overlay import OverlayRenderer
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DISPLAY_SIZE = (960, 720)  # Every app resizes to this before imshow
+DEFAULT_RESOLUTIONS = ["480x360", "960x720", "1280x720"]
+PIPELINES = ["aruco", "aruco_tracked", "qrcode", "qrcode_cached", "gesture", "gesture_tasks", "pose", "yolo"]
+
+
+class StageTimer:
+    """Collects per-stage latencies (in seconds) for one pipeline run."""
+
+    def __init__(self):
+        self.samples = OrderedDict()
+
+    def time(self, stage, function, *args, **kwargs):
+        """Calls ``function`` and records how long it took under ``stage``. Returns its result."""
+        start = time.perf_counter()
+        result = function(*args, **kwargs)
+        self.samples.setdefault(stage, []).append(time.perf_counter() - start)
+        return result
+
+    def summary(self, wall_time, frames):
+        """p50/p95/p99/mean latency in milliseconds and sustained FPS for every stage."""
+        stages = OrderedDict()
+        for stage, samples in self.samples.items():
+            stages[stage] = summarize(np.asarray(samples))
+        return {
+            "frames": frames,
+            "fps": frames / wall_time if wall_time > 0 else 0.0,
+            "stages": stages,
+        }
+
+
+def summarize(samples):
+    p50, p95, p99 = np.percentile(samples, [50, 95, 99]) * 1000.0
+    mean = float(samples.mean())
+    return {
+        "p50_ms": round(float(p50), 3),
+        "p95_ms": round(float(p95), 3),
+        "p99_ms": round(float(p99), 3),
+        "mean_ms": round(mean * 1000.0, 3),
+        "fps": round(1.0 / mean, 1) if mean > 0 else None,
+    }
+
+
+# --- Input frames ---
+
+def synthetic_frames(width, height, count=60):
+    """
+    Frames with ArUco markers 0-4 and a QR code drifting across a textured background,
+    so the marker and QR detectors have real work to do on every frame.
+    """
+    rng = np.random.default_rng(0)
+    background = rng.integers(90, 160, size=(height, width, 3), dtype=np.uint8)
+    background = cv2.GaussianBlur(background, (7, 7), 0)
+
+    aruco_dict = cv2.aruco.getPredefinedDictionary(cv2.aruco.DICT_4X4_50)
+    marker_size = max(40, height // 6)
+    markers = [cv2.aruco.generateImageMarker(aruco_dict, marker_id, marker_size) for marker_id in range(5)]
+    qr_size = max(80, height // 3)
+    qr = cv2.QRCodeEncoder.create().encode("flip_forward")
+    qr = cv2.resize(qr, (qr_size, qr_size), interpolation=cv2.INTER_NEAREST)
+
+    frames = []
+    for index in range(count):
+        frame = background.copy()
+        shift = int((index * 4) % max(1, width // 8))
+        for marker_id, marker in enumerate(markers):
+            x = 20 + shift + marker_id * (marker_size + 20)
+            y = 20
+            if x + marker_size < width:
+                frame[y:y + marker_size, x:x + marker_size] = marker[:, :, None]
+        x, y = width - qr_size - 20 - shift, height - qr_size - 20
+        frame[y:y + qr_size, x:x + qr_size] = qr[:, :, None]
+        frames.append(frame)
+    return frames
+
+
+def video_frames(path, width, height, count=300):
+    """Reads up to ``count`` frames from a video file (or raw .h264) resized to width x height."""
+    capture = cv2.VideoCapture(path)
+    frames = []
+    while len(frames) < count:
+        ok, frame = capture.read()
+        if not ok:
+            break
+        frames.append(cv2.resize(frame, (width, height)))
+    capture.release()
+    if not frames:
+        raise ValueError(f"No frames could be read from {path}")
+    return frames
+
+
+# --- Pipelines ---
+# Each builder returns a function that runs one loop iteration of the app on a frame,
+# timing every stage the same way the app performs it.
+
+def build_aruco():
+    aruco_dict = cv2.aruco.getPredefinedDictionary(cv2.aruco.DICT_4X4_50)
+    detector = cv2.aruco.ArucoDetector(aruco_dict, cv2.aruco.DetectorParameters())
+    canvas = [None]
+
+    def step(timer, frame):
+        gray = timer.time("cvtColor", cv2.cvtColor, frame, cv2.COLOR_BGR2GRAY)
+        corners, ids, _ = timer.time("detectMarkers", detector.detectMarkers, gray)
+
+        def draw():
+            canvas[0] = copy_frame(frame, canvas[0])
+            if ids is not None:
+                cv2.aruco.drawDetectedMarkers(canvas[0], corners, ids)
+            return canvas[0]
+        return timer.time("overlay", draw)
+    return step
+
+
+def build_aruco_tracked():
+    sys.path.append(os.path.join(REPO_ROOT, "Tello_Aruco"))
+    from aruco_tracker import ArucoTracker
+
+    aruco_dict = cv2.aruco.getPredefinedDictionary(cv2.aruco.DICT_4X4_50)
+    tracker = ArucoTracker(cv2.aruco.ArucoDetector(aruco_dict, cv2.aruco.DetectorParameters()))
+    canvas = [None]
+
+    def step(timer, frame):
+        gray = timer.time("cvtColor", cv2.cvtColor, frame, cv2.COLOR_BGR2GRAY)
+        corners, ids, _ = timer.time("ArucoTracker.detect", tracker.detect, gray)
+
+        def draw():
+            canvas[0] = copy_frame(frame, canvas[0])
+            if ids is not None:
+                cv2.aruco.drawDetectedMarkers(canvas[0], corners, ids)
+            return canvas[0]
+        return timer.time("overlay", draw)
+    return step
+
+
+def build_qrcode():
+    qr_detector = cv2.QRCodeDetector()
+    canvas = [None]
+
+    def step(timer, frame):
+        decoded_info, points, _ = timer.time("detectAndDecode", qr_detector.detectAndDecode, frame)
+
+        def draw():
+            canvas[0] = copy_frame(frame, canvas[0])
+            if points is not None:
+                cv2.polylines(canvas[0], np.int32([points]), True, (0, 255, 0), 3)
+                if decoded_info:
+                    cv2.putText(canvas[0], decoded_info, (int(points[0][0][0]), int(points[0][0][1]) - 10),
+                                cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 2)
+            return canvas[0]
+        return timer.time("overlay", draw)
+    return step
+
+
+def build_qrcode_cached():
+    sys.path.append(os.path.join(REPO_ROOT, "Tello_QRCode"))
+    from qr_decode_cache import CachedQRDetector
+
+    qr_detector = CachedQRDetector()
+    canvas = [None]
+
+    def step(timer, frame):
+        results = timer.time("CachedQRDetector.detect", qr_detector.detect, frame)
+
+        def draw():
+            canvas[0] = copy_frame(frame, canvas[0])
+            for decoded_info, points in results:
+                cv2.polylines(canvas[0], np.int32([points]), True, (0, 255, 0), 3)
+                if decoded_info:
+                    cv2.putText(canvas[0], decoded_info, (int(points[0][0]), int(points[0][1]) - 10),
+                                cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 2)
+            return canvas[0]
+        return timer.time("overlay", draw)
+    return step
+
+
+def build_gesture(backend="solutions"):
+    sys.path.append(os.path.join(REPO_ROOT, "Tello_GestureCTRL"))
+    from gesture_controller import GestureController, draw_hand_landmarks
+
+    controller = GestureController(backend=backend)
+    overlay = OverlayRenderer(DISPLAY_SIZE)
+
+    def step(timer, frame):
+        gesture, _, _ = timer.time("GestureController.process_frame", controller.process_frame, frame)
+
+        def draw():
+            # Includes the resize to the display size
+            overlay.begin(frame)
+            draw_hand_landmarks(overlay, controller.landmarks)
+            overlay.text(f'Gesture: {gesture}', (10, 70))
+            return overlay.frame
+        return timer.time("overlay", draw)
+    return step
+
+
+def build_pose():
+    sys.path.append(os.path.join(REPO_ROOT, "Tello_PoseCTRL"))
+    from pose_controller import PoseController, draw_pose_landmarks
+
+    controller = PoseController()
+    overlay = OverlayRenderer(DISPLAY_SIZE)
+
+    def step(timer, frame):
+        command, _, _ = timer.time("PoseController.process_frame", controller.process_frame, frame)
+
+        def draw():
+            # Includes the resize to the display size
+            overlay.begin(frame)
+            draw_pose_landmarks(overlay, controller.landmarks)
+            overlay.text(f'Command: {command}', (10, 70))
+            return overlay.frame
+        return timer.time("overlay", draw)
+    return step
+
+
+def build_yolo():
+    from ultralytics import YOLO
+    sys.path.append(os.path.join(REPO_ROOT, "Tello_YOLO"))
+    from yolo_worker import detections_from_result, draw_detections
+
+    model = YOLO(os.path.join(REPO_ROOT, "Tello_YOLO", "yolov8n.pt"))
+    overlay = OverlayRenderer(DISPLAY_SIZE)
+
+    def step(timer, frame):
+        results = timer.time("YOLO.track", model.track, frame, persist=True, show=False, verbose=False)
+
+        def draw():
+            # Includes the resize to the display size
+            overlay.begin(frame)
+            draw_detections(overlay, detections_from_result(results[0], 0, time.time(), 0.0), model.names)
+            return overlay.frame
+        return timer.time("overlay", draw)
+    return step
+
+
+BUILDERS = {
+    "aruco": build_aruco,
+    "aruco_tracked": build_aruco_tracked,
+    "qrcode": build_qrcode,
+    "qrcode_cached": build_qrcode_cached,
+    "gesture": build_gesture,
+    "gesture_tasks": lambda: build_gesture("tasks"),
+    "pose": build_pose,
+    "yolo": build_yolo,
+}
+
+
+def run_pipeline(step, frames, warmup=10, display=False):
+    """
+    Runs ``step`` on every frame (after ``warmup`` untimed frames), passing frames
+    through a FrameBus like the apps do, and returns the per-stage summary.
+    """
+    frame_bus = FrameBus()
+    for frame in frames[:warmup]:
+        step(StageTimer(), frame)
+
+    timer = StageTimer()
+    display_frame = None
+    start = time.perf_counter()
+    for frame in frames:
+        def acquire():
+            frame_bus.publish(frame)
+            return frame_bus.latest()
+        packet = timer.time("acquire", acquire)
+
+        annotated = step(timer, packet.frame)
+        if annotated.shape[1::-1] != DISPLAY_SIZE:
+            # Pipelines drawing through an OverlayRenderer already resized in their overlay stage
+            display_frame = timer.time("resize", cv2.resize, annotated, DISPLAY_SIZE, dst=display_frame)
+        else:
+            display_frame = annotated
+        if display:
+            timer.time("imshow", show, display_frame)
+    return timer.summary(time.perf_counter() - start, len(frames))
+
+
+def show(frame):
+    cv2.imshow("Benchmark", frame)
+    cv2.waitKey(1)
+
+
+def display_available():
+    try:
+        cv2.namedWindow("Benchmark")
+        return True
+    except cv2.error:
+        return False
+
+
+# --- Baselines ---
+
+def compare_to_baseline(results, baseline, tolerance=0.2, floor_ms=0.5):
+    """
+    Compares p95 latencies with a stored baseline. A stage regresses when it got slower
+    by more than ``tolerance`` (relative) and more than ``floor_ms`` (absolute, to ignore
+    noise on sub-millisecond stages). Returns a list of regression messages.
+    """
+    regressions = []
+    for name, result in results["results"].items():
+        base = baseline.get("results", {}).get(name)
+        if base is None:
+            continue
+        for stage, stats in result["stages"].items():
+            base_stats = base["stages"].get(stage)
+            if base_stats is None:
+                continue
+            before, after = base_stats["p95_ms"], stats["p95_ms"]
+            if after > before * (1.0 + tolerance) and after - before > floor_ms:
+                regressions.append(f"{name} {stage}: p95 {before:.2f} ms -> {after:.2f} ms "
+                                   f"(+{(after / before - 1.0) * 100:.0f}%)")
+    return regressions
+
+
+def print_results(results):
+    for name, result in results["results"].items():
+        print(f"\n{name}: {result['fps']:.1f} FPS sustained over {result['frames']} frames")
+        print(f"  {'stage':34s} {'p50 ms':>8s} {'p95 ms':>8s} {'p99 ms':>8s} {'FPS':>8s}")
+        for stage, stats in result["stages"].items():
+            print(f"  {stage:34s} {stats['p50_ms']:8.2f} {stats['p95_ms']:8.2f} {stats['p99_ms']:8.2f} "
+                  f"{stats['fps'] or 0:8.1f}")
+
+
+def run_benchmarks(pipelines, resolutions, video=None, frames=120, warmup=10, display=False):
+    results = {
+        "meta": {
+            "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "machine": platform.machine(),
+            "processor": platform.processor(),
+            "python": platform.python_version(),
+            "opencv": cv2.__version__,
+            "video": video,
+        },
+        "results": OrderedDict(),
+    }
+    for resolution in resolutions:
+        width, height = (int(v) for v in resolution.split("x"))
+        if video is None:
+            input_frames = synthetic_frames(width, height, frames)
+        else:
+            input_frames = video_frames(video, width, height, frames)
+
+        for pipeline in pipelines:
+            try:
+                step = BUILDERS[pipeline]()
+            except (ImportError, FileNotFoundError) as e:
+                print(f"Skipping {pipeline}: {e}")
+                continue
+            print(f"Running {pipeline} at {resolution}...")
+            results["results"][f"{pipeline}@{resolution}"] = run_pipeline(step, input_frames, warmup, display)
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Per-stage latency benchmark for the Tello vision pipelines.")
+    parser.add_argument("--pipelines", nargs="+", default=PIPELINES, choices=PIPELINES)
+    parser.add_argument("--resolutions", nargs="+", default=DEFAULT_RESOLUTIONS, help="e.g. 960x720")
+    parser.add_argument("--video", help="Recorded video to use instead of synthetic frames")
+    parser.add_argument("--frames", type=int, default=120, help="Timed frames per pipeline and resolution")
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--display", action="store_true", help="Also time imshow (needs a display)")
+    parser.add_argument("--output", default="benchmark_results.json", help="Where to write the JSON results")
+    parser.add_argument("--baseline", help="Baseline JSON to compare against; exits with 1 on a regression")
+    parser.add_argument("--save-baseline", action="store_true", help="Write the results to --baseline instead")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed relative p95 slowdown")
+    args = parser.parse_args()
+
+    display = args.display and display_available()
+    if args.display and not display:
+        print("No display available, not timing imshow.")
+
+    results = run_benchmarks(args.pipelines, args.resolutions, args.video, args.frames, args.warmup, display)
+    print_results(results)
+
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"\nResults written to {args.output}")
+
+    if args.baseline and args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+    elif args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare_to_baseline(results, baseline, args.tolerance)
+        if regressions:
+            print("\nPERFORMANCE REGRESSIONS:")
+            for message in regressions:
+                print("  " + message)
+            sys.exit(1)
+        print("No regressions against the baseline.")
@@ -0,0 +1,187 @@
+# calibration.py
+import argparse
+import glob
+import hashlib
+import json
+import os
+
+import cv2
+import numpy as np
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CALIBRATION_DIR = os.path.join(REPO_ROOT, "calibration")
+CALIBRATION_FILE = os.path.join(CALIBRATION_DIR, "tello_camera.json")
+
+# ChArUco board used for calibration. It uses a different dictionary than the
+# command markers (DICT_4X4_50, IDs 0-4) so the board can never trigger a flip.
+BOARD_SQUARES = (5, 7)  # Squares across, squares down (fits a letter page)
+BOARD_SQUARE_LENGTH = 0.035  # meters, as printed by generate_charuco_board_page.py
+BOARD_MARKER_LENGTH = 0.026  # meters
+BOARD_DICTIONARY = cv2.aruco.DICT_5X5_50
+
+
+def make_charuco_board(square_length=BOARD_SQUARE_LENGTH, marker_length=BOARD_MARKER_LENGTH):
+    """Creates the ChArUco board object shared by the board generator and the calibration."""
+    dictionary = cv2.aruco.getPredefinedDictionary(BOARD_DICTIONARY)
+    return cv2.aruco.CharucoBoard(BOARD_SQUARES, square_length, marker_length, dictionary)
+
+
+def calibrate(images, board=None, min_corners=8):
+    """
+    Estimates camera intrinsics from views of the ChArUco board.
+
+    Args:
+        images (iterable): BGR or grayscale images of the board from different angles.
+        board: The ChArUco board (defaults to make_charuco_board()).
+        min_corners (int): Views with fewer detected chessboard corners are skipped.
+
+    Returns:
+        dict: camera_matrix, dist_coeffs, resolution, rms error and number of views used.
+    """
+    board = board or make_charuco_board()
+    detector = cv2.aruco.CharucoDetector(board)
+
+    object_points, image_points = [], []
+    image_size = None
+    for image in images:
+        gray = image if image.ndim == 2 else cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        image_size = (gray.shape[1], gray.shape[0])
+        charuco_corners, charuco_ids, _, _ = detector.detectBoard(gray)
+        if charuco_ids is None or len(charuco_ids) < min_corners:
+            continue
+        view_object_points, view_image_points = board.matchImagePoints(charuco_corners, charuco_ids)
+        object_points.append(view_object_points)
+        image_points.append(view_image_points)
+
+    if len(object_points) < 3:
+        raise ValueError(f"Only {len(object_points)} usable board views found, need at least 3")
+
+    rms, camera_matrix, dist_coeffs, _, _ = cv2.calibrateCamera(object_points, image_points, image_size, None, None)
+    return {
+        "camera_matrix": camera_matrix.tolist(),
+        "dist_coeffs": dist_coeffs.ravel().tolist(),
+        "resolution": list(image_size),
+        "rms": rms,
+        "views": len(object_points),
+    }
+
+
+def save_calibration(calibration, path=CALIBRATION_FILE):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(calibration, f, indent=2)
+
+
+def load_calibration(path=CALIBRATION_FILE):
+    """Returns the saved calibration, or None if the camera has not been calibrated yet."""
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def scaled_camera_matrix(calibration, resolution):
+    """Camera matrix of the calibration rescaled to another stream resolution (width, height)."""
+    camera_matrix = np.array(calibration["camera_matrix"], dtype=np.float64)
+    scale_x = resolution[0] / calibration["resolution"][0]
+    scale_y = resolution[1] / calibration["resolution"][1]
+    camera_matrix[0] *= scale_x
+    camera_matrix[1] *= scale_y
+    return camera_matrix
+
+
+class Undistorter:
+    """
+    Removes lens distortion with precomputed remap tables.
+
+    ``initUndistortRectifyMap`` is run once per resolution and its fixed-point tables
+    are cached on disk (keyed by resolution and calibration), so every frame only
+    costs one ``cv2.remap`` into a preallocated output buffer. The buffer is reused:
+    copy the result if you need to keep it past the next call.
+    """
+
+    def __init__(self, calibration, resolution=(960, 720), alpha=0.0, cache_dir=CALIBRATION_DIR):
+        self.calibration = calibration
+        self.alpha = alpha  # 0 = crop to valid pixels only, 1 = keep every source pixel
+        self.cache_dir = cache_dir
+        self.dist_coeffs = np.array(calibration["dist_coeffs"], dtype=np.float64)
+        self._maps = {}
+        self._buffer = None
+        self.camera_matrix = None  # Camera matrix of the undistorted image at ``resolution``
+        self.prepare(resolution)
+
+    def prepare(self, resolution):
+        """Loads or builds the remap tables for a resolution (width, height)."""
+        resolution = tuple(resolution)
+        if resolution in self._maps:
+            return self._maps[resolution]
+
+        camera_matrix = scaled_camera_matrix(self.calibration, resolution)
+        new_camera_matrix, _ = cv2.getOptimalNewCameraMatrix(camera_matrix, self.dist_coeffs, resolution, self.alpha)
+        path = self._cache_path(resolution, camera_matrix)
+        if os.path.exists(path):
+            cached = np.load(path)
+            map1, map2 = cached["map1"], cached["map2"]
+        else:
+            map1, map2 = cv2.initUndistortRectifyMap(camera_matrix, self.dist_coeffs, None, new_camera_matrix,
+                                                     resolution, cv2.CV_16SC2)
+            os.makedirs(self.cache_dir, exist_ok=True)
+            np.savez(path, map1=map1, map2=map2)
+
+        self._maps[resolution] = (map1, map2, new_camera_matrix)
+        if self.camera_matrix is None:
+            self.camera_matrix = new_camera_matrix
+        return self._maps[resolution]
+
+    def undistort(self, frame):
+        """Returns the undistorted frame, written into the reusable output buffer."""
+        height, width = frame.shape[:2]
+        map1, map2, self.camera_matrix = self.prepare((width, height))
+        if self._buffer is None or self._buffer.shape != frame.shape or self._buffer.dtype != frame.dtype:
+            self._buffer = np.empty_like(frame)
+        return cv2.remap(frame, map1, map2, cv2.INTER_LINEAR, dst=self._buffer)
+
+    def _cache_path(self, resolution, camera_matrix):
+        # Key on the calibration too, so recalibrating never picks up stale tables
+        key = hashlib.sha1(camera_matrix.tobytes() + self.dist_coeffs.tobytes()
+                           + np.float64(self.alpha).tobytes()).hexdigest()[:10]
+        return os.path.join(self.cache_dir, f"undistort_{resolution[0]}x{resolution[1]}_{key}.npz")
+
+
+def read_images(image_glob=None, video=None, every=10):
+    """Calibration views from image files or from every n-th frame of a video."""
+    if image_glob:
+        for path in sorted(glob.glob(image_glob)):
+            image = cv2.imread(path)
+            if image is not None:
+                yield image
+        return
+    capture = cv2.VideoCapture(video)
+    index = 0
+    while True:
+        ok, frame = capture.read()
+        if not ok:
+            break
+        if index % every == 0:
+            yield frame
+        index += 1
+    capture.release()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Calibrate the Tello camera from views of the ChArUco board.")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--images", help="Glob of board images, e.g. 'views/*.png'")
+    source.add_argument("--video", help="Video (or raw .h264 recording) of the board")
+    parser.add_argument("--every", type=int, default=10, help="Use every n-th video frame")
+    parser.add_argument("--square-length", type=float, default=BOARD_SQUARE_LENGTH,
+                        help="Measured square size of the printed board in meters")
+    parser.add_argument("--marker-length", type=float, default=BOARD_MARKER_LENGTH)
+    parser.add_argument("--output", default=CALIBRATION_FILE)
+    args = parser.parse_args()
+
+    board = make_charuco_board(args.square_length, args.marker_length)
+    result = calibrate(read_images(args.images, args.video, args.every), board)
+    save_calibration(result, args.output)
+    print(f"Calibrated from {result['views']} views, RMS reprojection error {result['rms']:.3f} px")
+    print(f"Saved to {args.output}")
@@ -0,0 +1,233 @@
+# command_scheduler.py
+import heapq
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+# Lower runs first; commands with the same priority run in submission order
+PRIORITIES = {"emergency": 0, "land": 0, "takeoff": 1}
+DEFAULT_PRIORITY = 5
+
+# These clear everything still queued and run next (the command already running is finished first)
+PREEMPTING_COMMANDS = {"emergency", "land"}
+
+# Seconds an identical command is ignored after it was accepted or finished. The camera usually
+# keeps seeing the code/marker/gesture that triggered a command while it runs.
+DEDUP_WINDOWS = {
+    "flip_forward": 2.0,
+    "flip_back": 2.0,
+    "flip_left": 2.0,
+    "flip_right": 2.0,
+}
+DEFAULT_DEDUP_WINDOW = 1.0
+
+# Commands with a single distance/angle argument that can be merged into one larger command,
+# with the largest value the Tello accepts
+COALESCE_LIMITS = {
+    "rotate_clockwise": 360,
+    "rotate_counter_clockwise": 360,
+    "move_forward": 500,
+    "move_back": 500,
+    "move_left": 500,
+    "move_right": 500,
+    "move_up": 500,
+    "move_down": 500,
+}
+
+
+class ScheduledCommand:
+    """A queued call of a Tello method, completed through ``future``."""
+
+    def __init__(self, name, args, priority, seq, accepted):
+        self.name = name
+        self.args = args
+        self.priority = priority
+        self.seq = seq
+        self.future = Future()
+        self.accepted = {(name, args): accepted}  # Every submission merged into this command
+
+    def __lt__(self, other):
+        return (self.priority, self.seq) < (other.priority, other.seq)
+
+    def __repr__(self):
+        return f"{self.name}({', '.join(map(str, self.args))})"
+
+
+class CommandScheduler:
+    """
+    Runs Tello commands on a worker thread so vision loops never block on the drone.
+
+    ``submit`` returns immediately with a ``concurrent.futures.Future`` that completes with
+    the command's result. Commands wait in a bounded priority queue (``max_queue``); when it
+    is full the least urgent command is dropped (its future is cancelled) or the new one is
+    rejected with ``queue.Full``. On the way in:
+
+    * an identical command (same method and arguments) is not queued again while it is
+      running, while it is queued and was last submitted less than its dedup window ago,
+      or within the window after it finished; the caller gets the existing future,
+    * rotations and moves are merged with a queued command of the same kind into one
+      larger command (up to the Tello's limits),
+    * ``land`` and ``emergency`` cancel everything queued and run next,
+    * once a ``land`` is accepted, every other command except ``emergency`` is rejected
+      (its future fails with ``RuntimeError``) until a ``takeoff`` is submitted, so a
+      command submitted while the drone is landing never runs after it.
+
+    A command that is already running can't be interrupted, because djitellopy waits for
+    the drone's response.
+    """
+
+    def __init__(self, tello, max_queue=8, dedup_windows=None):
+        self.tello = tello
+        self.max_queue = max_queue
+        self.dedup_windows = dict(DEDUP_WINDOWS, **(dedup_windows or {}))
+        self._queue = []  # Heap of ScheduledCommand
+        self._running = None
+        self._finished = {}  # (name, args) -> (finish time, future)
+        self._seq = 0
+        self._closed = False
+        self._landing = False  # A land was accepted and no takeoff since
+        self._condition = threading.Condition()
+
+        # Counters to see what the scheduler saved
+        self.submitted = 0
+        self.deduplicated = 0
+        self.coalesced = 0
+        self.dropped = 0
+        self.executed = 0
+
+        self._thread = threading.Thread(target=self._run, name="CommandScheduler", daemon=True)
+        self._thread.start()
+
+    def submit(self, name, *args, priority=None):
+        """
+        Schedules ``tello.<name>(*args)`` and returns a Future for its result.
+        Never blocks on the drone.
+        """
+        now = time.monotonic()
+        key = (name, args)
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("CommandScheduler is closed")
+            self.submitted += 1
+
+            if self._landing and name not in PREEMPTING_COMMANDS and name != "takeoff":
+                self.dropped += 1
+                future = Future()
+                future.set_exception(RuntimeError(f"Landing, {name}({', '.join(map(str, args))}) rejected"))
+                return future
+
+            duplicate = self._find_duplicate(key, now)
+            if duplicate is not None:
+                self.deduplicated += 1
+                return duplicate
+
+            if name == "land":
+                self._landing = True
+            elif name == "takeoff":
+                self._landing = False
+            if name in PREEMPTING_COMMANDS:
+                self._cancel_queued()
+            elif name in COALESCE_LIMITS:
+                merged = self._coalesce(name, args, now)
+                if merged is not None:
+                    self.coalesced += 1
+                    return merged
+
+            self._seq += 1
+            command = ScheduledCommand(name, args, PRIORITIES.get(name, DEFAULT_PRIORITY) if priority is None
+                                       else priority, self._seq, now)
+            if len(self._queue) >= self.max_queue:
+                least_urgent = max(self._queue)
+                self.dropped += 1
+                if not command < least_urgent:
+                    command.future.set_exception(queue.Full(f"Command queue full, {command!r} rejected"))
+                    return command.future
+                self._queue.remove(least_urgent)
+                heapq.heapify(self._queue)
+                least_urgent.future.cancel()
+
+            heapq.heappush(self._queue, command)
+            self._condition.notify_all()
+            return command.future
+
+    @property
+    def pending(self):
+        """Number of queued commands (not counting the one running)."""
+        with self._condition:
+            return len(self._queue)
+
+    @property
+    def idle(self):
+        with self._condition:
+            return not self._queue and self._running is None
+
+    def cancel_pending(self):
+        """Cancels every queued command. The running command is not affected."""
+        with self._condition:
+            self._cancel_queued()
+
+    def close(self, cancel_pending=False, timeout=None):
+        """Stops accepting commands and waits until the queued ones (or only the running one) are done."""
+        with self._condition:
+            self._closed = True
+            if cancel_pending:
+                self._cancel_queued()
+            self._condition.notify_all()
+        self._thread.join(timeout)
+
+    def _find_duplicate(self, key, now):
+        window = self.dedup_windows.get(key[0], DEFAULT_DEDUP_WINDOW)
+        if self._running is not None and key in self._running.accepted:
+            return self._running.future
+        for command in self._queue:
+            if key in command.accepted and now - command.accepted[key] < window:
+                # Still seeing the same trigger; only a repeat after a gap is merged
+                command.accepted[key] = now
+                return command.future
+        finished = self._finished.get(key)
+        if finished is not None and now - finished[0] < window:
+            return finished[1]
+        return None
+
+    def _coalesce(self, name, args, now):
+        if len(args) != 1:
+            return None
+        for command in self._queue:
+            if command.name == name and command.args[0] + args[0] <= COALESCE_LIMITS[name]:
+                command.args = (command.args[0] + args[0],)
+                command.accepted[(name, args)] = now
+                return command.future
+        return None
+
+    def _cancel_queued(self):
+        for command in self._queue:
+            command.future.cancel()
+        self._queue = []
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._queue and not self._closed:
+                    self._condition.wait()
+                if not self._queue:
+                    return
+                command = heapq.heappop(self._queue)
+                if not command.future.set_running_or_notify_cancel():
+                    continue
+                self._running = command
+
+            try:
+                result = getattr(self.tello, command.name)(*command.args)
+            except Exception as e:
+                command.future.set_exception(e)
+            else:
+                command.future.set_result(result)
+
+            with self._condition:
+                finished = time.monotonic()
+                for key in command.accepted:
+                    self._finished[key] = (finished, command.future)
+                self._running = None
+                self.executed += 1
+                self._condition.notify_all()
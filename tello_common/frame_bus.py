@@ -0,0 +1,131 @@
+# frame_bus.py
+import threading
+import time
+from collections import namedtuple
+
+import numpy as np
+
+from tello_common.frame_views import FrameViews
+
+# One published frame: its sequence number, capture time, a read-only view of the pixels and
+# the FrameViews with its gray/RGB/downscaled variants, computed once for all readers on request.
+FramePacket = namedtuple("FramePacket", ["seq", "timestamp", "frame", "views"])
+
+
+class FrameBus:
+    """
+    Shares the newest video frames between threads without copying them for every reader.
+
+    The writer copies each frame into one of a fixed ring of preallocated buffers and
+    stamps it with an increasing sequence number and a capture timestamp. Readers get
+    read-only views into the ring, so a view stays valid until the writer wraps around
+    to its slot again (``slots - 1`` frames later). Call ``is_valid(seq)`` to check, or
+    ``copy_frame`` when a frame has to live longer or be drawn on.
+
+    Every slot also has a FrameViews (``packet.views``), so detectors reading the same
+    frame share one grayscale, RGB or downscaled conversion of it.
+    """
+
+    def __init__(self, slots=4):
+        if slots < 2:
+            raise ValueError("FrameBus needs at least 2 slots")
+        self.slots = slots
+        self._ring = None
+        self._views = []
+        self._frame_views = [FrameViews() for _ in range(slots)]
+        self._slot_seqs = [0] * slots
+        self._slot_times = [0.0] * slots
+        self._seq = 0  # Sequence number of the newest frame (0 = nothing published yet)
+        self._closed = False
+        self._cond = threading.Condition()
+
+    @property
+    def last_seq(self):
+        """Sequence number of the newest published frame."""
+        return self._seq
+
+    @property
+    def closed(self):
+        return self._closed
+
+    def publish(self, frame, timestamp=None):
+        """
+        Copies a frame into the next ring slot and wakes up any waiting readers.
+        Returns the sequence number given to the frame.
+        """
+        if timestamp is None:
+            timestamp = time.time()
+
+        with self._cond:
+            if self._ring is None or self._ring.shape[1:] != frame.shape or self._ring.dtype != frame.dtype:
+                self._allocate(frame.shape, frame.dtype)
+            seq = self._seq + 1
+            slot = seq % self.slots
+            # Invalidate the slot before overwriting it so readers holding the old view can tell
+            self._slot_seqs[slot] = -1
+
+        # Copy outside the lock so readers are never blocked by the writer
+        np.copyto(self._ring[slot], frame)
+        # Drops conversions of the old frame (and any a reader made while the copy was running)
+        self._frame_views[slot].reset(self._views[slot], seq)
+
+        with self._cond:
+            self._slot_seqs[slot] = seq
+            self._slot_times[slot] = timestamp
+            self._seq = seq
+            self._cond.notify_all()
+        return seq
+
+    def latest(self):
+        """Returns the newest FramePacket, or None if nothing was published yet."""
+        with self._cond:
+            return self._packet(self._seq)
+
+    def wait_for_newer(self, seq, timeout=None):
+        """
+        Blocks until a frame newer than ``seq`` is available and returns it as a FramePacket.
+        Returns None on timeout or once the bus is closed.
+        """
+        with self._cond:
+            self._cond.wait_for(lambda: self._seq > seq or self._closed, timeout)
+            if self._seq <= seq:
+                return None
+            return self._packet(self._seq)
+
+    def is_valid(self, seq):
+        """True while the ring slot of frame ``seq`` has not been overwritten."""
+        return seq > 0 and self._slot_seqs[seq % self.slots] == seq
+
+    def close(self):
+        """Wakes up all waiting readers; wait_for_newer returns None from now on."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def _allocate(self, shape, dtype):
+        # Called with the lock held, on the first frame and whenever the stream resolution changes
+        self._ring = np.empty((self.slots,) + tuple(shape), dtype=dtype)
+        self._views = []
+        for slot in range(self.slots):
+            view = self._ring[slot].view()
+            view.flags.writeable = False
+            self._views.append(view)
+        self._slot_seqs = [0] * self.slots
+        self._slot_times = [0.0] * self.slots
+
+    def _packet(self, seq):
+        if seq == 0:
+            return None
+        slot = seq % self.slots
+        return FramePacket(seq, self._slot_times[slot], self._views[slot], self._frame_views[slot])
+
+
+def copy_frame(frame, out=None):
+    """
+    Copies a frame into ``out``, allocating it only when the shape or dtype changes.
+    Use it to get a private, writable frame for drawing overlays.
+    """
+    if out is None or out.shape != frame.shape or out.dtype != frame.dtype:
+        out = np.empty_like(frame)
+    np.copyto(out, frame)
+    return out
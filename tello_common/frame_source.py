@@ -0,0 +1,207 @@
+# frame_source.py
+import argparse
+import socket
+import threading
+import time
+
+import av
+
+# The Tello sends its H.264 stream to this UDP port (same default as djitellopy)
+TELLO_VIDEO_ADDRESS = "udp://@0.0.0.0:11111"
+# Largest UDP payload the Tello uses for one chunk of the video stream
+VIDEO_CHUNK_SIZE = 1460
+
+
+class H264FrameSource:
+    """
+    Decodes the Tello's H.264 UDP stream and publishes every frame to a FrameBus
+    the moment it finishes decoding.
+
+    There is no polling and no frame queue: the decode loop blocks on the socket,
+    and the FrameBus ring always holds only the newest frames, so a slow consumer
+    simply skips the frames it missed instead of falling further behind. Each
+    published frame is stamped with the time it finished decoding.
+    """
+
+    def __init__(self, frame_bus, address=TELLO_VIDEO_ADDRESS, pixel_format="rgb24",
+                 open_timeout=5.0, read_timeout=1.0):
+        self.frame_bus = frame_bus
+        self.address = address
+        # djitellopy hands out RGB frames, keep that as default so the apps behave the same
+        self.pixel_format = pixel_format
+        self.open_timeout = open_timeout
+        self.read_timeout = read_timeout
+        self.frames_decoded = 0
+        self.last_decode_time = None  # Wall-clock time the newest frame finished decoding
+        self._stopped = False
+        self._thread = None
+
+    def start(self):
+        """Runs the decode loop on a background daemon thread."""
+        self._thread = threading.Thread(target=self.run, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stopped = True
+
+    def join(self, timeout=None):
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def run(self, keep_running=None):
+        """
+        Decodes and publishes frames until stop() is called or ``keep_running()`` returns False.
+        The stream is reopened if it stalls for longer than ``read_timeout`` seconds.
+        """
+        def running():
+            return not self._stopped and (keep_running is None or keep_running())
+
+        while running():
+            try:
+                container = av.open(
+                    self.address,
+                    format="h264",
+                    timeout=(self.open_timeout, self.read_timeout),
+                    # Hand frames out as soon as they are decoded instead of buffering them,
+                    # and don't spend seconds probing a stream whose format we already know
+                    options={"fflags": "nobuffer", "flags": "low_delay",
+                             "probesize": "2048", "analyzeduration": "0"},
+                )
+            except av.error.FFmpegError as e:
+                print(f"Video stream not available yet ({e}), retrying...")
+                time.sleep(0.1)
+                continue
+
+            try:
+                for frame in container.decode(video=0):
+                    image = frame.to_ndarray(format=self.pixel_format)
+                    decode_time = time.time()
+                    self.frame_bus.publish(image, timestamp=decode_time)
+                    self.frames_decoded += 1
+                    self.last_decode_time = decode_time
+                    if not running():
+                        break
+            except av.error.FFmpegError as e:
+                # Typically a read timeout while the drone is not streaming; reopen and keep going
+                if running():
+                    print(f"Video stream interrupted ({e}), reopening...")
+            finally:
+                container.close()
+
+
+# --- Recording and replaying raw streams (for testing without a drone) ---
+
+def split_access_units(data):
+    """
+    Splits an Annex-B H.264 byte stream into access units (one encoded frame each,
+    with any SPS/PPS/SEI units that precede it).
+    """
+    # Find every NAL unit start code (00 00 01, possibly preceded by another 00)
+    starts = []
+    i = data.find(b"\x00\x00\x01")
+    while i != -1:
+        start = i - 1 if i > 0 and data[i - 1] == 0 else i
+        starts.append((start, i + 3))
+        i = data.find(b"\x00\x00\x01", i + 3)
+
+    units = []
+    current_start = None
+    has_slice = False
+    for start, payload in starts:
+        if payload >= len(data):
+            break
+        nal_type = data[payload] & 0x1F
+        # A new frame begins at a parameter set/AUD/SEI after a slice, or at a slice whose
+        # first_mb_in_slice is 0 (the first bit after the NAL header is set)
+        is_slice = nal_type in (1, 5)
+        first_slice = is_slice and payload + 1 < len(data) and data[payload + 1] & 0x80
+        starts_new_unit = has_slice and (nal_type in (6, 7, 8, 9) or first_slice)
+        if current_start is None:
+            current_start = start
+        elif starts_new_unit:
+            units.append(data[current_start:start])
+            current_start = start
+            has_slice = False
+        has_slice = has_slice or is_slice
+
+    if current_start is not None:
+        units.append(data[current_start:])
+    return units
+
+
+def send_access_unit(sock, address, unit):
+    """Sends one encoded frame in Tello-sized UDP chunks."""
+    for offset in range(0, len(unit), VIDEO_CHUNK_SIZE):
+        sock.sendto(unit[offset:offset + VIDEO_CHUNK_SIZE], address)
+
+
+def replay_h264(path, host="127.0.0.1", port=11111, fps=30, loop=False, keep_running=None):
+    """
+    Replays a recorded raw ``.h264`` file to a UDP port at a fixed frame rate,
+    the same way the Tello streams its camera.
+    """
+    with open(path, "rb") as f:
+        units = split_access_units(f.read())
+    if not units:
+        raise ValueError(f"No H.264 frames found in {path}")
+
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    frame_interval = 1.0 / fps
+    try:
+        while True:
+            next_time = time.perf_counter()
+            for unit in units:
+                if keep_running is not None and not keep_running():
+                    return
+                send_access_unit(sock, (host, port), unit)
+                next_time += frame_interval
+                time.sleep(max(0.0, next_time - time.perf_counter()))
+            if not loop:
+                return
+    finally:
+        sock.close()
+
+
+def record_h264(path, port=11111, duration=10.0):
+    """Saves the raw UDP video stream (e.g. from a real Tello after ``streamon``) to a ``.h264`` file."""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.bind(("", port))
+    sock.settimeout(1.0)
+    end_time = time.time() + duration
+    total = 0
+    try:
+        with open(path, "wb") as f:
+            while time.time() < end_time:
+                try:
+                    data, _ = sock.recvfrom(2048)
+                except socket.timeout:
+                    continue
+                f.write(data)
+                total += len(data)
+    finally:
+        sock.close()
+    print(f"Recorded {total} bytes to {path}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Record or replay a raw Tello H.264 video stream.")
+    subparsers = parser.add_subparsers(dest="mode", required=True)
+
+    replay_parser = subparsers.add_parser("replay", help="Send a .h264 file to a UDP port")
+    replay_parser.add_argument("path")
+    replay_parser.add_argument("--host", default="127.0.0.1")
+    replay_parser.add_argument("--port", type=int, default=11111)
+    replay_parser.add_argument("--fps", type=float, default=30)
+    replay_parser.add_argument("--loop", action="store_true")
+
+    record_parser = subparsers.add_parser("record", help="Save the UDP video stream to a .h264 file")
+    record_parser.add_argument("path")
+    record_parser.add_argument("--port", type=int, default=11111)
+    record_parser.add_argument("--duration", type=float, default=10.0)
+
+    args = parser.parse_args()
+    if args.mode == "replay":
+        replay_h264(args.path, args.host, args.port, args.fps, args.loop)
+    else:
+        record_h264(args.path, args.port, args.duration)
@@ -0,0 +1,98 @@
+# frame_views.py
+import threading
+
+import cv2
+
+# cvtColor codes from the BGR frame to the other color variants
+_CONVERSIONS = {
+    "gray": cv2.COLOR_BGR2GRAY,
+    "rgb": cv2.COLOR_BGR2RGB,
+}
+
+
+class FrameViews:
+    """
+    Lazily computed variants of one BGR frame, shared by every detector that works on it.
+
+    ``gray``, ``rgb`` and ``scaled(scale, color)`` (``INTER_AREA`` downscales, in "bgr",
+    "gray" or "rgb") are computed on first request and memoized for the current frame, so
+    ArUco, QR and gesture detection on the same frame convert it once between them.
+    ``pyramid(levels)`` returns the frame at scales 1, 1/2, 1/4, ...; every downscale is
+    made from the smallest already computed variant of the same color that is still
+    larger (or, if there is none, resized in BGR first and converted after, which is
+    cheaper than converting the full frame).
+
+    The variants are written into buffers that are reused from frame to frame and handed
+    out as read-only arrays. A FrameBus keeps one FrameViews per ring slot (``packet.views``),
+    so, like ``packet.frame``, they stay valid until the slot is reused ``slots - 1`` frames
+    later. Outside a FrameBus call ``reset(frame)`` for every new frame. Thread-safe:
+    concurrent requests for the same variant compute it once.
+    """
+
+    def __init__(self, frame=None, seq=0):
+        self.frame = None
+        self.seq = 0
+        self._buffers = {}  # (scale, color) -> buffer, reused across frames
+        self._ready = {}  # (scale, color) -> read-only view, for the current frame only
+        self._lock = threading.RLock()
+
+        # Counters
+        self.computed = 0
+        self.reused = 0
+
+        if frame is not None:
+            self.reset(frame, seq)
+
+    def reset(self, frame, seq=0):
+        """Switches to a new frame (BGR); everything computed for the previous frame is dropped."""
+        with self._lock:
+            self.frame = frame
+            self.seq = seq
+            self._ready.clear()
+
+    @property
+    def gray(self):
+        return self.scaled(1.0, "gray")
+
+    @property
+    def rgb(self):
+        return self.scaled(1.0, "rgb")
+
+    def scaled(self, scale, color="bgr"):
+        """The frame downscaled by ``scale`` (1.0 = full size) in ``color`` ("bgr", "gray" or "rgb")."""
+        key = (scale, color)
+        with self._lock:
+            view = self._ready.get(key)
+            if view is not None:
+                self.reused += 1
+                return view
+            if key == (1.0, "bgr"):
+                return self.frame
+
+            buffer = self._buffers.get(key)
+            source = self._closest_larger(scale, color)
+            if source is None:
+                buffer = cv2.cvtColor(self.scaled(scale, "bgr"), _CONVERSIONS[color], dst=buffer)
+            else:
+                height, width = self.frame.shape[:2]
+                size = (max(int(round(width * scale)), 1), max(int(round(height * scale)), 1))
+                buffer = cv2.resize(source, size, dst=buffer, interpolation=cv2.INTER_AREA)
+            self._buffers[key] = buffer
+
+            view = buffer.view()
+            view.flags.writeable = False
+            self._ready[key] = view
+            self.computed += 1
+            return view
+
+    def pyramid(self, levels, color="gray"):
+        """The frame at scales 1, 1/2, ... 1/2**(levels - 1) in ``color``."""
+        return [self.scaled(0.5 ** level, color) for level in range(levels)]
+
+    def _closest_larger(self, scale, color):
+        # Smallest variant of this frame in ``color`` that is larger than ``scale`` (None if there is none)
+        best_scale, best = 2.0, self.frame if color == "bgr" else None
+        for (ready_scale, ready_color), view in self._ready.items():
+            if ready_color == color and scale < ready_scale < best_scale:
+                best_scale, best = ready_scale, view
+        return best
@@ -0,0 +1,156 @@
+# inference_worker.py
+import multiprocessing as mp
+import time
+from collections import namedtuple
+from multiprocessing import shared_memory
+from multiprocessing.connection import wait
+
+import numpy as np
+
+# A finished inference: the frame's sequence number and capture timestamp, whatever the
+# processor returned, how long inference took and how old the frame was when the result arrived
+InferenceResult = namedtuple("InferenceResult", ["seq", "timestamp", "value", "inference_time", "latency"])
+
+
+class InferenceWorkerPool:
+    """
+    Runs a frame processor (e.g. a MediaPipe model) in separate processes.
+
+    Frames are copied into slots of one ``multiprocessing.shared_memory`` block owned by
+    this process; only the slot index, sequence number, shape and timestamp go through the
+    pipe to the worker, so frames are never pickled. Workers send back whatever the
+    processor returns (keep it small: landmark arrays and names, not MediaPipe objects).
+
+    ``factory`` is called once in every worker to build the processor, a function taking
+    an RGB/BGR frame and returning the result. It must be a top-level function so it can be
+    sent to the worker processes. Every worker has ``slots_per_worker`` slots (one being
+    processed, one waiting); when all are busy ``submit`` drops the frame instead of
+    queueing it, so results never fall behind the video. ``configure(**settings)`` calls
+    the processor's ``configure`` attribute in every worker, e.g. to change model quality.
+
+    Workers are started with the "spawn" method: the apps create the pool after djitellopy,
+    the command scheduler and the rc loop have started their threads, and a forked worker
+    would inherit their locks in whatever state they happened to be. Spawned workers
+    import ``factory``'s module afresh (a second or two with MediaPipe, once at startup).
+    """
+
+    def __init__(self, factory, frame_shape=(720, 960, 3), workers=1, slots_per_worker=2, start_method="spawn"):
+        self.frame_shape = tuple(frame_shape)
+        self.slot_bytes = int(np.prod(self.frame_shape))
+        self.slots_per_worker = slots_per_worker
+        slot_count = workers * slots_per_worker
+        self.shm = shared_memory.SharedMemory(create=True, size=self.slot_bytes * slot_count)
+
+        self.connections = []
+        self.processes = []
+        self.free_slots = []  # Free slot indices of every worker
+        context = mp.get_context(start_method)
+        for index in range(workers):
+            parent_end, child_end = context.Pipe()
+            process = context.Process(target=_worker_main, args=(factory, self.shm.name, self.slot_bytes, child_end),
+                                 name=f"InferenceWorker-{index}", daemon=True)
+            process.start()
+            child_end.close()
+            self.connections.append(parent_end)
+            self.processes.append(process)
+            self.free_slots.append(list(range(index * slots_per_worker, (index + 1) * slots_per_worker)))
+
+        self._newest_seq = -1
+        self._seq = 0
+
+        # Counters
+        self.submitted = 0
+        self.dropped = 0
+        self.completed = 0
+
+    def submit(self, frame, seq=None, timestamp=None):
+        """Hands a frame to the least busy worker. Returns False if every slot was busy and the frame was dropped."""
+        if frame.nbytes > self.slot_bytes or frame.dtype != np.uint8:
+            raise ValueError(f"Frames must be uint8 and at most {self.frame_shape}, got {frame.dtype} {frame.shape}")
+        if seq is None:
+            self._seq += 1
+            seq = self._seq
+        if timestamp is None:
+            timestamp = time.time()
+
+        worker = max(range(len(self.free_slots)), key=lambda index: len(self.free_slots[index]))
+        if not self.free_slots[worker]:
+            self.dropped += 1
+            return False
+
+        slot = self.free_slots[worker].pop()
+        view = np.ndarray(frame.shape, dtype=np.uint8, buffer=self.shm.buf, offset=slot * self.slot_bytes)
+        view[...] = frame
+        self.connections[worker].send((slot, seq, frame.shape, timestamp))
+        self.submitted += 1
+        return True
+
+    def poll(self, timeout=0.0):
+        """
+        Returns the newest result that arrived (an InferenceResult), or None if there is none
+        within ``timeout`` seconds. Older results that arrived at the same time are skipped.
+        """
+        newest = None
+        ready = wait(self.connections, timeout)
+        while ready:
+            for connection in ready:
+                worker = self.connections.index(connection)
+                slot, seq, timestamp, value, inference_time = connection.recv()
+                self.free_slots[worker].append(slot)
+                self.completed += 1
+                # With several workers results can arrive out of order; never go back in time
+                if seq > self._newest_seq:
+                    self._newest_seq = seq
+                    newest = InferenceResult(seq, timestamp, value, inference_time, time.time() - timestamp)
+            ready = wait(self.connections, 0)
+        return newest
+
+    def configure(self, **settings):
+        """Sends settings to every worker; they apply them before their next frame."""
+        for connection in self.connections:
+            connection.send(settings)
+
+    @property
+    def busy(self):
+        """True while any worker still has frames to process."""
+        return any(len(slots) < self.slots_per_worker for slots in self.free_slots)
+
+    def close(self):
+        for connection in self.connections:
+            try:
+                connection.send(None)
+            except (BrokenPipeError, OSError):
+                pass
+        for process in self.processes:
+            process.join(timeout=2)
+            if process.is_alive():
+                process.terminate()
+        for connection in self.connections:
+            connection.close()
+        self.shm.close()
+        self.shm.unlink()
+
+
+def _worker_main(factory, shm_name, slot_bytes, connection):
+    shm = shared_memory.SharedMemory(name=shm_name)
+    process = factory()
+    try:
+        while True:
+            try:
+                message = connection.recv()
+            except EOFError:
+                break
+            if message is None:
+                break
+            if isinstance(message, dict):
+                process.configure(**message)
+                continue
+            slot, seq, shape, timestamp = message
+            frame = np.ndarray(shape, dtype=np.uint8, buffer=shm.buf, offset=slot * slot_bytes)
+            start = time.perf_counter()
+            value = process(frame)
+            inference_time = time.perf_counter() - start
+            del frame  # Release the view before the slot can be reused
+            connection.send((slot, seq, timestamp, value, inference_time))
+    finally:
+        shm.close()
@@ -0,0 +1,106 @@
+# landmark_roi.py
+import threading
+
+import cv2
+import numpy as np
+
+
+class LandmarkROI:
+    """
+    Crops frames to the region around the previous detection before they go to MediaPipe.
+
+    After a frame with landmarks, the next frame is cropped to a square around them
+    (padded by ``padding`` of the box size on each side), resized to the model's input
+    size ``input_size`` and only then converted to RGB, into buffers that are reused every
+    frame. ``remap`` turns landmarks found in the crop back into full-frame coordinates.
+    Without a detection (or every ``reacquire_interval`` frames, to find new hands or
+    people outside the crop) the full frame is used again, downscaled by ``full_scale``;
+    given the frame's FrameViews, that RGB image is taken from (and shared through) it.
+
+    ``update`` may run on another thread than ``prepare`` (the MediaPipe live-stream
+    callback does this); the crop state they share is guarded by a lock.
+    """
+
+    def __init__(self, input_size, padding=0.25, min_size=96, reacquire_interval=30):
+        self.input_size = input_size
+        self.padding = padding
+        self.min_size = min_size  # Smallest crop side in pixels, so a tiny hand still has context
+        self.reacquire_interval = reacquire_interval
+        self.box = None  # (x, y, size) of the next crop in pixels, None for the full frame
+        self.full_scale = 1.0
+
+        self._since_full = 0
+        self._resized = None
+        self._rgb = None
+        self._full_small = None
+        self._full_rgb = None
+        self._lock = threading.Lock()
+
+        # Counters
+        self.cropped = 0
+        self.full_frames = 0
+        self.lost = 0
+
+    def prepare(self, frame, views=None):
+        """Returns the RGB image to run the model on and the crop box it was taken from (None = full frame)."""
+        with self._lock:
+            box = self.box
+            if box is not None and self._since_full >= self.reacquire_interval:
+                box = None
+            if box is None:
+                self._since_full = 0
+                self.full_frames += 1
+            else:
+                self._since_full += 1
+                self.cropped += 1
+        if box is None:
+            if views is not None:
+                return views.scaled(self.full_scale, "rgb"), None
+            if self.full_scale != 1.0:
+                height, width = frame.shape[:2]
+                size = (int(width * self.full_scale), int(height * self.full_scale))
+                frame = self._full_small = cv2.resize(frame, size, dst=self._full_small, interpolation=cv2.INTER_AREA)
+            self._full_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB, dst=self._full_rgb)
+            return self._full_rgb, None
+
+        x, y, size = box
+        self._resized = cv2.resize(frame[y:y + size, x:x + size], (self.input_size, self.input_size),
+                                   dst=self._resized, interpolation=cv2.INTER_LINEAR)
+        self._rgb = cv2.cvtColor(self._resized, cv2.COLOR_BGR2RGB, dst=self._rgb)
+        return self._rgb, box
+
+    @staticmethod
+    def remap(landmarks, box, frame_shape):
+        """Converts normalized crop coordinates (x, y, z in the first three columns) to the full frame, in place."""
+        if box is None or len(landmarks) == 0:
+            return landmarks
+        height, width = frame_shape[:2]
+        x, y, size = box
+        landmarks[..., 0] = (x + landmarks[..., 0] * size) / width
+        landmarks[..., 1] = (y + landmarks[..., 1] * size) / height
+        landmarks[..., 2] *= size / width  # MediaPipe scales z like x
+        return landmarks
+
+    def update(self, landmarks, frame_shape):
+        """Sets the crop for the next frame from this frame's full-frame landmarks (people/hands x points x 2+)."""
+        if len(landmarks) == 0:
+            with self._lock:
+                if self.box is not None:
+                    self.lost += 1
+                self.box = None
+            return
+        height, width = frame_shape[:2]
+        points = np.clip(landmarks[..., :2].reshape(-1, 2), 0.0, 1.0) * (width, height)
+        (x0, y0), (x1, y1) = points.min(axis=0), points.max(axis=0)
+        size = max(x1 - x0, y1 - y0) * (1 + 2 * self.padding)
+        size = int(max(size, self.min_size))
+        if size >= min(width, height):
+            box = None  # The detection fills the frame; cropping would not help
+        else:
+            # Square around the center, shifted back inside the frame
+            x = int(np.clip((x0 + x1 - size) / 2, 0, width - size))
+            y = int(np.clip((y0 + y1 - size) / 2, 0, height - size))
+            box = (x, y, size)
+        with self._lock:
+            self.box = box
+
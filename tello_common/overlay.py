@@ -0,0 +1,154 @@
+# overlay.py
+import time
+from collections import OrderedDict
+
+import cv2
+import numpy as np
+
+# Set to False when nothing will ever be shown (tello_sim --headless does this); begin() then
+# skips every frame, so the apps spend no time on overlays
+DISPLAY_ENABLED = True
+
+
+class OverlayRenderer:
+    """
+    Draws the apps' overlays straight into a preallocated display buffer.
+
+    ``begin(frame)`` resizes (or copies) the frame into ``self.frame`` once per displayed
+    frame, with the buffer as the ``dst`` of ``cv2.resize``, which replaces the
+    copy_frame + draw + ``cv2.resize(frame, (960, 720))`` sequence the apps had. Boxes,
+    polylines, skeletons and text are then drawn at display resolution; their coordinates
+    are in pixels of the source frame (skeletons take normalized landmarks) and are scaled
+    here.
+
+    Text is rasterized once per (text, scale, color, thickness, background) and kept in an
+    LRU cache of ``max_sprites`` sprites: an opaque label (with ``background``) is a plain
+    copy, plain text a masked copy, both much cheaper than ``cv2.putText``. Sprites are drawn
+    with hard edges.
+
+    ``begin`` returns False for frames that will never be shown, so the caller skips the
+    drawing entirely: frames arriving less than 1 / ``max_fps`` seconds after the last shown
+    one (e.g. a burst after a decoder stall, on a screen that refreshes at ``max_fps``) and
+    every frame when ``DISPLAY_ENABLED`` is False.
+    """
+
+    def __init__(self, display_size=(960, 720), max_fps=None, interpolation=cv2.INTER_LINEAR, max_sprites=256):
+        self.display_size = display_size
+        self.max_fps = max_fps
+        self.interpolation = interpolation
+        self.max_sprites = max_sprites
+        width, height = display_size
+        self.frame = np.zeros((height, width, 3), dtype=np.uint8)  # The display buffer
+        self.scale = (1.0, 1.0)  # Display pixels per source pixel (x, y)
+
+        self._sprites = OrderedDict()
+        self._last_shown = None
+
+        # Counters
+        self.rendered = 0
+        self.skipped = 0
+        self.sprites_drawn = 0
+        self.sprites_rendered = 0
+
+    def begin(self, frame, now=None):
+        """Starts a display frame from ``frame`` (BGR). Returns False when it won't be shown; draw nothing then."""
+        if now is None:
+            now = time.monotonic()
+        if not DISPLAY_ENABLED or (self.max_fps and self._last_shown is not None
+                                   and now - self._last_shown < 1.0 / self.max_fps):
+            self.skipped += 1
+            return False
+        self._last_shown = now
+        self.rendered += 1
+
+        height, width = frame.shape[:2]
+        if (width, height) == self.display_size:
+            np.copyto(self.frame, frame)
+        else:
+            cv2.resize(frame, self.display_size, dst=self.frame, interpolation=self.interpolation)
+        self.scale = (self.display_size[0] / width, self.display_size[1] / height)
+        return True
+
+    def to_display(self, points):
+        """Source-frame pixel coordinates (... x 2) to int32 display coordinates."""
+        return np.int32(np.round(np.asarray(points, dtype=np.float32) * self.scale))
+
+    def box(self, box, color, thickness=2):
+        """Draws an xyxy box."""
+        # Plain floats: for a handful of numbers NumPy's per-call overhead is larger than the drawing
+        scale_x, scale_y = self.scale
+        x0, y0, x1, y1 = (float(value) for value in box)
+        cv2.rectangle(self.frame, (round(x0 * scale_x), round(y0 * scale_y)),
+                      (round(x1 * scale_x), round(y1 * scale_y)), color, thickness)
+
+    def polyline(self, points, color, closed=True, thickness=2):
+        """Draws one polygon (N x 2 points) or several (list of N x 2 arrays)."""
+        if isinstance(points, np.ndarray) and points.ndim == 2:
+            points = [points]
+        cv2.polylines(self.frame, [self.to_display(p) for p in points], closed, color, thickness)
+
+    def skeleton(self, landmarks, connections, color=(0, 255, 0), point_color=(0, 0, 255), thickness=2, radius=3):
+        """
+        Draws landmark arrays (people/hands x points x 2+, normalized coordinates) with their
+        ``connections`` (M x 2 array of point indices), all segments in one polylines call.
+        """
+        if len(landmarks) == 0:
+            return
+        height, width = self.frame.shape[:2]
+        points = np.int32(landmarks[:, :, :2] * (width, height))
+        cv2.polylines(self.frame, list(points[:, connections].reshape(-1, 2, 2)), False, color, thickness)
+        for x, y in points.reshape(-1, 2):
+            cv2.circle(self.frame, (int(x), int(y)), radius, point_color, -1)
+
+    def text(self, text, origin, scale=1.0, color=(255, 255, 255), thickness=2, background=None):
+        """Draws ``text`` with its baseline starting at ``origin`` (like cv2.putText), clipped to the display."""
+        sprite, mask, baseline = self._sprite(text, scale, color, thickness, background)
+        sprite_height, sprite_width = sprite.shape[:2]
+        top = round(float(origin[1]) * self.scale[1]) - sprite_height + baseline
+        left = round(float(origin[0]) * self.scale[0])
+
+        height, width = self.frame.shape[:2]
+        y0, x0 = max(top, 0), max(left, 0)
+        y1, x1 = min(top + sprite_height, height), min(left + sprite_width, width)
+        if y0 >= y1 or x0 >= x1:
+            return
+        region = self.frame[y0:y1, x0:x1]
+        part = (slice(y0 - top, y1 - top), slice(x0 - left, x1 - left))
+        if mask is None:
+            np.copyto(region, sprite[part])
+        else:
+            cv2.copyTo(sprite[part], mask[part], region)
+        self.sprites_drawn += 1
+
+    def show(self, window_name):
+        cv2.imshow(window_name, self.frame)
+
+    def _sprite(self, text, scale, color, thickness, background):
+        key = (text, scale, tuple(color), thickness, None if background is None else tuple(background))
+        sprite = self._sprites.get(key)
+        if sprite is not None:
+            self._sprites.move_to_end(key)
+            return sprite
+
+        (text_width, text_height), baseline = cv2.getTextSize(text, cv2.FONT_HERSHEY_SIMPLEX, scale, thickness)
+        baseline += thickness
+        size = (text_height + baseline + thickness, text_width + 2 * thickness)
+        origin = (thickness, text_height + thickness)
+        if background is None:
+            alpha = np.zeros(size, dtype=np.uint8)
+            cv2.putText(alpha, text, origin, cv2.FONT_HERSHEY_SIMPLEX, scale, 255, thickness, cv2.LINE_AA)
+            mask = np.uint8(alpha > 96)
+            image = np.empty(size + (3,), dtype=np.uint8)
+            image[:] = color
+        else:
+            mask = None
+            image = np.empty(size + (3,), dtype=np.uint8)
+            image[:] = background
+            cv2.putText(image, text, origin, cv2.FONT_HERSHEY_SIMPLEX, scale, color, thickness, cv2.LINE_AA)
+
+        sprite = (image, mask, baseline)
+        self._sprites[key] = sprite
+        self.sprites_rendered += 1
+        if len(self._sprites) > self.max_sprites:
+            self._sprites.popitem(last=False)
+        return sprite
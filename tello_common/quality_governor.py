@@ -0,0 +1,77 @@
+# quality_governor.py
+import time
+from collections import deque
+
+import numpy as np
+
+
+class QualityGovernor:
+    """
+    Keeps a model's per-frame inference latency within a budget by switching quality levels.
+
+    ``levels`` is a list of settings dicts, cheapest first (e.g. pose ``model_complexity``
+    or YOLO ``imgsz``). Feed the measured latency of every inference to ``record``; once
+    ``window`` measurements have been collected at the current level their 90th percentile
+    is compared with ``budget`` (seconds):
+
+    * above the budget: switch one level down,
+    * below ``upgrade_margin`` x budget: switch one level up, unless that level was too slow
+      within the last ``retry_interval`` seconds (doubled every time the same level fails
+      again, up to ``max_retry_interval``).
+
+    The gap between the two thresholds and the full window collected after every switch
+    keep the governor from flapping between two levels. ``record`` returns the new
+    settings when it switched (and calls ``on_switch`` with them), otherwise None. Every
+    switch is printed and kept in ``switches``.
+    """
+
+    def __init__(self, name, levels, budget, initial=None, window=30, upgrade_margin=0.7,
+                 retry_interval=10.0, max_retry_interval=160.0, on_switch=None):
+        self.name = name
+        self.levels = list(levels)
+        self.budget = budget
+        self.level = len(self.levels) - 1 if initial is None else initial
+        self.window = window
+        self.upgrade_margin = upgrade_margin
+        self.retry_interval = retry_interval
+        self.max_retry_interval = max_retry_interval
+        self.on_switch = on_switch
+
+        self._latencies = deque(maxlen=window)
+        self._blocked_until = [0.0] * len(self.levels)  # Levels recently found too slow
+        self._failures = [0] * len(self.levels)
+        self.switches = []  # (time, from level, to level, p90 latency)
+
+    @property
+    def settings(self):
+        return self.levels[self.level]
+
+    def record(self, latency, now=None):
+        """Adds one inference latency (seconds). Returns the new settings if the level changed."""
+        self._latencies.append(latency)
+        if len(self._latencies) < self.window:
+            return None
+        if now is None:
+            now = time.monotonic()
+
+        p90 = float(np.percentile(self._latencies, 90))
+        if p90 > self.budget and self.level > 0:
+            delay = min(self.retry_interval * 2 ** self._failures[self.level], self.max_retry_interval)
+            self._failures[self.level] += 1
+            self._blocked_until[self.level] = now + delay
+            return self._switch(self.level - 1, p90, now)
+        if (p90 < self.upgrade_margin * self.budget and self.level < len(self.levels) - 1
+                and now >= self._blocked_until[self.level + 1]):
+            self._failures[self.level] = 0  # This level held up fine
+            return self._switch(self.level + 1, p90, now)
+        return None
+
+    def _switch(self, level, p90, now):
+        print(f"[{self.name}] quality {self.level} -> {level} {self.levels[level]}: "
+              f"p90 {p90 * 1000:.0f} ms, budget {self.budget * 1000:.0f} ms")
+        self.switches.append((now, self.level, level, p90))
+        self.level = level
+        self._latencies.clear()
+        if self.on_switch is not None:
+            self.on_switch(**self.settings)
+        return self.settings
@@ -0,0 +1,123 @@
+# rc_control.py
+import math
+import threading
+import time
+
+import numpy as np
+
+RC_LIMIT = 100  # send_rc_control accepts -100..100 on every axis
+ZERO_VELOCITY = (0, 0, 0, 0)
+
+
+class RCController:
+    """
+    Streams velocity setpoints to the drone with ``send_rc_control`` from a fixed-rate loop.
+
+    Vision code calls ``set_velocity`` (left/right, forward/back, up/down, yaw) whenever it
+    has a fresh result. A background thread ticks at ``rate`` Hz and sends a smoothed and
+    rate-limited version of the newest setpoint:
+
+    * smoothing: first-order low-pass with time constant ``smoothing`` seconds,
+    * rate limiting: no axis changes faster than ``max_accel`` units per second,
+    * deadman: a setpoint older than ``deadman_timeout`` seconds is replaced by zero, so the
+      drone stops when the hand or person leaves the frame or the vision loop stalls.
+
+    Sending only happens while ``enabled`` (after takeoff); ``disable`` sends one final zero.
+    """
+
+    def __init__(self, tello, rate=30, deadman_timeout=0.5, smoothing=0.15, max_accel=250):
+        self.tello = tello
+        self.period = 1.0 / rate
+        self.deadman_timeout = deadman_timeout
+        self.smoothing = smoothing
+        self.max_step = max_accel * self.period  # Largest change per tick, per axis
+        self.alpha = 1.0 - math.exp(-self.period / smoothing) if smoothing > 0 else 1.0
+
+        self._target = np.zeros(4)
+        self._target_time = 0.0
+        self._output = np.zeros(4)
+        self._lock = threading.RLock()  # Also held while sending, so disable() always sends the last rc
+        self._enabled = False
+        self._running = False
+        self._thread = None
+
+        # Counters
+        self.sent = 0
+        self.deadman_trips = 0
+
+    @property
+    def enabled(self):
+        return self._enabled
+
+    @property
+    def velocity(self):
+        """The velocity that was last sent."""
+        return tuple(int(round(v)) for v in self._output)
+
+    def set_velocity(self, left_right, forward_backward, up_down, yaw):
+        """Sets the target velocity (-100..100 per axis). Never blocks on the drone."""
+        with self._lock:
+            self._target[:] = np.clip((left_right, forward_backward, up_down, yaw), -RC_LIMIT, RC_LIMIT)
+            self._target_time = time.monotonic()
+
+    def hover(self):
+        self.set_velocity(*ZERO_VELOCITY)
+
+    def enable(self):
+        """Starts sending setpoints (call once the drone is flying)."""
+        with self._lock:
+            self._output[:] = 0
+            self._target[:] = 0
+            self._enabled = True
+
+    def disable(self):
+        """Stops sending setpoints and leaves the drone hovering."""
+        with self._lock:
+            if self._enabled:
+                self.tello.send_rc_control(*ZERO_VELOCITY)
+            self._enabled = False
+            self._output[:] = 0
+
+    def start(self):
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="RCController", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._running = False
+        if self._thread is not None:
+            self._thread.join()
+        self.disable()
+
+    def step(self, now=None):
+        """Advances the filter by one tick and returns the velocity to send."""
+        if now is None:
+            now = time.monotonic()
+        with self._lock:
+            if now - self._target_time > self.deadman_timeout and self._target.any():
+                self.deadman_trips += 1
+                self._target[:] = 0
+
+            error = self._target - self._output
+            # Let the filter settle exactly instead of creeping towards the target forever
+            change = np.where(np.abs(error) < 1.0, error, self.alpha * error)
+            self._output += np.clip(change, -self.max_step, self.max_step)
+            return self.velocity
+
+    def _run(self):
+        # Ticks are scheduled on absolute times so the rate does not drift with send time
+        next_tick = time.monotonic()
+        while self._running:
+            now = time.monotonic()
+            if now < next_tick:
+                time.sleep(next_tick - now)
+                continue
+            next_tick += self.period
+            if next_tick < now:
+                next_tick = now + self.period  # We fell behind (e.g. suspended); don't burst
+
+            with self._lock:
+                if self._enabled:
+                    self.tello.send_rc_control(*self.step(now))
+                    self.sent += 1
@@ -0,0 +1,386 @@
+# tello_sim.py
+import argparse
+import glob
+import os
+import runpy
+import socket
+import sys
+import threading
+import time
+from fractions import Fraction
+
+import av
+import cv2
+import numpy as np
+
+from tello_common import overlay
+from tello_common.frame_source import send_access_unit, split_access_units
+
+SIM_HOST = "127.0.0.1"
+# djitellopy binds the real command port (8889) on every interface, so the simulator
+# listens on its own port and the launcher points djitellopy at it.
+SIM_COMMAND_PORT = 8899
+# Ports on the client side, same as on a real Tello
+CLIENT_STATE_PORT = 8890
+CLIENT_VIDEO_PORT = 11111
+
+# Seconds before the simulator answers each kind of command. Values are fixed
+# (no jitter) so load tests are repeatable; use time_scale to speed them all up.
+DEFAULT_LATENCIES = {
+    "command": 0.01,
+    "takeoff": 3.0,
+    "land": 2.5,
+    "move": 1.0,    # up, down, left, right, forward, back, go, curve
+    "rotate": 1.0,  # cw, ccw
+    "flip": 1.5,
+    "default": 0.01,
+}
+
+MOVE_COMMANDS = ("up", "down", "left", "right", "forward", "back", "go", "curve")
+ROTATE_COMMANDS = ("cw", "ccw")
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp")
+
+
+class TelloSimulator:
+    """
+    Stand-in for a Tello drone on the local machine.
+
+    Answers the Tello SDK text protocol on a UDP command port with configurable,
+    deterministic latencies, sends state packets at 10 Hz and, after ``streamon``,
+    streams a video file, an image folder or a synthetic test pattern as H.264
+    to the client's video port.
+    """
+
+    def __init__(self, host=SIM_HOST, command_port=SIM_COMMAND_PORT, video=None, fps=30,
+                 resolution=(960, 720), latencies=None, time_scale=1.0, max_frames=300):
+        self.host = host
+        self.command_port = command_port
+        self.video = video
+        self.fps = fps
+        self.resolution = resolution
+        self.latencies = dict(DEFAULT_LATENCIES)
+        self.latencies.update(latencies or {})
+        self.time_scale = time_scale
+        self.max_frames = max_frames
+
+        self.command_socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.command_socket.bind((host, command_port))
+        self.command_socket.settimeout(0.5)
+
+        self.client_ip = None
+        self.is_running = False
+        self.streaming = False
+        self.commands_handled = 0
+
+        # Simulated drone state
+        self.flying = False
+        self.height = 0
+        self.yaw = 0
+        self.battery = 100
+        self.start_time = time.time()
+
+        self._encoded_units = None
+        self._threads = []
+
+    def start(self):
+        """Starts the command, state and video threads in the background."""
+        self.is_running = True
+        for target in (self._command_loop, self._state_loop, self._video_loop):
+            thread = threading.Thread(target=target, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        print(f"Tello simulator listening on {self.host}:{self.command_port}")
+        return self
+
+    def stop(self):
+        self.is_running = False
+        for thread in self._threads:
+            thread.join(timeout=2)
+        self.command_socket.close()
+
+    # --- Command port ---
+
+    def latency_for(self, command):
+        name = command.split(" ")[0]
+        if name in MOVE_COMMANDS:
+            key = "move"
+        elif name in ROTATE_COMMANDS:
+            key = "rotate"
+        else:
+            key = name
+        return self.latencies.get(key, self.latencies["default"]) * self.time_scale
+
+    def handle_command(self, command):
+        """Applies a command to the simulated state and returns the reply (None for rc)."""
+        parts = command.split(" ")
+        name = parts[0]
+
+        if name == "rc":
+            return None  # The real drone doesn't answer rc commands either
+        if name.endswith("?"):
+            return self._read_command(name)
+        if name in ("command", "streamon", "streamoff", "keepalive", "motoron", "motoroff",
+                    "speed", "emergency") or name.startswith("set") or name == "port":
+            if name == "streamon":
+                self.streaming = True
+            elif name == "streamoff":
+                self.streaming = False
+            elif name == "emergency":
+                self.flying = False
+                self.height = 0
+            return "ok"
+        if name in ("takeoff", "throwfly"):
+            self.flying = True
+            self.height = 80
+            return "ok"
+        if name == "land":
+            self.flying = False
+            self.height = 0
+            return "ok"
+
+        if not self.flying:
+            return "error Not flying"
+        if name in MOVE_COMMANDS or name in ROTATE_COMMANDS:
+            try:
+                amount = int(parts[1])
+            except (IndexError, ValueError):
+                return "error"
+            if name == "up":
+                self.height += amount
+            elif name == "down":
+                self.height = max(20, self.height - amount)
+            elif name == "cw":
+                self.yaw = (self.yaw + amount + 180) % 360 - 180
+            elif name == "ccw":
+                self.yaw = (self.yaw - amount + 180) % 360 - 180
+            return "ok"
+        if name == "flip":
+            return "ok"
+        return "unknown command: " + command
+
+    def _read_command(self, name):
+        values = {
+            "battery?": self.battery,
+            "height?": f"{self.height}dm",
+            "time?": f"{int(time.time() - self.start_time)}s",
+            "speed?": 10.0,
+            "temp?": "60~62C",
+            "attitude?": f"pitch:0;roll:0;yaw:{self.yaw};",
+            "baro?": 0.0,
+            "tof?": f"{self.height * 10}mm",
+            "wifi?": 90,
+            "sdk?": 20,
+            "sn?": "0TQSIMULATOR",
+        }
+        return str(values.get(name, "error"))
+
+    def _command_loop(self):
+        # Commands are handled one at a time, like on the real drone
+        while self.is_running:
+            try:
+                data, address = self.command_socket.recvfrom(1024)
+            except socket.timeout:
+                continue
+            except OSError:
+                break
+
+            command = data.decode("utf-8", errors="replace").strip()
+            self.client_ip = address[0]
+            reply = self.handle_command(command)
+            self.commands_handled += 1
+            if reply is None:
+                continue
+            time.sleep(self.latency_for(command))
+            self.command_socket.sendto(reply.encode("utf-8"), address)
+
+    # --- State port ---
+
+    def state_packet(self):
+        flight_time = int(time.time() - self.start_time) if self.flying else 0
+        return (f"mid:-1;x:0;y:0;z:0;mpry:0,0,0;pitch:0;roll:0;yaw:{self.yaw};"
+                f"vgx:0;vgy:0;vgz:0;templ:60;temph:62;tof:{self.height + 10};h:{self.height};"
+                f"bat:{self.battery};baro:0.00;time:{flight_time};agx:0.00;agy:0.00;agz:-1000.00;\r\n")
+
+    def _state_loop(self):
+        state_socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        state_socket.bind((self.host, 0))
+        while self.is_running:
+            if self.client_ip is not None:
+                state_socket.sendto(self.state_packet().encode("ascii"), (self.client_ip, CLIENT_STATE_PORT))
+            time.sleep(0.1)
+        state_socket.close()
+
+    # --- Video port ---
+
+    def _video_loop(self):
+        video_socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        video_socket.bind((self.host, 0))
+        if self._encoded_units is None:
+            self._encoded_units = self.encode_video()
+        frame_interval = 1.0 / self.fps
+        index = 0
+        next_time = time.perf_counter()
+        while self.is_running:
+            if not self.streaming or self.client_ip is None:
+                time.sleep(0.05)
+                next_time = time.perf_counter()
+                continue
+            send_access_unit(video_socket, (self.client_ip, CLIENT_VIDEO_PORT),
+                             self._encoded_units[index % len(self._encoded_units)])
+            index += 1
+            next_time += frame_interval
+            time.sleep(max(0.0, next_time - time.perf_counter()))
+        video_socket.close()
+
+    def encode_video(self):
+        """
+        Encodes the video source to H.264 once, up front, so streaming it costs
+        (almost) nothing and every run sends exactly the same bytes.
+        """
+        if self.video is not None and self.video.endswith(".h264"):
+            with open(self.video, "rb") as f:
+                return split_access_units(f.read())
+
+        codec = av.CodecContext.create("libx264", "w")
+        codec.width, codec.height = self.resolution
+        codec.pix_fmt = "yuv420p"
+        codec.framerate = Fraction(self.fps).limit_denominator(1000)
+        codec.time_base = 1 / codec.framerate
+        codec.gop_size = int(self.fps)  # One keyframe per second
+        codec.options = {"preset": "ultrafast", "tune": "zerolatency"}
+
+        units = []
+        for index, frame in enumerate(self.read_frames()):
+            video_frame = av.VideoFrame.from_ndarray(frame, format="bgr24")
+            video_frame.pts = index
+            units.extend(bytes(packet) for packet in codec.encode(video_frame))
+        units.extend(bytes(packet) for packet in codec.encode(None))
+        print(f"Tello simulator encoded {len(units)} video frames")
+        return units
+
+    def read_frames(self):
+        """Yields BGR frames at the stream resolution from the configured source."""
+        width, height = self.resolution
+        if self.video is None:
+            yield from self._test_pattern()
+            return
+
+        if os.path.isdir(self.video):
+            paths = sorted(p for p in glob.glob(os.path.join(self.video, "*"))
+                           if p.lower().endswith(IMAGE_EXTENSIONS))
+            images = (cv2.imread(p) for p in paths[:self.max_frames])
+        else:
+            capture = cv2.VideoCapture(self.video)
+            images = []
+            while len(images) < self.max_frames:
+                ok, image = capture.read()
+                if not ok:
+                    break
+                images.append(image)
+            capture.release()
+
+        count = 0
+        for image in images:
+            if image is not None:
+                count += 1
+                yield cv2.resize(image, (width, height))
+        if count == 0:
+            raise ValueError(f"No frames could be read from {self.video}")
+
+    def _test_pattern(self):
+        width, height = self.resolution
+        for index in range(int(self.fps) * 4):
+            frame = np.full((height, width, 3), 64, dtype=np.uint8)
+            x = int((index * 8) % width)
+            cv2.rectangle(frame, (x, height // 3), (x + 80, height // 3 + 80), (0, 200, 255), -1)
+            cv2.putText(frame, f"SIM {index:04d}", (20, 60), cv2.FONT_HERSHEY_SIMPLEX, 1.5, (255, 255, 255), 2)
+            yield frame
+
+
+# --- Running the project scripts against the simulator ---
+
+def patch_djitellopy(host=SIM_HOST, command_port=SIM_COMMAND_PORT):
+    """Makes every new djitellopy Tello() talk to the simulator instead of the drone."""
+    from djitellopy import Tello
+
+    original_init = Tello.__init__
+
+    def __init__(self, host=host, *args, **kwargs):
+        original_init(self, host, *args, **kwargs)
+        self.address = (host, command_port)
+
+    Tello.__init__ = __init__
+
+
+def patch_cv2_headless(duration=None):
+    """
+    Turns the OpenCV window calls into no-ops so scripts run without a display, and
+    OverlayRenderer skips drawing since nothing is shown.
+    After ``duration`` seconds waitKey() reports a 'q' press, which ends the scripts' loops.
+    """
+    end_time = None if duration is None else time.time() + duration
+
+    def wait_key(delay=0):
+        time.sleep(max(delay, 1) / 1000.0)
+        if end_time is not None and time.time() >= end_time:
+            return ord("q")
+        return -1
+
+    cv2.imshow = lambda *args, **kwargs: None
+    cv2.namedWindow = lambda *args, **kwargs: None
+    cv2.destroyAllWindows = lambda *args, **kwargs: None
+    cv2.waitKey = wait_key
+    overlay.DISPLAY_ENABLED = False
+
+
+def run_script(path, args=()):
+    """Runs a project script as __main__ from its own folder, like `python script.py` would."""
+    path = os.path.abspath(path)
+    script_dir = os.path.dirname(path)
+    sys.argv = [path] + list(args)
+    sys.path.insert(0, script_dir)
+    os.chdir(script_dir)
+    runpy.run_path(path, run_name="__main__")
+
+
+def parse_latency(text):
+    name, _, value = text.partition("=")
+    return name, float(value)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Local Tello simulator. Optionally runs a project script against it, e.g. "
+                    "python -m tello_common.tello_sim --video clip.mp4 --headless Tello_Aruco/test_Aruco.py")
+    parser.add_argument("--video", help="Video file, .h264 file or image folder to stream (default: test pattern)")
+    parser.add_argument("--fps", type=float, default=30)
+    parser.add_argument("--resolution", default="960x720")
+    parser.add_argument("--port", type=int, default=SIM_COMMAND_PORT, help="Simulator command port")
+    parser.add_argument("--latency", type=parse_latency, action="append", default=[],
+                        help="Override a command latency in seconds, e.g. --latency takeoff=0.5")
+    parser.add_argument("--time-scale", type=float, default=1.0, help="Multiply all latencies by this factor")
+    parser.add_argument("--headless", action="store_true", help="Disable OpenCV windows in the script")
+    parser.add_argument("--duration", type=float, help="With --headless, press 'q' after this many seconds")
+    parser.add_argument("script", nargs="?", help="Project script to run against the simulator")
+    parser.add_argument("script_args", nargs=argparse.REMAINDER)
+    args = parser.parse_args()
+
+    width, height = (int(v) for v in args.resolution.split("x"))
+    simulator = TelloSimulator(command_port=args.port, video=args.video, fps=args.fps,
+                               resolution=(width, height), latencies=dict(args.latency),
+                               time_scale=args.time_scale)
+    simulator.start()
+
+    try:
+        if args.script:
+            patch_djitellopy(command_port=args.port)
+            if args.headless:
+                patch_cv2_headless(args.duration)
+            run_script(args.script, args.script_args)
+        else:
+            while True:
+                time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        simulator.stop()
@@ -1,5 +1,6 @@
 from djitellopy import Tello
 import cv2
+from tello_common.frame_views import FrameViews
 
 # Connect to the drone
 tello = Tello()
@@ -9,17 +10,22 @@ tello.streamon()  # Start the video stream
 # Create a window to display the video feed
 cv2.namedWindow("Tello Video Feed")
 
+# Conversions of the current frame, computed once into buffers reused from frame to frame
+views = FrameViews()
+
 # Main loop to read and display frames
 while True:
     frame_read = tello.get_frame_read()
     frame = frame_read.frame
 
-    # Process the frame (this is where detection will go)
+    views.reset(frame)
+
+    # Process the frame (this is where detection will go); detectors
+    # share views.gray, views.rgb and views.scaled(0.5) instead of converting again
     # ...
 
     # Display the processed frame
-    frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-    cv2.imshow("Tello Video Feed", frame)
+    cv2.imshow("Tello Video Feed", views.rgb)
 
     # Press 'q' to quit
     if cv2.waitKey(1) & 0xFF == ord('q'):